@@ -2,40 +2,31 @@ from __future__ import annotations
 
 import json
 import os
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 
-from script.audio_renderer import AudioRenderer
-from script.dataset_presets import DatasetPreset, DATASET_PRESETS
-from script.drum_mapping import DrumMapping
-from script.drum_pattern_generator import DrumPatternGenerator
-from script.harmony_generator import HarmonyGenerator
-from script.dataset_builder import DatasetBuilder
-from script.label_extractor import LabelExtractor
-from script.midi_song_builder import MidiSongBuilder
+from script.cli import create_dataset_builder, select_presets
+from script.dataset_planner import DatasetPlanner
+from script.run_config import load_run_config
+
+# Alternative ohne Code-Änderung (Konfigurationsdatei + Overrides, Worker, Shards):
+#   python -m script build --config run.example.toml --workers 16 --shard 3/8
+# Die Konstanten unten überschreiben DEFAULT_RUN_CONFIG (script/run_config.py);
+# Pipeline und Preset-Auswahl baut main() wie die CLI (create_dataset_builder).
 
 # ---------------------------------------------------------------------------
 # SYSTEM-DEPENDENT PATHS AND IO PARAMETERS
 # ---------------------------------------------------------------------------
 
-CUSTOM_DIRECTORY = True
-
 PROJECT_ROOT = Path(__file__).resolve().parent
 DEFAULT_DATA_ROOT = PROJECT_ROOT / "data"
 
-if CUSTOM_DIRECTORY:
-    # Dataset soll hier rein (Ordnername ist DER Dataset-Ordner selbst)
-    DATASET_OUTPUT_ROOT_DIRECTORY = Path("/home/entraID/benedikt.kolodziej@study.hs-duesseldorf.de/data/synthetic_drums_dataset_v1")
+# Dataset soll hier rein (Ordnername ist DER Dataset-Ordner selbst)
+DATASET_OUTPUT_ROOT_DIRECTORY = DEFAULT_DATA_ROOT / "synthetic_drums_dataset_test_v1"  # alternative: eigener Pfad
 
-    # YourMT3 Index-Dateien sollen in existierenden Ordner (ohne extra Unterordner)
-    YOURMT3_INDEX_OUTPUT_DIRECTORY = Path("/home/entraID/benedikt.kolodziej@study.hs-duesseldorf.de/data/yourmt3_indexes")
-else:
-    DATASET_OUTPUT_ROOT_DIRECTORY = DEFAULT_DATA_ROOT / "synthetic_drums_dataset_test_v1"
-    YOURMT3_INDEX_OUTPUT_DIRECTORY = DEFAULT_DATA_ROOT / "yourmt3_indexes"
+# YourMT3 Index-Dateien sollen in existierenden Ordner (ohne extra Unterordner)
+YOURMT3_INDEX_OUTPUT_DIRECTORY = DEFAULT_DATA_ROOT / "yourmt3_indexes"
 
-# optional: sicherstellen, dass Ordner existieren
-DATASET_OUTPUT_ROOT_DIRECTORY.mkdir(parents=True, exist_ok=True)
-YOURMT3_INDEX_OUTPUT_DIRECTORY.mkdir(parents=True, exist_ok=True)
 # Subfolders (relative to OUTPUT_ROOT_DIRECTORY)
 MIDI_SUBDIR = "midi"    # e.g. "midi_files"
 AUDIO_SUBDIR = "audio"  # e.g. "wav"
@@ -45,8 +36,22 @@ NOTE_EVENTS_SUBDIR = "note_events"
 # Audio / MIDI rendering backends and rates
 SOUNDFONT_PATH = "Assets/GeneralUser-GS.sf2"  # alternative: any valid .sf2 soundfont
 AUDIO_SAMPLE_RATE = 16000                     # alternatives: 44100, 48000
+# Mix zusätzlich in weiteren Raten (audio_<rate>/, n_frames je Rate im Index); FluidSynth
+# rendert einmal mit der höchsten Rate, die übrigen entstehen per Polyphasen-Resampling
+EXTRA_SAMPLE_RATES: List[int] = []            # alternative: [44100]
 AUDIO_RENDER_BACKEND = "fluidsynth"           # alternative: "noop" for dry-run testing
 
+# Vor dem Build prüfen, ob die Soundfont alle Instrument-Programme und das Drum-Kit
+# enthält; die Preset-Tabelle wird je Soundfont-Hash in SOUNDFONT_CACHE_DIRECTORY gecacht
+SOUNDFONT_PREFLIGHT = "error"                 # alternatives: "warn", "off"
+SOUNDFONT_CACHE_DIRECTORY = DEFAULT_DATA_ROOT / ".soundfont_cache"
+
+# Mehrere Soundfonts für mehr Klangvielfalt: jeder Song bekommt deterministisch eine
+# davon (im Index unter "soundfont"); pro Prozess bleiben geladene Soundfonts bis
+# SOUNDFONT_MEMORY_LIMIT_MB im Speicher
+SOUNDFONT_POOL: Optional[List[str]] = None  # alternative: ["Assets/GeneralUser-GS.sf2", "Assets/FluidR3_GM.sf2"]
+SOUNDFONT_MEMORY_LIMIT_MB = 2048             # alternative: 512 auf Maschinen mit wenig RAM
+
 MIDI_SAMPLE_RATE = 16000   # only relevant if you align MIDI and audio in time
 MIDI_TICKS_PER_BEAT = 480  # alternative: 960 for higher timing resolution
 
@@ -64,10 +69,47 @@ MAX_SONG_LENGTH_SECONDS = 60.0  # e.g. 120.0 for longer songs
 # Global seed for deterministic dataset generation
 GLOBAL_RANDOM_SEED = 1234  # change to get a different global randomization
 
+# Dry-Run: nur planen (Songs, Audio-Stunden, Speicher, Laufzeit), nichts rendern
+DRY_RUN = False  # alternative: True, um einen Lauf vorab abzuschätzen
+
+# Akkordspuren spaltenweise (NumPy) erzeugen statt Note für Note
+HARMONY_BATCHED = False  # alternative: True (spaltenweise, gleiche Noten)
+
+# Drum- und Harmonie-Generator rechnen in ganzzahligen MIDI-Ticks (MIDI_TICKS_PER_BEAT)
+# statt in Sekunden; MIDI-Datei und Labels stimmen dann tickgenau überein
+TICK_TIMELINE = False  # alternative: True
+
+# Labels/Noten werden direkt aus den Events abgeleitet; dieser Anteil der Songs
+# wird zusätzlich gegen die eingelesene MIDI-Datei geprüft
+LABEL_VERIFY_FRACTION = 0.0  # alternative: z. B. 0.01 (1 % der Songs)
+
+# Stille am Songende (Pausen-Takte, leise Hallfahnen) kürzen: RMS-Hüllkurve, danach
+# bleibt release_seconds Ausklang; nie vor dem Ende der letzten Note (Labels bleiben gültig)
+SILENCE_TRIM: Optional[dict] = None  # alternative: {"threshold_db": -60, "release_seconds": 0.5}
+
+# Songs auf eine gemeinsame integrierte Lautheit (BS.1770, LUFS) normieren, Sample-Peak
+# höchstens peak_dbfs; Messung und Verstärkung stehen je Song im Index (loudness)
+LOUDNESS_NORMALIZATION: Optional[dict] = None  # alternative: {"target_lufs": -20, "peak_dbfs": -1}
+
+# Audio zusätzlich als Segmente fester Länge (segments/<song>_segments.npy, (n, Länge) float32)
+# mit note_events und tie_note_events je Segment (segments/<song>_segment_events.npy)
+SEGMENT_SLICING: Optional[dict] = None  # alternative: {"segment_seconds": 2.048}
+
+# Drum- und Begleit-Stems (stems/<song>_drums.wav, _accompaniment.wav) im selben
+# Synthese-Durchlauf wie der Mix
+EXPORT_STEMS = False  # alternative: True
+
+# Augmentierte Mix-Varianten je Song (EQ, Hall, Kompressor, Gain, Rauschen) aus dem
+# gerenderten Signal, ohne erneutes Rendern; None = nur der Standard-Mix
+AUDIO_AUGMENTATION: Optional[dict] = None  # alternative: {"number_of_variants": 2, "seed": 7}
+
 # Label extraction parameters (used for LabelExtractor)
 MINIMUM_VELOCITY = 5         # alternative: 1 if you want to keep very soft notes
 TIME_UNIT = "seconds"        # alternative: "ticks"
 INCLUDE_NON_DRUMS = True     # alternative: False if you want drum-only labels
+# Format der Label-Dateien (Debug/Legacy): "json" (eingerückt), "json_compact",
+# "note_sequence", "binary" (.npz) oder "none" (keine Label-Dateien)
+LABEL_FORMAT = "json"        # alternative: "none" für große Läufe
 
 
 # Split-Konfiguration für YourMT3 file_lists
@@ -79,7 +121,13 @@ SPLIT_SEED = 1234
 # Which presets to use when building a full dataset.
 # Use names from DATASET_PRESETS.keys().
 
-PRESET_NAMES_TO_USE: List[str] = list(DATASET_PRESETS.keys())
+# Presets prozedural aus einem Raster (PresetGrid) statt aus DATASET_PRESETS, z. B.
+# {"samples_per_cell": 2, "sampling": "lhs", "tempo_range": (95, 135), "seed": 7}
+PRESET_GRID: Optional[dict] = None  # alternative: {"styles": ("funk", "disco"), "samples_per_cell": 4}
+
+# None = alle Presets (aus DATASET_PRESETS bzw. dem PRESET_GRID); die Registry wird
+# erst in main() aufgebaut, nicht beim Import
+PRESET_NAMES_TO_USE: Optional[List[str]] = None
 
     # "pop-straight__C-major__T120__Cmid__Smid__I4-8",
     # "pop-straight__C-major__T100__Clow__Slow__I4-6",
@@ -87,120 +135,97 @@ PRESET_NAMES_TO_USE: List[str] = list(DATASET_PRESETS.keys())
     # "disco__C-major__T128__Chigh__Smid__I5-8",
     # alternative: list(DATASET_PRESETS.keys()) to use all presets
 
-# How many different presets to use when calling build_dataset
-NUMBER_OF_PRESETS = len(PRESET_NAMES_TO_USE)  # e.g. 1 (single preset), 4, len(PRESET_NAMES_TO_USE)
-
-# Safety check: NUMBER_OF_PRESETS must not exceed the number of configured preset names
-assert NUMBER_OF_PRESETS <= len(PRESET_NAMES_TO_USE), (
-    "NUMBER_OF_PRESETS is larger than PRESET_NAMES_TO_USE. "
-    "Either reduce NUMBER_OF_PRESETS or add more preset names."
-)
-
-dataset_config = {
-    "output_root_directory": DATASET_OUTPUT_ROOT_DIRECTORY,
-    "midi_subdir": MIDI_SUBDIR,
-    "audio_subdir": AUDIO_SUBDIR,
-    "soundfont_path": SOUNDFONT_PATH,
-    "audio_sample_rate": AUDIO_SAMPLE_RATE,
-    "audio_render_backend": AUDIO_RENDER_BACKEND,
-    "midi_sample_rate": MIDI_SAMPLE_RATE,
-    "midi_ticks_per_beat": MIDI_TICKS_PER_BEAT,
-    "number_of_songs": NUMBER_OF_SONGS,
-    "number_of_presets": NUMBER_OF_PRESETS,
-    "min_song_length_seconds": MIN_SONG_LENGTH_SECONDS,
-    "max_song_length_seconds": MAX_SONG_LENGTH_SECONDS,
-    "global_random_seed": GLOBAL_RANDOM_SEED,
-    "minimum_velocity": MINIMUM_VELOCITY,
-    "time_unit": TIME_UNIT,
-    "include_non_drums": INCLUDE_NON_DRUMS,
-    "preset_names_to_use": PRESET_NAMES_TO_USE,
-    "train_ratio": TRAIN_RATIO,
-    "val_ratio": VAL_RATIO,
-    "test_ratio": TEST_RATIO,
-    "split_seed": SPLIT_SEED,
-}
-
-def main() -> None:
-    # ------------------------------------------------------------------
-    # 1) Basis-Objekte anlegen
-    # ------------------------------------------------------------------
-    drum_mapping = DrumMapping.create_default()
-
-    drum_pattern_generator = DrumPatternGenerator(
-        drum_mapping=drum_mapping,
-        complexity=0.5,              # Startwerte, werden pro Preset überschrieben
-        ghostnote_probability=0.3,
-        fill_probability=0.3,
-        swing_amount=0.1,
-        pause_probability=0.3,
-    )
-
-    # HarmonyGenerator über Hilfsmethode im DatasetBuilder erstellen
-    harmony_generator = DatasetBuilder.create_harmony_generator()
-
-    # MidiSongBuilder mit Sample-Rate und Ticks pro Beat
-    midi_song_builder = MidiSongBuilder(
-        sample_rate=MIDI_SAMPLE_RATE,
-        ticks_per_beat=MIDI_TICKS_PER_BEAT,
-        drum_mapping=drum_mapping,
-    )
-
-    # AudioRenderer mit Soundfont / Backend
-    audio_renderer = AudioRenderer(
-        soundfont_path=SOUNDFONT_PATH,
-        output_sample_rate=AUDIO_SAMPLE_RATE,
-        render_backend=AUDIO_RENDER_BACKEND,
-    )
-
-    # LabelExtractor mit Velocity-Filter etc.
-    label_extractor = LabelExtractor(
-        drum_mapping=drum_mapping,
-        minimum_velocity=MINIMUM_VELOCITY,
-        time_unit=TIME_UNIT,
-        include_non_drums=INCLUDE_NON_DRUMS,
-    )
+# Optionaler Filter über die Preset-Tabelle (siehe PresetRegistry.select), z. B.
+# {"styles": ["funk", "disco"], "tempo_range": (100, 130), "instrument_count": (4, 6)}
+PRESET_FILTER: Optional[dict] = None  # alternative: {"complexity_range": (0.7, 1.0)}
+
+# How many different presets to use when calling build_dataset (None = all after PRESET_FILTER);
+# load_run_config rejects values larger than the number of selected preset names
+NUMBER_OF_PRESETS: Optional[int] = None  # e.g. 1 (single preset), 4
+
+
+def load_dataset_config() -> dict:
+    """Baut dataset_config aus DEFAULT_RUN_CONFIG und den Konstanten dieses Moduls.
+
+    Der Import dieses Moduls hat keine Seiteneffekte (keine Ordner, keine
+    schweren Bibliotheken); Konfiguration und Ordner entstehen erst in main().
+    Geprüft wird wie in der CLI (load_run_config).
+    """
+    return load_run_config(overrides={
+        "output_root_directory": str(DATASET_OUTPUT_ROOT_DIRECTORY),
+        "yourmt3_index_output_directory": str(YOURMT3_INDEX_OUTPUT_DIRECTORY),
+        "midi_subdir": MIDI_SUBDIR,
+        "audio_subdir": AUDIO_SUBDIR,
+        "soundfont_path": SOUNDFONT_PATH,
+        "audio_sample_rate": AUDIO_SAMPLE_RATE,
+        "extra_sample_rates": EXTRA_SAMPLE_RATES,
+        "audio_render_backend": AUDIO_RENDER_BACKEND,
+        "soundfont_preflight": SOUNDFONT_PREFLIGHT,
+        "soundfont_cache_directory": str(SOUNDFONT_CACHE_DIRECTORY),
+        "soundfont_pool": SOUNDFONT_POOL,
+        "soundfont_memory_limit_mb": SOUNDFONT_MEMORY_LIMIT_MB,
+        "midi_sample_rate": MIDI_SAMPLE_RATE,
+        "midi_ticks_per_beat": MIDI_TICKS_PER_BEAT,
+        "number_of_songs": NUMBER_OF_SONGS,
+        "number_of_presets": NUMBER_OF_PRESETS,
+        "min_song_length_seconds": MIN_SONG_LENGTH_SECONDS,
+        "max_song_length_seconds": MAX_SONG_LENGTH_SECONDS,
+        "global_random_seed": GLOBAL_RANDOM_SEED,
+        "minimum_velocity": MINIMUM_VELOCITY,
+        "time_unit": TIME_UNIT,
+        "include_non_drums": INCLUDE_NON_DRUMS,
+        "harmony_batched": HARMONY_BATCHED,
+        "tick_timeline": TICK_TIMELINE,
+        "label_verify_fraction": LABEL_VERIFY_FRACTION,
+        "label_format": LABEL_FORMAT,
+        "audio_augmentation": AUDIO_AUGMENTATION,
+        "silence_trim": SILENCE_TRIM,
+        "loudness_normalization": LOUDNESS_NORMALIZATION,
+        "segment_slicing": SEGMENT_SLICING,
+        "export_stems": EXPORT_STEMS,
+        "preset_names_to_use": PRESET_NAMES_TO_USE,
+        "preset_grid": PRESET_GRID,
+        "preset_filter": PRESET_FILTER,
+        "train_ratio": TRAIN_RATIO,
+        "val_ratio": VAL_RATIO,
+        "test_ratio": TEST_RATIO,
+        "split_seed": SPLIT_SEED,
+    })
 
-    # Presets auswählen
-    selected_preset_names = PRESET_NAMES_TO_USE[:NUMBER_OF_PRESETS]
-    selected_presets: List[DatasetPreset] = [
-        DATASET_PRESETS[name] for name in selected_preset_names
-    ]
 
-    # Wenn du band_configuration_pool aktuell nicht nutzt, gib einfach eine leere Liste rein
-    band_configuration_pool: List = []
+def main() -> None:
+    dataset_config = load_dataset_config()
 
     # ------------------------------------------------------------------
-    # 2) DatasetBuilder erstellen
+    # 1) Pipeline und Presets wie in der CLI (script/cli.py)
     # ------------------------------------------------------------------
-    builder = DatasetBuilder(
-        output_root_directory=DATASET_OUTPUT_ROOT_DIRECTORY,
-        number_of_songs=NUMBER_OF_SONGS,
-        band_configuration_pool=band_configuration_pool,
-        drum_pattern_generator=drum_pattern_generator,
-        harmony_generator=harmony_generator,
-        midi_song_builder=midi_song_builder,
-        audio_renderer=audio_renderer,
-        label_extractor=label_extractor,
-        drum_mapping=drum_mapping,
-        random_seed=GLOBAL_RANDOM_SEED,
-        min_song_length_seconds=MIN_SONG_LENGTH_SECONDS,
-        max_song_length_seconds=MAX_SONG_LENGTH_SECONDS,
-    )
+    builder = create_dataset_builder(dataset_config)
+    selected_presets = select_presets(dataset_config)
+
+    if DRY_RUN:
+        planner = DatasetPlanner(builder)
+        report = planner.estimate(
+            presets=selected_presets,
+            dataset_config=dataset_config,
+            output_root=str(DATASET_OUTPUT_ROOT_DIRECTORY),
+        )
+        print(report.summary())
+        return
 
     # ------------------------------------------------------------------
-    # 3) Datensatz bauen (ggf. fortsetzen)
+    # 2) Datensatz bauen (ggf. fortsetzen)
     # ------------------------------------------------------------------
+    # sicherstellen, dass Ordner existieren (erst hier, nicht beim Import)
+    DATASET_OUTPUT_ROOT_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    YOURMT3_INDEX_OUTPUT_DIRECTORY.mkdir(parents=True, exist_ok=True)
+
     examples = builder.build_dataset(
         presets=selected_presets,
         output_root=str(DATASET_OUTPUT_ROOT_DIRECTORY),
         dataset_config=dataset_config,
         yourmt3_index_output_dir=str(YOURMT3_INDEX_OUTPUT_DIRECTORY),
     )
-    # ------------------------------------------------------------------
-    # 4) Index-Datei aktualisieren (Append-Logik steckt in builder.save_index)
-    # ------------------------------------------------------------------
-    builder.save_index(output_root=DATASET_OUTPUT_ROOT_DIRECTORY)
-
+    # build_dataset schreibt dataset_index.json bereits (Append-Logik in builder.save_index)
     index_path = os.path.join(DATASET_OUTPUT_ROOT_DIRECTORY, "dataset_index.json")
 
     print("\n============================================================")
@@ -210,7 +235,7 @@ def main() -> None:
     print(f"- Audio       in: {os.path.join(DATASET_OUTPUT_ROOT_DIRECTORY, AUDIO_SUBDIR)}")
     print(f"- Notes (.npy) in: {os.path.join(DATASET_OUTPUT_ROOT_DIRECTORY, NOTES_SUBDIR)}")
     print(f"- NoteEvents   in: {os.path.join(DATASET_OUTPUT_ROOT_DIRECTORY, NOTE_EVENTS_SUBDIR)}")
-    print(f"- YourMT3 idx  in: {os.path.join('data', 'yourmt3_indexes')}")
+    print(f"- YourMT3 idx  in: {YOURMT3_INDEX_OUTPUT_DIRECTORY}")
     print(f"- Index:     {index_path}")
     print("============================================================")
 
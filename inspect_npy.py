@@ -1,37 +1,43 @@
-# python inspect_npy.py
+# python inspect_npy.py data/synthetic_drums_dataset_test_1 [--song 0]
 
 from __future__ import annotations
 
-import numpy as np
-
-PATH = r"data\synthetic_drums_dataset_test_1\notes\0001_C-major_pop-straight_Inst8_BPM120_Seed1235_notes.npy"
-# oder note_events:
-# PATH = r"data/synthetic_drums_yourmt3_16k/note_events/<DEIN_FILE>_note_events.npy"
-
-obj = np.load(PATH, allow_pickle=True)
-
-print("type:", type(obj))
-print("shape:", getattr(obj, "shape", None))
-print("dtype:", getattr(obj, "dtype", None))
-
-data = obj.item()  # weil wir ein dict gespeichert haben
-print("keys:", list(data.keys()))
-
-# Beispiel: Notes anzeigen (die ersten 5)
-if "notes" in data:
-    notes = data["notes"]
-    print("notes count:", len(notes))
-    for n in notes[:5]:
-        print(n)
-
-# Beispiel: NoteEvents anzeigen (die ersten 10)
-if "note_events" in data:
-    ne = data["note_events"]
-    # je nach Format: Liste oder verschachtelt
-    if isinstance(ne, list) and len(ne) > 0 and isinstance(ne[0], list):
-        flat = ne[0]
-    else:
-        flat = ne
-    print("note_events count:", len(flat))
-    for e in flat[:10]:
-        print(e)
+import argparse
+from typing import List, Optional
+
+from script.dataset_reader import DatasetReader
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Zeigt Metadaten, notes und note_events eines Songs.")
+    parser.add_argument("output_root", help="Datensatz-Ordner mit dataset_index.json")
+    parser.add_argument("--song", default="0", help="Position im Index oder song_identifier (Default: 0)")
+    parser.add_argument("--notes", type=int, default=5, help="Anzahl angezeigter Notes")
+    parser.add_argument("--events", type=int, default=10, help="Anzahl angezeigter NoteEvents")
+    args = parser.parse_args(argv)
+
+    with DatasetReader(args.output_root) as reader:
+        song = reader[int(args.song)] if args.song.isdigit() else reader[args.song]
+        info = song.audio_info
+
+        print("song:", song.song_identifier)
+        print("songs im Datensatz:", len(reader))
+        print("program:", song.program)
+        print("is_drum:", song.is_drum)
+        print(f"audio: {info.n_frames} Frames, {info.sample_rate} Hz, {info.channels} Kanal/Kanäle, "
+              f"{info.duration_sec:.2f} s")
+
+        notes = song.notes
+        print("notes count:", len(notes))
+        for note in notes[:args.notes]:
+            print(note)
+
+        note_events = song.note_events
+        print("note_events count:", len(note_events))
+        for event in note_events[:args.events]:
+            print(event)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
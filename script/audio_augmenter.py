@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .biquad_filters import biquad_response, peak_coefficients, shelf_coefficients
+
+# Verfügbare Effekte in fester Verarbeitungsreihenfolge
+AUGMENTATION_EFFECTS: Tuple[str, ...] = ("eq", "reverb", "compression", "gain", "noise")
+
+# Parameterbereiche (gleichverteilt gezogen, je Variante)
+EQ_GAIN_DB_RANGE = (-6.0, 6.0)
+EQ_LOW_SHELF_HZ_RANGE = (80.0, 250.0)
+EQ_PEAK_HZ_RANGE = (300.0, 3000.0)
+EQ_PEAK_Q_RANGE = (0.7, 2.0)
+EQ_HIGH_SHELF_HZ_RANGE = (3000.0, 8000.0)
+REVERB_WET_RANGE = (0.05, 0.35)
+COMPRESSION_THRESHOLD_DB_RANGE = (-30.0, -12.0)  # relativ zum RMS-Pegel des Songs
+COMPRESSION_RATIO_RANGE = (2.0, 6.0)
+COMPRESSION_BLOCK_SECONDS = 0.01
+GAIN_DB_RANGE = (-6.0, 3.0)
+GAIN_BREAKPOINTS_RANGE = (2, 8)
+NOISE_SNR_DB_RANGE = (20.0, 45.0)
+
+# Spitzenpegel, über dem eine Variante herunterskaliert wird (kein Clipping beim PCM-Export)
+PEAK_LIMIT = 0.99
+
+
+def _uniform(rng: np.random.Generator, value_range: Tuple[float, float], n: int) -> np.ndarray:
+    return rng.uniform(value_range[0], value_range[1], size=n)
+
+
+def _interpolate_rows(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Lineare Interpolation je Zeile an gemeinsamen, gebrochenen Indexpositionen.
+
+    Args:
+        values: Stützwerte, Form (Zeilen, Stützstellen).
+        positions: Gebrochene Indizes in 0..Stützstellen-1, Form (Samples,).
+
+    Returns:
+        Interpolierte Werte, Form (Zeilen, Samples).
+    """
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, values.shape[1] - 1)
+    fraction = (positions - lower).astype(values.dtype)
+    return values[:, lower] * (1 - fraction) + values[:, upper] * fraction
+
+
+class AudioAugmenter:
+    """Erzeugt aus einem gerenderten Signal mehrere augmentierte Mix-Varianten.
+
+    Verantwortung:
+        AudioAugmenter arbeitet nach dem Rendern auf dem Puffer im Speicher,
+        statt den Song erneut durch FluidSynth zu schicken. Alle Varianten
+        eines Songs werden gemeinsam als Matrix (Varianten × Samples)
+        berechnet:
+            - "eq": Low-Shelf, Peaking-EQ und High-Shelf (RBJ-Biquads),
+            - "reverb": Faltung mit einer von wenigen synthetischen
+              Raumimpulsantworten (Dry/Wet-Mix),
+            - "compression": Kompressor auf 10-ms-Blöcken (RMS-Hüllkurve),
+            - "gain": zufällige Lautstärkekurve über den Song,
+            - "noise": weißes Rauschen mit zufälligem Signal-Rausch-Abstand.
+        EQ und Hall werden als Frequenzgang in einer einzigen FFT-Faltung
+        angewendet; die Biquads gehen dabei über ihren Frequenzgang ein
+        (Direktform-Koeffizienten, ausgewertet auf den FFT-Bins), nicht
+        über eine Sample-für-Sample-Rekursion.
+        Die Parameter jeder Variante hängen nur von seed und der Seed des
+        Songs ab; die Länge bleibt gleich, die Labels gelten also unverändert.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int,
+            number_of_variants: int,
+            effects: Sequence[str] = AUGMENTATION_EFFECTS,
+            seed: int = 0,
+            number_of_impulse_responses: int = 8,
+            impulse_response_seconds: float = 0.6,
+    ) -> None:
+        """Konstruktor für den AudioAugmenter.
+
+        Args:
+            sample_rate: Samplerate der Signale.
+            number_of_variants: Anzahl augmentierter Varianten pro Song.
+            effects: Aktive Effekte (Teilmenge von AUGMENTATION_EFFECTS).
+            seed: Seed für Impulsantworten und Variantenparameter.
+            number_of_impulse_responses: Größe des Impulsantwort-Satzes.
+            impulse_response_seconds: Länge jeder Impulsantwort.
+
+        Raises:
+            ValueError: Bei unbekannten Effekten oder number_of_variants < 1.
+        """
+        unknown = [effect for effect in effects if effect not in AUGMENTATION_EFFECTS]
+        if unknown:
+            raise ValueError(
+                f"Unbekannte Augmentierungs-Effekte: {', '.join(unknown)} "
+                f"(erlaubt: {', '.join(AUGMENTATION_EFFECTS)})"
+            )
+        if int(number_of_variants) < 1:
+            raise ValueError("number_of_variants muss mindestens 1 sein.")
+
+        self.sample_rate = int(sample_rate)
+        self.number_of_variants = int(number_of_variants)
+        self.effects: Tuple[str, ...] = tuple(effect for effect in AUGMENTATION_EFFECTS if effect in effects)
+        self.seed = int(seed)
+        self.impulse_responses = self._create_impulse_responses(
+            int(number_of_impulse_responses),
+            int(round(impulse_response_seconds * self.sample_rate)),
+        )
+
+    @classmethod
+    def from_config(cls, audio_augmentation: Mapping[str, Any], sample_rate: int) -> "AudioAugmenter":
+        """Baut einen AudioAugmenter aus dem Konfigurationswert audio_augmentation.
+
+        Erlaubt sind die Schlüsselwortargumente des Konstruktors außer sample_rate.
+
+        Raises:
+            ValueError: Bei unbekannten Schlüsseln.
+        """
+        allowed = (
+            "number_of_variants",
+            "effects",
+            "seed",
+            "number_of_impulse_responses",
+            "impulse_response_seconds",
+        )
+        unknown = [key for key in audio_augmentation if key not in allowed]
+        if unknown:
+            raise ValueError(f"Unbekannte audio_augmentation-Schlüssel: {', '.join(unknown)}")
+        return cls(sample_rate=sample_rate, **dict(audio_augmentation))
+
+    @property
+    def variant_names(self) -> Tuple[str, ...]:
+        """Namen der Mix-Varianten (mix_variant im Index, Suffix der WAV-Datei)."""
+        return tuple(f"aug{index:02d}" for index in range(self.number_of_variants))
+
+    def _create_impulse_responses(self, count: int, length: int) -> np.ndarray:
+        """Synthetische Raumimpulsantworten: exponentiell abklingendes Rauschen.
+
+        Jede Antwort hat eine eigene Nachhallzeit (RT60 0.2–1.2 s) und eine
+        leichte Tiefpass-Färbung; normiert auf Energie 1.
+        """
+        rng = np.random.default_rng([self.seed, 0x1F])
+        length = max(1, length)
+        t = np.arange(length) / self.sample_rate
+
+        rt60 = rng.uniform(0.2, 1.2, size=(count, 1))
+        envelope = np.exp(-6.907755 * t / rt60)  # -60 dB nach rt60 Sekunden
+        responses = rng.standard_normal((count, length)) * envelope
+        # Leichte Tiefpass-Färbung (höhere Frequenzen klingen in Räumen schneller ab)
+        responses[:, 1:] += 0.5 * responses[:, :-1]
+        responses[:, 0] = 0.0  # der Direktschall steckt im Dry-Anteil
+        responses /= np.sqrt(np.sum(responses ** 2, axis=1, keepdims=True))
+        return responses
+
+    # ------------------------------------------------------------------
+    # Einzelne Stufen (alle auf Matrizen Varianten × Samples)
+    # ------------------------------------------------------------------
+
+    def _spectral_stage(self, audio: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """EQ und Hall als gemeinsamer Frequenzgang in einer FFT-Faltung."""
+        n, n_variants = audio.shape[0], self.number_of_variants
+        ir_length = self.impulse_responses.shape[1] if "reverb" in self.effects else 1
+        nfft = 1 << int(np.ceil(np.log2(n + ir_length - 1)))
+
+        bins = nfft // 2 + 1
+        response = np.ones((n_variants, bins), dtype=np.complex128)
+
+        if "eq" in self.effects:
+            nyquist_guard = 0.45 * self.sample_rate
+            z_inv = np.exp(-2j * np.pi * np.arange(bins) / nfft)
+            low_b, low_a = shelf_coefficients(
+                "low",
+                np.minimum(_uniform(rng, EQ_LOW_SHELF_HZ_RANGE, n_variants), nyquist_guard),
+                _uniform(rng, EQ_GAIN_DB_RANGE, n_variants),
+                self.sample_rate,
+            )
+            peak_b, peak_a = peak_coefficients(
+                np.minimum(_uniform(rng, EQ_PEAK_HZ_RANGE, n_variants), nyquist_guard),
+                _uniform(rng, EQ_GAIN_DB_RANGE, n_variants),
+                _uniform(rng, EQ_PEAK_Q_RANGE, n_variants),
+                self.sample_rate,
+            )
+            high_b, high_a = shelf_coefficients(
+                "high",
+                np.minimum(_uniform(rng, EQ_HIGH_SHELF_HZ_RANGE, n_variants), nyquist_guard),
+                _uniform(rng, EQ_GAIN_DB_RANGE, n_variants),
+                self.sample_rate,
+            )
+            for b, a in ((low_b, low_a), (peak_b, peak_a), (high_b, high_a)):
+                response *= biquad_response(b, a, z_inv)
+
+        if "reverb" in self.effects:
+            ir_indices = rng.integers(0, len(self.impulse_responses), size=n_variants)
+            wet = _uniform(rng, REVERB_WET_RANGE, n_variants)[:, None]
+            ir_spectra = np.fft.rfft(self.impulse_responses[ir_indices], nfft, axis=1)
+            response *= (1.0 - wet) + wet * ir_spectra
+
+        spectrum = np.fft.rfft(audio, nfft)
+        return np.fft.irfft(spectrum[None, :] * response, nfft, axis=1)[:, :n]
+
+    def _compress(self, audio: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Kompressor mit Block-RMS-Hüllkurve, linear interpolierter Gain und Make-up-Gain.
+
+        Der Make-up-Gain bringt jede Variante auf den RMS-Pegel vor der
+        Kompression zurück (stille Blöcke ziehen ihn so nicht gegen 0 dB).
+        """
+        n_variants, n = audio.shape
+        block = max(1, int(round(COMPRESSION_BLOCK_SECONDS * self.sample_rate)))
+        n_blocks = -(-n // block)
+        padded = np.zeros((n_variants, n_blocks * block))
+        padded[:, :n] = audio
+        block_rms = np.sqrt(np.mean(padded.reshape(n_variants, n_blocks, block) ** 2, axis=2))
+
+        eps = 1e-9
+        level_db = 20.0 * np.log10(block_rms + eps)
+        song_rms_db = 20.0 * np.log10(np.sqrt(np.mean(audio ** 2, axis=1, keepdims=True)) + eps)
+        threshold_db = song_rms_db + _uniform(rng, COMPRESSION_THRESHOLD_DB_RANGE, n_variants)[:, None]
+        ratio = _uniform(rng, COMPRESSION_RATIO_RANGE, n_variants)[:, None]
+
+        gain_db = np.minimum(0.0, (threshold_db - level_db) * (1.0 - 1.0 / ratio))
+
+        positions = np.minimum((np.arange(n) + 0.5) / block - 0.5, n_blocks - 1).clip(0.0)
+        compressed = audio * 10.0 ** (_interpolate_rows(gain_db, positions) / 20.0)
+
+        # Make-up: RMS-Pegel vor der Kompression wiederherstellen
+        input_rms = np.sqrt(np.mean(audio ** 2, axis=1, keepdims=True))
+        output_rms = np.sqrt(np.mean(compressed ** 2, axis=1, keepdims=True))
+        return compressed * np.where(output_rms > eps, input_rms / np.maximum(output_rms, eps), 1.0)
+
+    def _apply_gain_curve(self, audio: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Lautstärkekurve aus zufälligen Stützstellen (dB), linear interpoliert."""
+        n_variants, n = audio.shape
+        n_points = int(rng.integers(GAIN_BREAKPOINTS_RANGE[0], GAIN_BREAKPOINTS_RANGE[1] + 1))
+        gain_db = rng.uniform(GAIN_DB_RANGE[0], GAIN_DB_RANGE[1], size=(n_variants, n_points))
+        positions = np.arange(n) * ((n_points - 1) / max(1, n - 1))
+        return audio * 10.0 ** (_interpolate_rows(gain_db, positions) / 20.0)
+
+    def _add_noise(self, audio: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Weißes Rauschen mit zufälligem Signal-Rausch-Abstand je Variante."""
+        n_variants, n = audio.shape
+        snr_db = _uniform(rng, NOISE_SNR_DB_RANGE, n_variants)[:, None]
+        signal_rms = np.sqrt(np.mean(audio ** 2, axis=1, keepdims=True))
+        noise = rng.standard_normal((n_variants, n))
+        return audio + noise * (signal_rms / 10.0 ** (snr_db / 20.0))
+
+    # ------------------------------------------------------------------
+    # Öffentliche API
+    # ------------------------------------------------------------------
+
+    def augment(self, audio: np.ndarray, song_seed: int) -> np.ndarray:
+        """Erzeugt alle Varianten eines Songs.
+
+        Args:
+            audio: Gerendertes Mono-Signal (beliebiger float-dtype).
+            song_seed: Seed des Songs (SongSpecification.random_seed).
+
+        Returns:
+            float32-Array der Form (number_of_variants, len(audio)), Spitzenpegel
+            höchstens PEAK_LIMIT.
+        """
+        audio = np.asarray(audio, dtype=np.float64).reshape(-1)
+        if audio.shape[0] == 0:
+            # Song ohne Noten: nichts zu augmentieren
+            return np.zeros((self.number_of_variants, 0), dtype=np.float32)
+
+        rng = np.random.default_rng([self.seed, int(song_seed) % (2 ** 63)])
+
+        if "eq" in self.effects or "reverb" in self.effects:
+            variants = self._spectral_stage(audio, rng)
+        else:
+            variants = np.repeat(audio[None, :], self.number_of_variants, axis=0)
+        if "compression" in self.effects:
+            variants = self._compress(variants, rng)
+        if "gain" in self.effects:
+            variants = self._apply_gain_curve(variants, rng)
+        if "noise" in self.effects:
+            variants = self._add_noise(variants, rng)
+
+        peak = np.max(np.abs(variants), axis=1, keepdims=True)
+        variants *= np.where(peak > PEAK_LIMIT, PEAK_LIMIT / np.maximum(peak, 1e-12), 1.0)
+        return variants.astype(np.float32)
+
+
+def audio_augmenter_for(
+        audio_augmentation: Optional[Mapping[str, Any]],
+        sample_rate: int,
+) -> Optional[AudioAugmenter]:
+    """AudioAugmenter für den Konfigurationswert audio_augmentation (None = keine Augmentierung)."""
+    if not audio_augmentation:
+        return None
+    return AudioAugmenter.from_config(audio_augmentation, sample_rate)
@@ -2,13 +2,26 @@ from __future__ import annotations
 
 import ctypes
 import os
+from collections import OrderedDict
 from ctypes.util import find_library
-from typing import Optional
-import pretty_midi
-import soundfile as sf
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+
+from .audio_resampler import peak_limit_gain, resample
+from .instrument import Instrument
+from .loudness_normalizer import LoudnessMeasurement, LoudnessNormalizer
+from .preset_grid import stable_hash
+from .silence_trimmer import SilenceTrimmer
+from .soundfont_inspector import SOUNDFONT_PREFLIGHT_MODES, SoundfontPresetTable, required_presets
+
+if TYPE_CHECKING:  # pretty_midi wird erst beim Rendern importiert
+    import pretty_midi
 
 _FS_NOOP_CB = None
 
+# Stems, die render_pretty_midi_stems neben dem Mix liefert (Drum-Kanal vs. melodische Kanäle)
+STEM_NAMES = ("drums", "accompaniment")
+
 def _load_fluidsynth_library() -> Optional[ctypes.CDLL]:
     candidates: list[str] = []
 
@@ -81,6 +94,42 @@ def _disable_fluidsynth_warnings() -> None:
     except Exception:
         return
 
+class _SynthesizerCache:
+    """LRU der geladenen Soundfonts eines Prozesses (je Soundfont ein FluidSynth-Synth).
+
+    Der Speicherbedarf eines Synths entspricht etwa der Größe der .sf2-Datei
+    (FluidSynth lädt die Samples vollständig); vor dem Laden einer weiteren
+    Soundfont werden die am längsten nicht genutzten Synths freigegeben, bis
+    memory_limit_bytes eingehalten wird. Eine Soundfont bleibt immer geladen.
+    """
+
+    def __init__(self, memory_limit_bytes: int) -> None:
+        self.memory_limit_bytes = int(memory_limit_bytes)
+        self._entries: "OrderedDict[str, Tuple[Any, int, int]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, soundfont_path: str, create: Callable[[str], Tuple[Any, int]]) -> Tuple[Any, int]:
+        """(Synth, Soundfont-ID) für soundfont_path; lädt über create, falls nötig."""
+        entry = self._entries.get(soundfont_path)
+        if entry is not None:
+            self._entries.move_to_end(soundfont_path)
+            return entry[0], entry[1]
+
+        size = os.path.getsize(soundfont_path)
+        while self._entries and self._bytes + size > self.memory_limit_bytes:
+            _, (synthesizer, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            synthesizer.delete()
+
+        synthesizer, soundfont_id = create(soundfont_path)
+        self._entries[soundfont_path] = (synthesizer, soundfont_id, size)
+        self._bytes += size
+        return synthesizer, soundfont_id
+
+
 class AudioRenderer:
     """Rendert MIDI-Dateien zu Audiodateien (z. B. WAV).
 
@@ -91,6 +140,14 @@ class AudioRenderer:
         das das Modell wirklich hören wird.
         Außerdem kann er verschiedene Mix-Varianten erzeugen (z. B. Drums lauter
         oder leiser), um das Training robuster zu machen.
+        Mit soundfont_pool bekommt jeder Song deterministisch eine Soundfont
+        aus dem Pool (soundfont_for_song); geladene Soundfonts bleiben pro
+        Prozess in einem nach Speicher begrenzten LRU-Cache.
+        Mit loudness_normalizer werden die Songs vor dem Schreiben auf eine
+        gemeinsame Lautheit gebracht (normalize_loudness).
+        Mit extra_sample_rates synthetisiert FluidSynth einmal mit der
+        höchsten benötigten Rate (render_sample_rate); output_sample_rate
+        und alle weiteren Raten entstehen daraus per Polyphasen-Resampling.
     """
 
     def __init__(
@@ -98,6 +155,13 @@ class AudioRenderer:
             soundfont_path: str,
             output_sample_rate: int,
             render_backend: str,
+            soundfont_cache_directory: Optional[str] = None,
+            soundfont_preflight: str = "error",
+            soundfont_pool: Optional[Sequence[str]] = None,
+            soundfont_memory_limit_mb: float = 2048.0,
+            silence_trimmer: Optional[SilenceTrimmer] = None,
+            loudness_normalizer: Optional[LoudnessNormalizer] = None,
+            extra_sample_rates: Sequence[int] = (),
     ) -> None:
         """Konstruktor für den AudioRenderer.
 
@@ -105,37 +169,385 @@ class AudioRenderer:
             soundfont_path: Pfad zu einer Soundfont-Datei (z. B. GeneralUser.sf2).
             output_sample_rate: Samplerate der gerenderten Audiodateien
                 (z. B. 16000 oder 44100).
-            render_backend: Name des Rendering-Backends
-                (z. B. "fluidsynth", wird aktuell nur als Info gespeichert).
+            render_backend: Name des Rendering-Backends:
+                "fluidsynth" (Standard) oder "noop" (Stille in passender Länge,
+                z. B. für Tests ohne Soundfont).
+            soundfont_cache_directory: Ordner für die gecachte Preset-Tabelle
+                der Soundfont (None = nur im Speicher).
+            soundfont_preflight: "error", "warn" oder "off"; siehe preflight.
+            soundfont_pool: Optional mehrere Soundfonts, auf die die Songs
+                verteilt werden (None = nur soundfont_path).
+            soundfont_memory_limit_mb: Obergrenze für gleichzeitig geladene
+                Soundfonts pro Prozess (Summe der Dateigrößen).
+            silence_trimmer: Optional Kürzung der Stille am Songende
+                (render_midi_to_wav, trimmed_length); None = ungekürzt.
+            loudness_normalizer: Optional Normierung auf eine Ziel-Lautheit
+                (render_midi_to_wav, normalize_loudness); None = Spitzenpegel 1
+                wie bei pretty_midi.
+            extra_sample_rates: Weitere Sampleraten, in denen render_midi_to_wav
+                den Mix im selben Durchlauf schreibt (z. B. [44100]).
+
+        Raises:
+            ValueError: Bei unbekanntem soundfont_preflight oder Sampleraten <= 0.
         """
+        if soundfont_preflight not in SOUNDFONT_PREFLIGHT_MODES:
+            raise ValueError(
+                f"soundfont_preflight muss eines von {SOUNDFONT_PREFLIGHT_MODES} sein "
+                f"(ist {soundfont_preflight!r})."
+            )
+        if any(int(sample_rate) <= 0 for sample_rate in extra_sample_rates):
+            raise ValueError("extra_sample_rates dürfen nur positive Sampleraten enthalten.")
         self.soundfont_path = soundfont_path
         self.output_sample_rate = output_sample_rate
+        self.extra_sample_rates: Tuple[int, ...] = tuple(
+            sorted({int(sample_rate) for sample_rate in extra_sample_rates} - {int(output_sample_rate)})
+        )
         self.render_backend = render_backend
+        self.soundfont_cache_directory = soundfont_cache_directory
+        self.soundfont_preflight = soundfont_preflight
+        self.soundfont_pool: Tuple[str, ...] = tuple(str(path) for path in soundfont_pool or ())
+        self.soundfont_memory_limit_mb = float(soundfont_memory_limit_mb)
+        self.silence_trimmer = silence_trimmer
+        self.loudness_normalizer = loudness_normalizer
+
+        # Persistente Synths (werden beim ersten Rendern pro Prozess angelegt),
+        # damit eine Soundfont nicht für jeden Song neu geladen wird.
+        self._synthesizers = self._create_synthesizer_cache()
+
         _disable_fluidsynth_warnings()
 
-    def render_midi_to_wav(self, midi_path: str, output_wav_path: str) -> None:
-        directory = os.path.dirname(output_wav_path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
+    def __getstate__(self) -> Dict[str, Any]:
+        # Die FluidSynth-Handles sind nicht picklebar; Worker-Prozesse legen
+        # beim ersten Rendern ihre eigenen Synths an.
+        state = self.__dict__.copy()
+        state["_synthesizers"] = self._create_synthesizer_cache()
+        return state
+
+    def _create_synthesizer_cache(self) -> _SynthesizerCache:
+        return _SynthesizerCache(int(self.soundfont_memory_limit_mb * 1024 * 1024))
+
+    @property
+    def render_sample_rate(self) -> int:
+        """Samplerate, mit der FluidSynth synthetisiert (die höchste benötigte Rate)."""
+        return max((int(self.output_sample_rate),) + self.extra_sample_rates)
+
+    def _to_sample_rate(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Signal mit render_sample_rate in sample_rate (ohne Kopie, wenn die Raten gleich sind)."""
+        if int(sample_rate) == self.render_sample_rate:
+            return audio
+        return resample(audio, self.render_sample_rate, sample_rate)
+
+    @property
+    def soundfonts(self) -> Tuple[str, ...]:
+        """Alle Soundfonts, mit denen dieser Renderer Songs rendert."""
+        return self.soundfont_pool or (self.soundfont_path,)
 
-        if not os.path.exists(self.soundfont_path):
+    def soundfont_for_song(self, song_identifier: str) -> Optional[str]:
+        """Soundfont eines Songs aus soundfont_pool (None ohne Pool = soundfont_path).
+
+        Die Wahl hängt nur vom Song ab (stabiler Hash), nicht von Worker,
+        Shard oder Reihenfolge.
+        """
+        if not self.soundfont_pool:
+            return None
+        return self.soundfont_pool[stable_hash(f"soundfont|{song_identifier}") % len(self.soundfont_pool)]
+
+    def _load_synthesizer(self, soundfont_path: str) -> Tuple[Any, int]:
+        if not os.path.exists(soundfont_path):
             raise FileNotFoundError(
-                f"Soundfont {self.soundfont_path!r} wurde nicht gefunden. "
+                f"Soundfont {soundfont_path!r} wurde nicht gefunden. "
                 "Passe den Pfad in deiner Konfiguration an."
             )
 
+        import fluidsynth  # pyfluidsynth, kommt mit pretty_midi[fluidsynth]
+
         _disable_fluidsynth_warnings()
+        synthesizer = fluidsynth.Synth(samplerate=float(self.render_sample_rate))
+        soundfont_id = synthesizer.sfload(soundfont_path)
+        return synthesizer, soundfont_id
 
-        pm = pretty_midi.PrettyMIDI(midi_path)
+    def _get_synthesizer(self, soundfont_path: Optional[str] = None) -> Tuple[Any, int]:
+        """Liefert (Synth, Soundfont-ID) dieses Prozesses für eine Soundfont (lazy, LRU)."""
+        return self._synthesizers.get(soundfont_path or self.soundfont_path, self._load_synthesizer)
+
+    def _synthesizer_for_song(self, soundfont_path: Optional[str] = None) -> Tuple[Any, int]:
+        """Wie _get_synthesizer, aber zurückgesetzt wie ein frisch angelegter Synth.
+
+        Der Synth wird über Songs hinweg wiederverwendet. Stimmen, Controller
+        und Hall/Chorus, die nach pretty_midis 1 s Ausklang noch laufen, würden
+        sonst in den nächsten Song klingen; das Audio hinge dann von Build-
+        Reihenfolge und Worker-Zuordnung ab. system_reset beendet alle
+        Stimmen und setzt Controller, Programme und Effektpuffer zurück.
+        """
+        synthesizer, soundfont_id = self._get_synthesizer(soundfont_path)
+        synthesizer.system_reset()
+        return synthesizer, soundfont_id
+
+    def load_preset_table(self, soundfont_path: Optional[str] = None) -> SoundfontPresetTable:
+        """Preset-Tabelle einer Soundfont (aus dem Cache, sonst aus der .sf2-Datei)."""
+        return SoundfontPresetTable.load(soundfont_path or self.soundfont_path, self.soundfont_cache_directory)
+
+    def preflight(self, instruments: Iterable[Instrument]) -> None:
+        """Prüft vor dem Build, ob jede Soundfont alle benötigten Presets enthält.
+
+        Beschreibung:
+            FluidSynth spielt fehlende Presets stillschweigend mit einem
+            anderen Klang oder gar nicht; das fiele erst beim Anhören auf.
+            Geprüft werden das gm_program jedes Instruments (Bank 0) und das
+            Drum-Kit (Bank 128), bei soundfont_pool für jede Soundfont. Die
+            Meldung nennt je fehlendem Preset einen Ersatzvorschlag aus
+            derselben GM-Familie. Gerendert wird unverändert mit den
+            Programmen aus der MIDI, damit Audio und Labels übereinstimmen.
+            Beim Backend "noop" oder soundfont_preflight = "off" passiert
+            nichts.
+
+        Raises:
+            ValueError: Bei fehlenden Presets und soundfont_preflight = "error".
+        """
+        if self.render_backend == "noop" or self.soundfont_preflight == "off":
+            return
+
+        required = required_presets(instruments)
+        problems: List[str] = []
+        for soundfont_path in self.soundfonts:
+            table = self.load_preset_table(soundfont_path)
+            missing = table.missing_presets(required)
+            if missing:
+                problems.append(f"{soundfont_path!r}:\n  - " + "\n  - ".join(missing))
+        if not problems:
+            return
+
+        details = "\n".join(problems)
+        if self.soundfont_preflight == "error":
+            raise ValueError(
+                f"Soundfont enthält nicht alle benötigten Presets: {details}\n"
+                "Wähle eine andere Soundfont oder setze soundfont_preflight = \"warn\"."
+            )
+        print(f"[AudioRenderer] WARNUNG: Fehlende Presets in {details}")
+
+    def render_pretty_midi(
+            self,
+            pm: pretty_midi.PrettyMIDI,
+            soundfont_path: Optional[str] = None,
+    ) -> np.ndarray:
+        """Rendert ein PrettyMIDI-Objekt im Speicher zu einem Mono-Signal.
+
+        Beschreibung:
+            Nutzt einen pro Prozess persistenten Synth, statt wie
+            pm.fluidsynth(sf2_path=...) für jeden Song einen neuen Synth zu
+            erzeugen und die Soundfont neu zu laden. Vor jedem Song wird er
+            zurückgesetzt, das Ergebnis entspricht also einem frischen Synth.
+            Überschwingt das Resampling auf output_sample_rate, wird der Peak
+            auf 1.0 begrenzt (peak_limit_gain).
 
+        Args:
+            pm: Das zu rendernde PrettyMIDI-Objekt.
+            soundfont_path: Soundfont (z. B. aus soundfont_for_song); None = soundfont_path des Renderers.
+
+        Returns:
+            Mono-Audio als float-Array mit output_sample_rate.
+        """
+        audio = self._to_sample_rate(self._synthesize(pm, soundfont_path), self.output_sample_rate)
+        return audio * peak_limit_gain([audio])
+
+    def _synthesize(self, pm: pretty_midi.PrettyMIDI, soundfont_path: Optional[str] = None) -> np.ndarray:
+        """Mono-Mix mit render_sample_rate (siehe render_pretty_midi)."""
+        if self.render_backend == "noop":
+            # 1 s Ausklang wie bei pretty_midi.fluidsynth
+            n_samples = int(np.ceil((pm.get_end_time() + 1.0) * self.render_sample_rate))
+            return np.zeros(n_samples, dtype=np.float64)
+
+        synthesizer, soundfont_id = self._synthesizer_for_song(soundfont_path)
         audio = pm.fluidsynth(
-            fs=self.output_sample_rate,
-            sf2_path=self.soundfont_path,
+            fs=self.render_sample_rate,
+            synthesizer=synthesizer,
+            sfid=soundfont_id,
         )
 
         # Enforce mono
         if hasattr(audio, "ndim") and audio.ndim == 2:
             audio = audio.mean(axis=1)
 
-        sf.write(output_wav_path, audio, self.output_sample_rate)
+        return audio
+
+    def render_pretty_midi_stems(
+            self,
+            pm: pretty_midi.PrettyMIDI,
+            soundfont_path: Optional[str] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Rendert Mix, Drum-Stem und Begleit-Stem in einem Synthese-Durchlauf.
+
+        Beschreibung:
+            pretty_midi synthetisiert ohnehin jedes Instrument einzeln und
+            summiert erst danach. Hier landen die Drum-Instrumente (MIDI-Kanal
+            9, BandConfiguration.drum_channel) und die melodischen Instrumente
+            in getrennten Puffern; der Mix ist deren Summe. Alle drei Signale
+            haben dieselbe Länge und werden mit demselben Faktor auf den
+            Spitzenpegel des Mixes normiert, sodass drums + accompaniment
+            wieder den Mix ergeben.
+
+        Args:
+            pm: Das zu rendernde PrettyMIDI-Objekt.
+            soundfont_path: Soundfont (z. B. aus soundfont_for_song); None = soundfont_path des Renderers.
+
+        Returns:
+            Dict mit "mix" und den Schlüsseln aus STEM_NAMES (Mono, float).
+        """
+        signals = {
+            name: self._to_sample_rate(signal, self.output_sample_rate)
+            for name, signal in self._synthesize_stems(pm, soundfont_path).items()
+        }
+        gain = peak_limit_gain(signals.values())
+        return {name: signal * gain for name, signal in signals.items()}
+
+    def _synthesize_stems(
+            self,
+            pm: pretty_midi.PrettyMIDI,
+            soundfont_path: Optional[str] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Mix und Stems mit render_sample_rate (siehe render_pretty_midi_stems)."""
+        if self.render_backend == "noop":
+            silence = self._synthesize(pm)
+            return {"mix": silence, **{name: np.zeros_like(silence) for name in STEM_NAMES}}
+
+        if all(len(instrument.notes) == 0 for instrument in pm.instruments):
+            return {"mix": np.array([]), **{name: np.array([]) for name in STEM_NAMES}}
+
+        synthesizer, soundfont_id = self._synthesizer_for_song(soundfont_path)
+        waveforms = [
+            (instrument.is_drum, instrument.fluidsynth(synthesizer=synthesizer, sfid=soundfont_id))
+            for instrument in pm.instruments
+        ]
+
+        n_samples = max(waveform.shape[0] for _, waveform in waveforms)
+        drums = np.zeros(n_samples)
+        accompaniment = np.zeros(n_samples)
+        for is_drum, waveform in waveforms:
+            target = drums if is_drum else accompaniment
+            target[:waveform.shape[0]] += waveform
+
+        mix = drums + accompaniment
+        # Normierung wie pretty_midi (Spitzenpegel des Mixes = 1)
+        peak = np.abs(mix).max()
+        if peak > 0:
+            mix /= peak
+            drums /= peak
+            accompaniment /= peak
+        return {"mix": mix, "drums": drums, "accompaniment": accompaniment}
+
+    def trimmed_length(self, audio: np.ndarray, pm: pretty_midi.PrettyMIDI) -> int:
+        """Länge von audio ohne Stille am Ende (ohne silence_trimmer: unverändert).
+
+        Gekürzt wird nie vor dem Ende der letzten Note in pm, damit Labels,
+        notes und note_events vollständig im Audio liegen.
+        """
+        if self.silence_trimmer is None:
+            return int(audio.shape[0])
+        notes_end = max((note.end for inst in pm.instruments for note in inst.notes), default=0.0)
+        min_length = int(np.ceil(notes_end * self.output_sample_rate))
+        return self.silence_trimmer.trimmed_length(audio, min_length=min_length)
+
+    def normalize_loudness(
+            self,
+            audio: np.ndarray,
+            peak_signals: Iterable[np.ndarray] = (),
+            sample_rate_signals: Optional[Mapping[int, np.ndarray]] = None,
+    ) -> Optional[LoudnessMeasurement]:
+        """Misst audio und liefert die Verstärkung auf die Ziel-Lautheit (ohne loudness_normalizer: None).
+
+        Die Verstärkung (LoudnessMeasurement.gain) gilt für den Mix, seine
+        Stems (peak_signals) und den Mix in weiteren Sampleraten
+        (sample_rate_signals) gleichermaßen; der höchste Peak all dieser
+        Signale begrenzt sie.
+        """
+        if self.loudness_normalizer is None:
+            return None
+        return self.loudness_normalizer.measure(audio, peak_signals, sample_rate_signals)
+
+    def render_midi_to_wav(
+            self,
+            midi_path: str,
+            output_wav_path: str,
+            stem_paths: Optional[Mapping[str, str]] = None,
+            soundfont_path: Optional[str] = None,
+            sample_rate_paths: Optional[Mapping[int, str]] = None,
+    ) -> Tuple[np.ndarray, Optional[LoudnessMeasurement]]:
+        """Rendert eine MIDI-Datei zu einer WAV-Datei und liefert das Signal (z. B. für Augmentierung).
+
+        Args:
+            midi_path: Eingabe-MIDI-Datei.
+            output_wav_path: Zielpfad des Mixes.
+            stem_paths: Optional Zielpfade je Stem (Schlüssel aus STEM_NAMES);
+                die Stems entstehen im selben Synthese-Durchlauf wie der Mix.
+            soundfont_path: Soundfont des Songs (soundfont_for_song); None = soundfont_path.
+            sample_rate_paths: Optional Zielpfade des Mixes je weiterer
+                Samplerate (aus extra_sample_rates).
+
+        Mit silence_trimmer werden Mix und Stems auf dieselbe Länge ohne
+        Stille am Ende gekürzt (trimmed_length des Mixes), mit
+        loudness_normalizer danach mit derselben Verstärkung normiert, ohne
+        ihn begrenzt ein gemeinsamer Faktor das Überschwingen des Resamplings
+        (peak_limit_gain), damit soundfile nicht abschneidet.
+        Die weiteren Raten entstehen aus demselben Synthese-Durchlauf mit
+        derselben Kürzung (in Sekunden) und Verstärkung.
+
+        Returns:
+            (Mix mit output_sample_rate, Lautheitsmessung des Mixes oder None ohne loudness_normalizer).
+        """
+        import pretty_midi
+        import soundfile as sf
+
+        pm = pretty_midi.PrettyMIDI(midi_path)
+        if stem_paths:
+            signals = self._synthesize_stems(pm, soundfont_path)
+        else:
+            signals = {"mix": self._synthesize(pm, soundfont_path)}
+        rendered_mix = signals["mix"]
+
+        outputs = {output_wav_path: self._to_sample_rate(rendered_mix, self.output_sample_rate)}
+        outputs.update({
+            path: self._to_sample_rate(signals[name], self.output_sample_rate)
+            for name, path in (stem_paths or {}).items()
+        })
+
+        trimmed_seconds: Optional[float] = None
+        if self.silence_trimmer is not None:
+            length = self.trimmed_length(outputs[output_wav_path], pm)
+            outputs = {path: signal[:length] for path, signal in outputs.items()}
+            trimmed_seconds = length / float(self.output_sample_rate)
+
+        sample_rate_mixes: Dict[int, np.ndarray] = {}
+        for sample_rate in sample_rate_paths or {}:
+            mix = rendered_mix
+            if trimmed_seconds is not None:
+                mix = mix[:int(np.ceil(trimmed_seconds * self.render_sample_rate))]
+            mix = self._to_sample_rate(mix, sample_rate)
+            if trimmed_seconds is not None:
+                mix = mix[:int(np.ceil(trimmed_seconds * sample_rate))]
+            sample_rate_mixes[int(sample_rate)] = mix
+
+        # Eine Verstärkung für alle Dateien, begrenzt durch den höchsten Peak (Stems, höhere Raten)
+        loudness = self.normalize_loudness(
+            outputs[output_wav_path],
+            peak_signals=[signal for path, signal in outputs.items() if path != output_wav_path],
+            sample_rate_signals=sample_rate_mixes,
+        )
+        written = {path: (signal, self.output_sample_rate) for path, signal in outputs.items()}
+        written.update({
+            path: (sample_rate_mixes[int(sample_rate)], int(sample_rate))
+            for sample_rate, path in (sample_rate_paths or {}).items()
+        })
+        # Ohne loudness_normalizer begrenzt ein gemeinsamer Faktor das Überschwingen des Resamplings
+        gain = loudness.gain if loudness is not None else peak_limit_gain(
+            signal for signal, _ in written.values()
+        )
+        if gain != 1.0:
+            written = {path: (signal * gain, rate) for path, (signal, rate) in written.items()}
+            outputs[output_wav_path] = written[output_wav_path][0]
 
+        for path, (signal, sample_rate) in written.items():
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            sf.write(path, signal, sample_rate)
+        return outputs[output_wav_path], loudness
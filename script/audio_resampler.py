@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Nulldurchgänge des Sinc-Kerns je Seite (bei der niedrigeren der beiden Raten)
+RESAMPLER_ZERO_CROSSINGS = 16
+RESAMPLER_KAISER_BETA = 8.6
+# Höchster Sample-Peak nach dem Resampling (wie der auf 1.0 normierte FluidSynth-Mix)
+RESAMPLER_PEAK_LIMIT = 1.0
+
+
+@lru_cache(maxsize=None)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    """Kaiser-gefensterter Tiefpass als Polyphasen-Matrix (up, Taps je Phase).
+
+    Der Kern ist für die um up hochgesetzte Rate ausgelegt, schneidet bei der
+    halben niedrigeren Rate ab und ist um seine Mitte zentriert (keine
+    Verzögerung); Zeile p enthält die Koeffizienten h[p], h[p + up], ...
+    """
+    factor = max(up, down)
+    half_length = RESAMPLER_ZERO_CROSSINGS * factor
+    n = np.arange(-half_length, half_length + 1, dtype=np.float64)
+    kernel = np.sinc(n / factor) * np.kaiser(n.shape[0], RESAMPLER_KAISER_BETA)
+    # Verstärkung up gleicht die beim Hochsetzen eingefügten Nullen aus
+    kernel *= up / factor
+
+    taps = -(-kernel.shape[0] // up)
+    padded = np.zeros(taps * up, dtype=np.float64)
+    padded[:kernel.shape[0]] = kernel
+    return padded.reshape(taps, up).T.copy()
+
+
+def resample_ratio(input_rate: int, output_rate: int) -> Tuple[int, int]:
+    """(up, down) mit output_rate / input_rate = up / down, gekürzt."""
+    divisor = math.gcd(int(input_rate), int(output_rate))
+    return int(output_rate) // divisor, int(input_rate) // divisor
+
+
+def resampled_length(n_samples: int, input_rate: int, output_rate: int) -> int:
+    """Länge nach dem Resampling (aufgerundet, wie resample)."""
+    up, down = resample_ratio(input_rate, output_rate)
+    return -(-int(n_samples) * up // down)
+
+
+def peak_limit_gain(signals: Iterable[np.ndarray], peak_limit: float = RESAMPLER_PEAK_LIMIT) -> float:
+    """Gemeinsamer Faktor (höchstens 1), der den höchsten Peak aller Signale auf peak_limit begrenzt.
+
+    Der Tiefpass schwingt an Transienten über (Gibbs): ein Rechteck mit
+    Vollaussteuerung hat nach dem Resampling Peaks um 1.19, die soundfile
+    beim Schreiben als PCM_16 stillschweigend abschneiden würde. Ein Faktor
+    für alle Signale eines Songs (Mix, Stems, weitere Raten) erhält deren
+    Pegelverhältnis.
+    """
+    peak = max((float(np.max(np.abs(signal))) for signal in signals if signal.shape[0]), default=0.0)
+    return peak_limit / peak if peak > peak_limit else 1.0
+
+
+def resample(audio: np.ndarray, input_rate: int, output_rate: int) -> np.ndarray:
+    """Polyphasen-Resampling eines Mono-Signals von input_rate auf output_rate.
+
+    Beschreibung:
+        Entspricht Hochsetzen um up, Tiefpass und Ausdünnen um down, rechnet
+        aber nur die benötigten Ausgabesamples. Ausgabe m liest die Eingabe
+        ab floor((m · down + Mitte) / up) rückwärts mit der Filterphase
+        (m · down + Mitte) mod up. Alle Ausgaben m ≡ r (mod up) haben
+        dieselbe Phase und Fenster im festen Abstand down; je Phase ist das
+        eine Matrixmultiplikation über eine strided View der Eingabe.
+
+    Der Peak kann dabei über den der Eingabe steigen (siehe peak_limit_gain).
+
+    Returns:
+        float64-Array der Länge resampled_length(len(audio), input_rate, output_rate).
+    """
+    audio = np.asarray(audio, dtype=np.float64)
+    if int(input_rate) == int(output_rate):
+        return audio.copy()
+
+    up, down = resample_ratio(input_rate, output_rate)
+    polyphase = _polyphase_filter(up, down)
+    taps = polyphase.shape[1]
+    center = RESAMPLER_ZERO_CROSSINGS * max(up, down)
+
+    n_out = resampled_length(audio.shape[0], input_rate, output_rate)
+    # Nullen links und rechts, damit jedes Fenster im Puffer liegt
+    padded = np.concatenate((np.zeros(taps), audio, np.zeros(taps + down)))
+    windows = sliding_window_view(padded, taps)  # windows[i] = padded[i:i + taps]
+
+    output = np.empty(n_out, dtype=np.float64)
+    for first_output in range(min(up, n_out)):
+        newest, phase = divmod(first_output * down + center, up)
+        n_phase_outputs = -(-(n_out - first_output) // up)
+        # Fenster endet bei Eingabe newest (= padded[newest + taps]), Filter daher rückwärts
+        phase_windows = windows[newest + 1:newest + 1 + n_phase_outputs * down:down]
+        output[first_output::up] = phase_windows @ polyphase[phase, ::-1]
+    return output
@@ -1,9 +1,10 @@
 from __future__ import annotations
-from typing import Dict, List
+from typing import Dict, List, Sequence
 import random
 
 from .drum_mapping import DrumMapping
 from .instrument import Instrument
+from .instrument_catalog import InstrumentCatalog
 
 
 class BandConfiguration:
@@ -61,6 +62,7 @@ class BandConfiguration:
             max_instruments: int = 8,
             drum_mapping: DrumMapping | None = None,
             drum_channel: int = 9,
+            rng: random.Random | None = None,
     ) -> "BandConfiguration":
         """Erzeugt zufällig eine sinnvolle Bandbesetzung.
 
@@ -74,63 +76,18 @@ class BandConfiguration:
                 Wenn kein DrumMapping übergeben wird, wird ein Dummy-Mapping
                 verwendet. In deinem Pipeline-Code kannst du ein echtes
                 DrumMapping übergeben.
+
+            Mit `rng` (z. B. random.Random(seed)) wird die Auswahl
+            reproduzierbar und hängt nicht mehr vom globalen random-Zustand ab.
+
+            Die Auswahl selbst übernimmt InstrumentCatalog.sample_band_indices;
+            wer viele Bands aus denselben Instrumenten zieht, sollte den
+            Katalog einmal anlegen und wiederverwenden.
         """
-        if not available_patches:
-            raise ValueError("Es wurden keine verfügbaren Instrumente übergeben.")
-
-        # min_instruments darf nicht kleiner als 4 sein
-        if min_instruments < 4:
-            min_instruments = 4
-        if max_instruments < min_instruments:
-            max_instruments = min_instruments
-
-        # Verfügbare Instrumente nach Rollen gruppieren
-        chords = [i for i in available_patches if i.role == "chords"]
-        basses = [i for i in available_patches if i.role == "bass"]
-        pads = [i for i in available_patches if i.role == "pad"]
-        leads = [i for i in available_patches if i.role == "lead"]
-
-        # Sicherstellen, dass jede benötigte Rolle überhaupt existiert
-        for role_name, lst in [
-            ("chords", chords),
-            ("bass", basses),
-            ("pad", pads),
-            ("lead", leads),
-        ]:
-            if not lst:
-                raise ValueError(
-                    f"Es sind keine Instrumente mit Rolle {role_name!r} in available_patches vorhanden."
-                )
-
-        # Obergrenze durch verfügbare Patches begrenzen
-        max_possible = min(len(available_patches), max_instruments)
-        if max_possible < 4:
-            raise ValueError(
-                "Nicht genug Instrumente verfügbar, um mindestens 4 zu wählen."
-            )
+        rnd = rng if rng is not None else random
 
-        # Bandgröße zufällig zwischen min_instruments und max_possible
-        band_size = random.randint(min_instruments, max_possible)
-
-        chosen: List[Instrument] = []
-
-        # Mindestens je ein Instrument pro Rolle wählen
-        chosen.append(random.choice(chords))
-        chosen.append(random.choice(basses))
-        chosen.append(random.choice(pads))
-        chosen.append(random.choice(leads))
-
-        # Restliche Slots mit zufälligen Chords/Bass/Pad auffüllen (keine extra Leads)
-        remaining_slots = band_size - len(chosen)
-        if remaining_slots > 0:
-            extras_pool = [
-                i
-                for i in available_patches
-                if i.role in ("chords", "bass", "pad") and i not in chosen
-            ]
-            if extras_pool:
-                k = min(remaining_slots, len(extras_pool))
-                chosen.extend(random.sample(extras_pool, k=k))
+        catalog = InstrumentCatalog(available_patches)
+        chosen = catalog.sample_band_indices(rnd, min_instruments, max_instruments)
 
         # Falls kein DrumMapping übergeben wurde: Dummy verwenden
         if drum_mapping is None:
@@ -140,10 +97,25 @@ class BandConfiguration:
                 core_classes=[],
             )
 
+        return cls.from_catalog(catalog, chosen, drum_mapping=drum_mapping, drum_channel=drum_channel)
+
+    @classmethod
+    def from_catalog(
+            cls,
+            catalog: InstrumentCatalog,
+            indices: Sequence[int],
+            drum_mapping: DrumMapping,
+            drum_channel: int = 9,
+    ) -> "BandConfiguration":
+        """Erzeugt eine BandConfiguration aus Katalog-Indizes (z. B. aus sample_bands).
+
+        Die Instrument-Objekte werden aus dem Katalog übernommen (nicht kopiert);
+        NO_INSTRUMENT-Füllwerte werden ignoriert.
+        """
         return cls(
             drum_channel=drum_channel,
             drum_mapping=drum_mapping,
-            instruments=chosen,
+            instruments=catalog.instruments_for_indices(indices),
         )
 
     def to_dict(self) -> Dict:
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def biquad_response(
+        b: np.ndarray,
+        a: np.ndarray,
+        z_inv: np.ndarray,
+) -> np.ndarray:
+    """Frequenzgang von Biquads (Direktform, Koeffizienten je Zeile) an den Stellen z^-1.
+
+    Args:
+        b: Zählerkoeffizienten, Form (Varianten, 3).
+        a: Nennerkoeffizienten, Form (Varianten, 3).
+        z_inv: exp(-j·ω) der FFT-Bins, Form (Bins,).
+
+    Returns:
+        Komplexer Frequenzgang, Form (Varianten, Bins).
+    """
+    z_inv2 = z_inv * z_inv
+    numerator = b[:, 0:1] + b[:, 1:2] * z_inv + b[:, 2:3] * z_inv2
+    denominator = a[:, 0:1] + a[:, 1:2] * z_inv + a[:, 2:3] * z_inv2
+    return numerator / denominator
+
+
+def shelf_coefficients(
+        kind: str,
+        frequency_hz: np.ndarray,
+        gain_db: np.ndarray,
+        sample_rate: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Low-/High-Shelf nach dem RBJ-Audio-EQ-Cookbook (Flankensteilheit S = 1), vektorisiert."""
+    amplitude = 10.0 ** (gain_db / 40.0)
+    w0 = 2.0 * np.pi * frequency_hz / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / 2.0 * np.sqrt(2.0)
+    two_sqrt_a_alpha = 2.0 * np.sqrt(amplitude) * alpha
+    sign = 1.0 if kind == "low" else -1.0
+
+    b = np.stack([
+        amplitude * ((amplitude + 1) - sign * (amplitude - 1) * cos_w0 + two_sqrt_a_alpha),
+        sign * 2 * amplitude * ((amplitude - 1) - sign * (amplitude + 1) * cos_w0),
+        amplitude * ((amplitude + 1) - sign * (amplitude - 1) * cos_w0 - two_sqrt_a_alpha),
+    ], axis=1)
+    a = np.stack([
+        (amplitude + 1) + sign * (amplitude - 1) * cos_w0 + two_sqrt_a_alpha,
+        -sign * 2 * ((amplitude - 1) + sign * (amplitude + 1) * cos_w0),
+        (amplitude + 1) + sign * (amplitude - 1) * cos_w0 - two_sqrt_a_alpha,
+    ], axis=1)
+    return b, a
+
+
+def peak_coefficients(
+        frequency_hz: np.ndarray,
+        gain_db: np.ndarray,
+        q: np.ndarray,
+        sample_rate: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Peaking-EQ nach dem RBJ-Audio-EQ-Cookbook, vektorisiert."""
+    amplitude = 10.0 ** (gain_db / 40.0)
+    w0 = 2.0 * np.pi * frequency_hz / sample_rate
+    alpha = np.sin(w0) / (2.0 * q)
+    cos_w0 = np.cos(w0)
+
+    b = np.stack([1 + alpha * amplitude, -2 * cos_w0, 1 - alpha * amplitude], axis=1)
+    a = np.stack([1 + alpha / amplitude, -2 * cos_w0, 1 - alpha / amplitude], axis=1)
+    return b, a
+
+
+def highpass_coefficients(
+        frequency_hz: np.ndarray,
+        q: np.ndarray,
+        sample_rate: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Hochpass nach dem RBJ-Audio-EQ-Cookbook, vektorisiert."""
+    w0 = 2.0 * np.pi * frequency_hz / sample_rate
+    alpha = np.sin(w0) / (2.0 * q)
+    cos_w0 = np.cos(w0)
+
+    b = np.stack([(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2], axis=1)
+    a = np.stack([1 + alpha, -2 * cos_w0, 1 - alpha], axis=1)
+    return b, a
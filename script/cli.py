@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Any, Dict, List, Optional
+
+from .audio_augmenter import audio_augmenter_for
+from .audio_renderer import AudioRenderer
+from .dataset_builder import DatasetBuilder
+from .dataset_presets import DatasetPreset
+from .drum_mapping import DrumMapping
+from .drum_pattern_generator import DrumPatternGenerator
+from .label_extractor import LabelExtractor
+from .loudness_normalizer import loudness_normalizer_for
+from .midi_song_builder import MidiSongBuilder
+from .preset_grid import preset_registry_for
+from .run_config import load_run_config, parse_override, parse_shard
+from .segment_slicer import segment_slicer_for
+from .silence_trimmer import silence_trimmer_for
+
+
+def create_dataset_builder(dataset_config: Dict[str, Any]) -> DatasetBuilder:
+    """Baut die komplette Pipeline (Generatoren, Renderer, Builder) aus dataset_config."""
+    drum_mapping = DrumMapping.create_default()
+    # Tick-Zeitachse: Generatoren rechnen in Ticks der MIDI-Datei
+    ticks_per_beat = int(dataset_config["midi_ticks_per_beat"]) if dataset_config["tick_timeline"] else None
+
+    drum_pattern_generator = DrumPatternGenerator(
+        drum_mapping=drum_mapping,
+        complexity=0.5,              # Startwerte, werden pro Preset überschrieben
+        ghostnote_probability=0.3,
+        fill_probability=0.3,
+        swing_amount=0.1,
+        pause_probability=0.3,
+        ticks_per_beat=ticks_per_beat,
+    )
+
+    midi_song_builder = MidiSongBuilder(
+        sample_rate=int(dataset_config["midi_sample_rate"]),
+        ticks_per_beat=int(dataset_config["midi_ticks_per_beat"]),
+        drum_mapping=drum_mapping,
+    )
+
+    audio_renderer = AudioRenderer(
+        soundfont_path=str(dataset_config["soundfont_path"]),
+        output_sample_rate=int(dataset_config["audio_sample_rate"]),
+        render_backend=str(dataset_config["audio_render_backend"]),
+        soundfont_cache_directory=dataset_config["soundfont_cache_directory"],
+        soundfont_preflight=str(dataset_config["soundfont_preflight"]),
+        soundfont_pool=dataset_config["soundfont_pool"],
+        soundfont_memory_limit_mb=float(dataset_config["soundfont_memory_limit_mb"]),
+        silence_trimmer=silence_trimmer_for(
+            dataset_config["silence_trim"],
+            int(dataset_config["audio_sample_rate"]),
+        ),
+        loudness_normalizer=loudness_normalizer_for(
+            dataset_config["loudness_normalization"],
+            int(dataset_config["audio_sample_rate"]),
+        ),
+        extra_sample_rates=[int(sample_rate) for sample_rate in dataset_config["extra_sample_rates"]],
+    )
+
+    label_extractor = LabelExtractor(
+        drum_mapping=drum_mapping,
+        minimum_velocity=int(dataset_config["minimum_velocity"]),
+        time_unit=str(dataset_config["time_unit"]),
+        include_non_drums=bool(dataset_config["include_non_drums"]),
+        label_format=str(dataset_config["label_format"]),
+    )
+
+    return DatasetBuilder(
+        output_root_directory=str(dataset_config["output_root_directory"]),
+        number_of_songs=int(dataset_config["number_of_songs"]),
+        band_configuration_pool=[],
+        drum_pattern_generator=drum_pattern_generator,
+        harmony_generator=DatasetBuilder.create_harmony_generator(
+            batched=bool(dataset_config["harmony_batched"]),
+            ticks_per_beat=ticks_per_beat,
+        ),
+        midi_song_builder=midi_song_builder,
+        audio_renderer=audio_renderer,
+        label_extractor=label_extractor,
+        drum_mapping=drum_mapping,
+        random_seed=int(dataset_config["global_random_seed"]),
+        min_song_length_seconds=float(dataset_config["min_song_length_seconds"]),
+        max_song_length_seconds=float(dataset_config["max_song_length_seconds"]),
+        label_verify_fraction=float(dataset_config["label_verify_fraction"]),
+        export_stems=bool(dataset_config["export_stems"]),
+        audio_augmenter=audio_augmenter_for(
+            dataset_config["audio_augmentation"],
+            int(dataset_config["audio_sample_rate"]),
+        ),
+        segment_slicer=segment_slicer_for(
+            dataset_config["segment_slicing"],
+            int(dataset_config["audio_sample_rate"]),
+        ),
+    )
+
+
+def select_presets(dataset_config: Dict[str, Any]) -> List[DatasetPreset]:
+    """Liefert die ersten number_of_presets Presets aus preset_names_to_use.
+
+    Mit preset_grid stammen die Presets aus dem PresetGrid statt aus DATASET_PRESETS.
+    """
+    preset_registry = preset_registry_for(dataset_config["preset_grid"])
+    names = dataset_config["preset_names_to_use"][: int(dataset_config["number_of_presets"])]
+    return preset_registry.take(preset_registry.ids_for_names(names))
+
+
+def _add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--config", default=None, help="Konfigurationsdatei (.toml oder .json)")
+    parser.add_argument("--output-root", default=None, help="Überschreibt output_root_directory")
+    parser.add_argument("--songs", type=int, default=None, help="Überschreibt number_of_songs (pro Preset)")
+    parser.add_argument("--seed", type=int, default=None, help="Überschreibt global_random_seed")
+    parser.add_argument(
+        "--set",
+        dest="overrides",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Beliebigen Konfigurationswert überschreiben (mehrfach möglich, VALUE als JSON)",
+    )
+
+
+def _config_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    overrides: Dict[str, Any] = dict(parse_override(value) for value in args.overrides)
+    overrides.update(
+        {
+            "output_root_directory": args.output_root,
+            "number_of_songs": args.songs,
+            "global_random_seed": args.seed,
+        }
+    )
+    if getattr(args, "workers", None) is not None:
+        overrides["number_of_workers"] = args.workers
+    if getattr(args, "shard", None) is not None:
+        overrides["shard_index"], overrides["number_of_shards"] = parse_shard(args.shard)
+    return load_run_config(args.config, overrides)
+
+
+def _run_build(dataset_config: Dict[str, Any]) -> int:
+    builder = create_dataset_builder(dataset_config)
+    output_root = os.path.abspath(str(dataset_config["output_root_directory"]))
+
+    examples = builder.build_dataset(
+        presets=select_presets(dataset_config),
+        output_root=output_root,
+        dataset_config=dataset_config,
+        yourmt3_index_output_dir=str(dataset_config["yourmt3_index_output_directory"]),
+        number_of_workers=int(dataset_config["number_of_workers"]),
+        shard_index=int(dataset_config["shard_index"]),
+        number_of_shards=int(dataset_config["number_of_shards"]),
+    )
+
+    print(f"Fertig! {len(examples)} neue Beispiele in {output_root}")
+    if int(dataset_config["number_of_shards"]) > 1:
+        print(
+            f"Shard {dataset_config['shard_index']}/{dataset_config['number_of_shards']} abgeschlossen. "
+            f"Nach allen Shards: python -m script merge --output-root {output_root}"
+        )
+    return 0
+
+
+def _run_plan(dataset_config: Dict[str, Any], calibrate: bool) -> int:
+    from .dataset_planner import DatasetPlanner
+
+    builder = create_dataset_builder(dataset_config)
+    report = DatasetPlanner(builder).estimate(
+        presets=select_presets(dataset_config),
+        dataset_config=dataset_config,
+        output_root=os.path.abspath(str(dataset_config["output_root_directory"])),
+        calibrate=calibrate,
+    )
+    print(report.summary())
+    return 0
+
+
+def _run_merge(dataset_config: Dict[str, Any]) -> int:
+    builder = create_dataset_builder(dataset_config)
+    output_root = os.path.abspath(str(dataset_config["output_root_directory"]))
+
+    merged = builder.merge_shards(output_root=output_root, dataset_config=dataset_config)
+    print(f"{len(merged)} Songs aus Shard-Dateien in {output_root} zusammengeführt.")
+    return 0
+
+
+def _run_verify(dataset_config: Dict[str, Any], no_cache: bool) -> int:
+    from .dataset_verifier import DatasetVerifier
+
+    number_of_workers = int(dataset_config["number_of_workers"])
+    verifier = DatasetVerifier(
+        output_root_directory=str(dataset_config["output_root_directory"]),
+        number_of_workers=number_of_workers if number_of_workers > 1 else None,
+        use_cache=not no_cache,
+    )
+    report = verifier.verify()
+    print(report.summary())
+    return 0 if report.is_ok else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m script",
+        description="Synthetischer Drum-Datensatz: bauen, planen, Shards zusammenführen, prüfen.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Datensatz erzeugen (oder fortsetzen)")
+    _add_run_arguments(build_parser)
+    build_parser.add_argument("--workers", type=int, default=None, help="Anzahl Render-Prozesse")
+    build_parser.add_argument(
+        "--shard",
+        default=None,
+        metavar="I/N",
+        help="Nur Shard I von N bauen (I = 0 .. N-1), z. B. 3/8",
+    )
+
+    plan_parser = subparsers.add_parser("plan", help="Dry-Run: Songs, Speicher und Laufzeit abschätzen")
+    _add_run_arguments(plan_parser)
+    plan_parser.add_argument("--no-calibrate", action="store_true", help="Keinen Probe-Song rendern")
+
+    merge_parser = subparsers.add_parser("merge", help="Shard-Dateien zusammenführen")
+    _add_run_arguments(merge_parser)
+
+    verify_parser = subparsers.add_parser("verify", help="Alle Artefakte prüfen")
+    _add_run_arguments(verify_parser)
+    verify_parser.add_argument("--workers", type=int, default=None, help="Anzahl Prüf-Prozesse")
+    verify_parser.add_argument("--no-cache", action="store_true", help="Cache ignorieren")
+
+    args = parser.parse_args(argv)
+    try:
+        dataset_config = _config_from_args(args)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
+    if args.command == "build":
+        return _run_build(dataset_config)
+    if args.command == "plan":
+        return _run_plan(dataset_config, calibrate=not args.no_calibrate)
+    if args.command == "merge":
+        return _run_merge(dataset_config)
+    return _run_verify(dataset_config, no_cache=args.no_cache)
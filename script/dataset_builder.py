@@ -4,28 +4,65 @@ import json
 import os
 import random
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from glob import glob
 from pathlib import Path
-from typing import Any, List, Tuple, Dict, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Tuple, Dict, Optional
 
 import numpy as np
-import pretty_midi
-import soundfile as sf
+
+if TYPE_CHECKING:  # pretty_midi/soundfile werden erst in den Stufen importiert, die sie nutzen
+    import pretty_midi
 
 from utils.note_event_dataclasses import Note as YourMT3Note
 from utils.note_event_dataclasses import NoteEvent as YourMT3NoteEvent
 
 
-from .audio_renderer import AudioRenderer
+from .audio_augmenter import AudioAugmenter
+from .audio_renderer import AudioRenderer, STEM_NAMES
 from .drum_mapping import DrumMapping
 from .drum_pattern_generator import DrumPatternGenerator, DrumEvent
-from .harmony_generator import HarmonyGenerator, NoteEvent
+from .harmony_generator import HarmonyGenerator
+from .instrument_catalog import InstrumentCatalog
 from .label_extractor import LabelExtractor, LabelEvent
+from .loudness_normalizer import LoudnessMeasurement
 from .midi_song_builder import MidiSongBuilder
+from .note_block import NoteBlock
+from .segment_slicer import SegmentSlicer
+from .song_plan import SongPlan
 from .song_specification import SongSpecification
+from .worker_startup import build_pool_context
 from .dataset_example import DatasetExample
 from .dataset_presets import DatasetPreset, DATASET_PRESETS
 from .band_configuration import BandConfiguration
 from .instrument import Instrument
+# Pro Worker-Prozess einmal übergebener Builder (siehe _build_songs)
+_WORKER_BUILDER: Optional["DatasetBuilder"] = None
+
+
+def _init_build_worker(builder: "DatasetBuilder") -> None:
+    global _WORKER_BUILDER
+    _WORKER_BUILDER = builder
+
+
+@dataclass
+class RenderedSong:
+    """Ein vollständig im Speicher erzeugter Song (DatasetBuilder.render_song)."""
+    audio: np.ndarray  # Mono, output_sample_rate, gekürzt und ggf. normiert
+    notes: NoteBlock  # YourMT3-Konvention
+    program: List[int]
+    is_drum: List[int]
+    soundfont: Optional[str]  # nur mit soundfont_pool
+    loudness: Optional[LoudnessMeasurement]  # nur mit loudness_normalizer
+
+
+def _build_song_in_worker(
+        job: tuple[DatasetPreset, SongSpecification, tuple[str, str, str, str, str]],
+) -> List[DatasetExample]:
+    preset, song_spec, output_dirs = job
+    return _WORKER_BUILDER._build_song(preset=preset, song_spec=song_spec, output_dirs=output_dirs)
+
 
 class DatasetBuilder:
     # Typ-Annotationen für PyCharm / Mypy
@@ -46,6 +83,10 @@ class DatasetBuilder:
 
     min_song_length_seconds: float
     max_song_length_seconds: float
+    label_verify_fraction: float
+    audio_augmenter: Optional[AudioAugmenter]
+    export_stems: bool
+    segment_slicer: Optional[SegmentSlicer]
 
     def __init__(
             self,
@@ -61,6 +102,10 @@ class DatasetBuilder:
             random_seed: int,
             min_song_length_seconds: float,
             max_song_length_seconds: float,
+            label_verify_fraction: float = 0.0,
+            audio_augmenter: Optional[AudioAugmenter] = None,
+            export_stems: bool = False,
+            segment_slicer: Optional[SegmentSlicer] = None,
     ) -> None:
         """Konstruktor für den DatasetBuilder.
 
@@ -75,7 +120,30 @@ class DatasetBuilder:
             label_extractor: Instanz des LabelExtractor.
             drum_mapping: Zentrale DrumMapping-Instanz.
             random_seed: Seed für reproduzierbare Datensatzerstellung.
+            label_verify_fraction: Anteil der Songs (0–1), deren direkt aus den
+                Events abgeleitete Labels/Noten mit einem erneuten Einlesen
+                der MIDI-Datei abgeglichen werden.
+            audio_augmenter: Optionaler AudioAugmenter; erzeugt pro Song
+                zusätzliche Mix-Varianten aus dem gerenderten Signal, die
+                MIDI-, Label- und notes-Dateien des Songs mitbenutzen.
+            export_stems: True, um zusätzlich Drum- und Begleit-Stems
+                (stems/<song>_drums.wav, stems/<song>_accompaniment.wav) im
+                selben Synthese-Durchlauf wie den Mix zu schreiben.
+            segment_slicer: Optionaler SegmentSlicer; schreibt je WAV-Datei
+                die Audio-Segmente fester Länge und je Song die passenden
+                note_events/tie_note_events (segments/).
+
+        Raises:
+            ValueError: Wenn nur einer der Generatoren auf der Tick-Zeitachse
+                arbeitet oder deren ticks_per_beat nicht zum MidiSongBuilder passt.
         """
+        generator_ticks = {drum_pattern_generator.ticks_per_beat, harmony_generator.ticks_per_beat}
+        if generator_ticks != {None} and generator_ticks != {midi_song_builder.ticks_per_beat}:
+            raise ValueError(
+                "Tick-Zeitachse: DrumPatternGenerator und HarmonyGenerator brauchen "
+                f"ticks_per_beat={midi_song_builder.ticks_per_beat} (wie der MidiSongBuilder)."
+            )
+
         self.output_root_directory = os.path.abspath(output_root_directory)
         self.number_of_songs = int(number_of_songs)
         self.band_configuration_pool = list(band_configuration_pool)
@@ -93,9 +161,14 @@ class DatasetBuilder:
 
         self.min_song_length_seconds = min_song_length_seconds
         self.max_song_length_seconds = max_song_length_seconds
-
-        # Root-Verzeichnis anlegen
-        os.makedirs(self.output_root_directory, exist_ok=True)
+        self.label_verify_fraction = float(label_verify_fraction)
+        self.audio_augmenter = audio_augmenter
+        self.export_stems = bool(export_stems)
+        self.segment_slicer = segment_slicer
+        # Instrument-Katalog (create_instruments), wird beim ersten Zugriff einmal angelegt
+        self._instrument_catalog: Optional[InstrumentCatalog] = None
+        # Das Root-Verzeichnis wird erst in build_dataset angelegt, damit z. B.
+        # der Online-Modus (OnlineSongGenerator) das Dateisystem nie anfasst.
 
     def create_drum_mapping(self) -> DrumMapping:
         """Erzeugt ein DrumMapping mit den für dich relevanten Drum-Klassen."""
@@ -344,6 +417,13 @@ class DatasetBuilder:
         ]
         return instruments
 
+    @property
+    def instrument_catalog(self) -> InstrumentCatalog:
+        """Katalog aller Instrumente aus create_instruments (einmal pro Builder angelegt)."""
+        if self._instrument_catalog is None:
+            self._instrument_catalog = InstrumentCatalog(self.create_instruments())
+        return self._instrument_catalog
+
     def create_band_configuration(self) -> BandConfiguration:
         """Erzeugt eine BandConfiguration mit Drums + den oben definierten Instrumenten."""
         instruments = self.create_instruments()
@@ -355,8 +435,16 @@ class DatasetBuilder:
         return band_conf
 
     @staticmethod
-    def create_harmony_generator() -> HarmonyGenerator:
-        """Erzeugt einen einfachen HarmonyGenerator mit Standard-Vokabular."""
+    def create_harmony_generator(
+            batched: bool = False,
+            ticks_per_beat: Optional[int] = None,
+    ) -> HarmonyGenerator:
+        """Erzeugt einen einfachen HarmonyGenerator mit Standard-Vokabular.
+
+        Args:
+            batched: Akkordspuren spaltenweise erzeugen (siehe HarmonyGenerator).
+            ticks_per_beat: Tick-Zeitachse (siehe HarmonyGenerator), None = Sekunden.
+        """
         scale_vocab = {
             "C major": [0, 2, 4, 5, 7, 9, 11],
             "D major": [2, 4, 6, 7, 9, 11, 1],
@@ -381,7 +469,9 @@ class DatasetBuilder:
 
         return HarmonyGenerator(
             scale_vocab=scale_vocab,
-            chord_vocab=chord_vocab
+            chord_vocab=chord_vocab,
+            batched=batched,
+            ticks_per_beat=ticks_per_beat,
         )
 
     # ------------------------------------------------------------------
@@ -549,21 +639,28 @@ class DatasetBuilder:
             notes_dir: str,
             note_events_dir: str,
             basename: str,
-    ) -> tuple[str, str, str, str, str]:
+    ) -> tuple[str, str, Optional[str], str, str]:
         midi_path = os.path.join(midi_dir, f"{basename}.mid")
         audio_path = os.path.join(audio_dir, f"{basename}.wav")
 
-        label_path = os.path.join(label_dir, f"{basename}_labels.json")
+        label_suffix = self.label_extractor.label_file_suffix
+        label_path = os.path.join(label_dir, f"{basename}{label_suffix}") if label_suffix else None
         notes_npy_path = os.path.join(notes_dir, f"{basename}_notes.npy")
         note_events_npy_path = os.path.join(note_events_dir, f"{basename}_note_events.npy")
 
         return midi_path, audio_path, label_path, notes_npy_path, note_events_npy_path
 
-    def _get_wav_n_frames_16k_mono(self, wav_path: str) -> int:
+    def _get_wav_n_frames_mono(self, wav_path: str, sample_rate: Optional[int] = None) -> int:
+        """Frames einer Mono-WAV mit sample_rate (None = output_sample_rate des AudioRenderer)."""
+        import soundfile as sf
+
         info = sf.info(wav_path)
 
-        if int(info.samplerate) != 16000:
-            raise ValueError(f"WAV ist nicht 16 kHz: {wav_path} (sr={info.samplerate})")
+        expected_sample_rate = int(sample_rate or self.audio_renderer.output_sample_rate)
+        if int(info.samplerate) != expected_sample_rate:
+            raise ValueError(
+                f"WAV hat nicht {expected_sample_rate} Hz: {wav_path} (sr={info.samplerate})"
+            )
         if int(info.channels) != 1:
             raise ValueError(f"WAV ist nicht mono: {wav_path} (channels={info.channels})")
         if int(info.frames) <= 0:
@@ -571,18 +668,56 @@ class DatasetBuilder:
 
         return int(info.frames)
 
-    def _extract_notes_from_midi_all_instruments(self, midi_path: str) -> tuple[list, list[int], list[int]]:
+    def _extract_notes_from_midi_all_instruments(self, midi_path: str) -> tuple[NoteBlock, list[int], list[int]]:
+        import pretty_midi
+
         pm = pretty_midi.PrettyMIDI(midi_path)
+        return self._extract_note_block_from_pretty_midi(pm)
+
+    def _extract_notes_from_pretty_midi(
+            self,
+            pm: pretty_midi.PrettyMIDI,
+    ) -> tuple[list, list[int], list[int]]:
+        notes, programs, is_drum_flags = self._extract_note_block_from_pretty_midi(pm)
+        return self._note_block_to_yourmt3_notes(notes), programs, is_drum_flags
+
+    def _extract_note_block_from_pretty_midi(
+            self,
+            pm: pretty_midi.PrettyMIDI,
+    ) -> tuple[NoteBlock, list[int], list[int]]:
+        return self._to_yourmt3_note_block(
+            NoteBlock.from_pretty_midi(pm),
+            [(bool(inst.is_drum), int(inst.program)) for inst in pm.instruments],
+        )
+
+    @staticmethod
+    def _to_yourmt3_note_block(
+            block: NoteBlock,
+            instruments: List[Tuple[bool, int]],
+    ) -> tuple[NoteBlock, list[int], list[int]]:
+        """Liefert alle Noten in YourMT3-Konvention als sortierten NoteBlock.
+
+        YourMT3-Konvention:
+        - drums: program=128, velocity=1
+        - non-drums: velocity auf 1..127 begrenzt
+        - offset mindestens onset+0.01
+        - sortiert nach (onset, is_drum, program, velocity, pitch, offset)
+
+        Args:
+            block: Noten aller Instrumente (wie NoteBlock.from_pretty_midi).
+            instruments: (is_drum, program) je Instrument in Dateireihenfolge;
+                daraus entstehen die Listen program/is_drum.
 
-        notes_out: list[YourMT3Note] = []
+        Returns:
+            Tupel (notes, programs, is_drum_flags).
+        """
         programs: list[int] = []
         is_drum_flags: list[int] = []
 
         seen_pairs: set[tuple[int, int]] = set()  # (is_drum_int, program)
 
-        for inst in pm.instruments:
-            inst_is_drum = bool(inst.is_drum)
-            program = 128 if inst_is_drum else int(inst.program)
+        for inst_is_drum, inst_program in instruments:
+            program = 128 if inst_is_drum else int(inst_program)
 
             pair = (1 if inst_is_drum else 0, program)
             if pair not in seen_pairs:
@@ -590,30 +725,44 @@ class DatasetBuilder:
                 is_drum_flags.append(pair[0])
                 programs.append(pair[1])
 
-            for n in inst.notes:
-                onset = float(n.start)
-                offset = float(n.end)
+        is_drum = block.is_drum
 
-                # Safety: minimale Länge, sonst kann offset == onset vorkommen
-                if offset <= onset:
-                    offset = onset + 0.01
+        # Safety: minimale Länge, sonst kann offset == onset vorkommen
+        offset = np.where(block.end_time <= block.start_time, block.start_time + 0.01, block.end_time)
 
-                pitch = int(n.pitch)
-                vel = int(max(1, min(127, int(n.velocity))))
-
-                notes_out.append(
-                    YourMT3Note(
-                        is_drum=inst_is_drum,
-                        program=program,
-                        onset=onset,
-                        offset=offset,
-                        pitch=pitch,
-                        velocity=vel if not inst_is_drum else 1,  # drums oft binär, non-drums behalten velocity
-                    )
-                )
+        notes = NoteBlock(
+            start_time=block.start_time,
+            end_time=offset,
+            pitch=block.pitch,
+            # drums oft binär, non-drums behalten velocity
+            velocity=np.where(is_drum, 1, np.clip(block.velocity, 1, 127)),
+            channel=block.channel,
+            program=np.where(is_drum, 128, block.program),
+            is_drum=is_drum,
+        )
+        notes = notes.sort(("start_time", "is_drum", "program", "velocity", "pitch", "end_time"))
+        return notes, programs, is_drum_flags
 
-        notes_out.sort(key=lambda x: (x.onset, x.is_drum, x.program, x.velocity, x.pitch, x.offset))
-        return notes_out, programs, is_drum_flags
+    @staticmethod
+    def _note_block_to_yourmt3_notes(notes: NoteBlock) -> list[YourMT3Note]:
+        return [
+            YourMT3Note(
+                is_drum=is_drum,
+                program=program,
+                onset=onset,
+                offset=offset,
+                pitch=pitch,
+                velocity=velocity,
+            )
+            for is_drum, program, onset, offset, pitch, velocity in zip(
+                notes.is_drum.tolist(),
+                notes.program.tolist(),
+                notes.start_time.tolist(),
+                notes.end_time.tolist(),
+                notes.pitch.tolist(),
+                notes.velocity.tolist(),
+            )
+        ]
 
     def _extract_drum_notes_from_midi(self, midi_path: str) -> List[YourMT3Note]:
         """
@@ -626,6 +775,8 @@ class DatasetBuilder:
         - offset für drums ist egal (drum hat in note_events keine offsets),
           aber Note braucht offset -> wir setzen min. onset+0.01
         """
+        import pretty_midi
+
         pm = pretty_midi.PrettyMIDI(midi_path)
 
         notes: List[YourMT3Note] = []
@@ -653,49 +804,70 @@ class DatasetBuilder:
         return notes
 
 
-    def _notes_to_note_events_all_instruments(self, notes: list[YourMT3Note]) -> list[YourMT3NoteEvent]:
-        events: list[YourMT3NoteEvent] = []
+    @classmethod
+    def _note_block_to_yourmt3_note_events(cls, notes: NoteBlock) -> list[YourMT3NoteEvent]:
+        """Erzeugt YourMT3-NoteEvents: Onsets für alle Noten, Offsets nur für non-drums."""
+        return cls._note_event_block_to_yourmt3(cls._note_event_block(notes))
 
-        for note in notes:
-            # onset
-            events.append(
-                YourMT3NoteEvent(
-                    is_drum=note.is_drum,
-                    program=note.program,
-                    time=note.onset,
-                    velocity=int(note.velocity),
-                    pitch=int(note.pitch),
-                )
-            )
+    @staticmethod
+    def _note_event_block(notes: NoteBlock) -> NoteBlock:
+        """Onset- und Offset-Events als nach Zeit sortierter NoteBlock (start_time = Eventzeit).
 
-            # offset nur für non-drums
-            if not note.is_drum:
-                events.append(
-                    YourMT3NoteEvent(
-                        is_drum=False,
-                        program=note.program,
-                        time=note.offset,
-                        velocity=0,
-                        pitch=int(note.pitch),
-                    )
-                )
+        Onset- und Offset-Events unterscheiden sich immer in der Velocity
+        (>= 1 bzw. 0), daher ergibt die stabile Sortierung von [Onsets, Offsets]
+        dieselbe Reihenfolge wie das abwechselnde Anhängen pro Note.
+        """
+        offsets = notes.filter(~notes.is_drum)
+
+        events = NoteBlock.concat([
+            notes,
+            NoteBlock(
+                start_time=offsets.end_time,
+                end_time=offsets.end_time,
+                pitch=offsets.pitch,
+                velocity=np.zeros(len(offsets)),
+                channel=offsets.channel,
+                program=offsets.program,
+                is_drum=offsets.is_drum,
+            ),
+        ])
+        return events.sort(("start_time", "is_drum", "program", "velocity", "pitch"))
 
-        events.sort(key=lambda e: (0.0 if e.time is None else e.time, e.is_drum, e.program, e.velocity, e.pitch))
-        return events
+    @staticmethod
+    def _note_event_block_to_yourmt3(events: NoteBlock) -> list[YourMT3NoteEvent]:
+        return [
+            YourMT3NoteEvent(
+                is_drum=is_drum,
+                program=program,
+                time=time,
+                velocity=velocity,
+                pitch=pitch,
+            )
+            for is_drum, program, time, velocity, pitch in zip(
+                events.is_drum.tolist(),
+                events.program.tolist(),
+                events.start_time.tolist(),
+                events.velocity.tolist(),
+                events.pitch.tolist(),
+            )
+        ]
 
     def _write_notes_and_note_events_npy(
             self,
             song_id: str,
-            midi_path: str,
             audio_path: str,
             notes_npy_path: str,
             note_events_npy_path: str,
-    ) -> tuple[int, list[int], list[int]]:
-        n_frames = self._get_wav_n_frames_16k_mono(audio_path)
-        duration_sec = float(n_frames) / 16000.0
+            note_block: NoteBlock,
+            programs: list[int],
+            is_drum_flags: list[int],
+    ) -> int:
+        """Schreibt notes.npy und note_events.npy aus einem YourMT3-NoteBlock und liefert n_frames."""
+        n_frames = self._get_wav_n_frames_mono(audio_path)
+        duration_sec = float(n_frames) / float(self.audio_renderer.output_sample_rate)
 
-        notes, programs, is_drum_flags = self._extract_notes_from_midi_all_instruments(midi_path)
-        note_events = self._notes_to_note_events_all_instruments(notes)
+        notes = self._note_block_to_yourmt3_notes(note_block)
+        note_events = self._note_block_to_yourmt3_note_events(note_block)
 
         notes_payload = {
             "synthetic_id": song_id,
@@ -719,7 +891,7 @@ class DatasetBuilder:
         np.save(notes_npy_path, notes_payload, allow_pickle=True, fix_imports=False)
         np.save(note_events_npy_path, note_events_payload, allow_pickle=True, fix_imports=False)
 
-        return n_frames, programs, is_drum_flags
+        return n_frames
 
     def _compute_dynamic_number_of_bars(
             self,
@@ -741,14 +913,28 @@ class DatasetBuilder:
 
         return max(1, int(round(target_length_sec / seconds_per_bar)))
 
-    def _create_band_configuration_for_preset(
+    def _band_seed(self, global_song_index: int) -> int:
+        # Eigene Seed pro Song (+300, damit sie sich vom Längen-RNG unterscheidet),
+        # sonst hinge die Band vom globalen random-Zustand des Vorgänger-Songs ab
+        # und ließe sich ohne Rendering nicht vorhersagen.
+        return self.random_seed + global_song_index + 300
+
+    def _sample_bands_for_preset(
             self,
             preset: DatasetPreset,
-    ) -> BandConfiguration:
-        return BandConfiguration.choose_random_band(
-            available_patches=self.create_instruments(),
+            global_song_indices: List[int],
+    ) -> np.ndarray:
+        """Zieht die Bands mehrerer Songs eines Presets als Katalog-Indizes (eine Zeile pro Song)."""
+        return self.instrument_catalog.sample_bands(
+            [self._band_seed(index) for index in global_song_indices],
             min_instruments=preset.min_instruments,
             max_instruments=preset.max_instruments,
+        )
+
+    def _band_configuration_from_indices(self, band_indices: np.ndarray) -> BandConfiguration:
+        return BandConfiguration.from_catalog(
+            self.instrument_catalog,
+            band_indices.tolist(),
             drum_mapping=self.drum_mapping,
             drum_channel=9,
         )
@@ -770,7 +956,172 @@ class DatasetBuilder:
             band_configuration=band_configuration,
             random_seed=self.random_seed + global_song_index,
         )
-        random.seed(song_spec.random_seed)
+        return song_spec
+
+    def _prepare_song_specification(
+            self,
+            preset: DatasetPreset,
+            dataset_config: dict[str, Any],
+            global_song_index: int,
+    ) -> SongSpecification:
+        """Trifft alle deterministischen Entscheidungen für einen Song (ohne Rendering).
+
+        Länge in Takten, Band und Seed hängen nur von Preset, Config und
+        global_song_index ab. Dadurch können build_dataset und der
+        DatasetPlanner exakt dieselben Songs planen.
+        """
+        band_indices = self._sample_bands_for_preset(preset, [global_song_index])[0]
+        return self._song_specification_from_band(
+            preset=preset,
+            dataset_config=dataset_config,
+            global_song_index=global_song_index,
+            band_configuration=self._band_configuration_from_indices(band_indices),
+        )
+
+    def _song_specification_from_band(
+            self,
+            preset: DatasetPreset,
+            dataset_config: dict[str, Any],
+            global_song_index: int,
+            band_configuration: BandConfiguration,
+    ) -> SongSpecification:
+        dynamic_number_of_bars = self._compute_dynamic_number_of_bars(
+            preset=preset,
+            dataset_config=dataset_config,
+            global_song_index=global_song_index,
+        )
+
+        song_spec = self._create_song_specification_for_preset(
+            preset=preset,
+            number_of_bars=dynamic_number_of_bars,
+            band_configuration=band_configuration,
+            global_song_index=global_song_index,
+        )
+
+        song_spec.song_identifier = DatasetBuilder.build_song_basename(
+            song_specification=song_spec,
+            song_index=global_song_index,
+        )
+        return song_spec
+
+    def create_song_plan(
+            self,
+            presets: List[DatasetPreset],
+            dataset_config: dict[str, Any],
+            first_song_index: int,
+    ) -> SongPlan:
+        """Plant alle Songs eines Laufs (number_of_songs pro Preset) als SongPlan.
+
+        Die Songs folgen der Build-Reihenfolge (Preset für Preset) ab
+        first_song_index; jede Zeile entspricht _prepare_song_specification.
+        Die Bands eines Presets werden in einem Schritt gezogen
+        (InstrumentCatalog.sample_bands).
+        """
+        global_song_indices: List[int] = []
+        preset_ids: List[int] = []
+        numbers_of_bars: List[int] = []
+        basenames: List[str] = []
+        band_tables: List[np.ndarray] = []
+
+        for preset_id, preset in enumerate(presets):
+            first_index = first_song_index + preset_id * self.number_of_songs
+            song_indices = list(range(first_index, first_index + self.number_of_songs))
+            bands = self._sample_bands_for_preset(preset, song_indices)
+            for global_song_index, band_indices in zip(song_indices, bands):
+                song_spec = self._song_specification_from_band(
+                    preset=preset,
+                    dataset_config=dataset_config,
+                    global_song_index=global_song_index,
+                    band_configuration=self._band_configuration_from_indices(band_indices),
+                )
+                global_song_indices.append(global_song_index)
+                preset_ids.append(preset_id)
+                numbers_of_bars.append(song_spec.number_of_bars)
+                basenames.append(song_spec.song_identifier)
+            band_tables.append(bands)
+
+        # Band-Tabellen der Presets auf gemeinsame Breite bringen
+        width = max((bands.shape[1] for bands in band_tables), default=0)
+        band = np.full((len(global_song_indices), width), -1, dtype=np.int16)
+        row = 0
+        for bands in band_tables:
+            band[row:row + bands.shape[0], :bands.shape[1]] = bands
+            row += bands.shape[0]
+
+        return SongPlan(
+            preset_names=[preset.name for preset in presets],
+            settings=self._song_plan_settings(dataset_config, first_song_index),
+            global_song_index=np.asarray(global_song_indices, dtype=np.int64),
+            preset_id=np.asarray(preset_ids, dtype=np.int32),
+            random_seed=self.random_seed + np.asarray(global_song_indices, dtype=np.int64),
+            number_of_bars=np.asarray(numbers_of_bars, dtype=np.int32),
+            band=band,
+            basename=np.asarray(basenames, dtype=np.str_),
+        )
+
+    def _song_plan_settings(self, dataset_config: dict[str, Any], first_song_index: int) -> dict[str, Any]:
+        """Alles außer den Presets, wovon die Zeilen eines SongPlan abhängen."""
+        return {
+            "first_song_index": int(first_song_index),
+            "number_of_songs": self.number_of_songs,
+            "global_random_seed": self.random_seed,
+            "min_song_length_seconds": float(dataset_config["min_song_length_seconds"]),
+            "max_song_length_seconds": float(dataset_config["max_song_length_seconds"]),
+            "instruments": [inst.name for inst in self.instrument_catalog.instruments],
+        }
+
+    def load_or_create_song_plan(
+            self,
+            presets: List[DatasetPreset],
+            dataset_config: dict[str, Any],
+            output_root: str,
+            first_song_index: int,
+    ) -> SongPlan:
+        """Liest den gespeicherten SongPlan des Laufs oder legt ihn an.
+
+        Beschreibung:
+            Der Plan liegt unter <output_root>/song_plans/song_plan_<first>.npz.
+            Shards desselben Laufs und fortgesetzte Läufe starten beim selben
+            Song-Index und verwenden deshalb dieselbe Datei.
+
+        Raises:
+            ValueError: Wenn der gespeicherte Plan mit anderen Presets oder
+                einer anderen Konfiguration erstellt wurde.
+        """
+        path = os.path.join(output_root, "song_plans", f"song_plan_{first_song_index:06d}.npz")
+        if not os.path.exists(path):
+            plan = self.create_song_plan(presets, dataset_config, first_song_index)
+            plan.save(path)
+            return plan
+
+        plan = SongPlan.load(path)
+        if (
+                plan.preset_names != tuple(preset.name for preset in presets)
+                or plan.settings != self._song_plan_settings(dataset_config, first_song_index)
+        ):
+            raise ValueError(
+                f"Gespeicherter Song-Plan passt nicht zur aktuellen Konfiguration: {path} "
+                "(Datei löschen, um den Lauf neu zu planen)"
+            )
+        return plan
+
+    def song_specification_from_plan(
+            self,
+            plan: SongPlan,
+            row: int,
+            preset: DatasetPreset,
+    ) -> SongSpecification:
+        """Baut die SongSpecification einer Plan-Zeile (ohne Entscheidungen neu zu treffen)."""
+        song_spec = SongSpecification(
+            song_identifier=str(plan.basename[row]),
+            tempo_bpm=preset.tempo_bpm,
+            time_signature=preset.time_signature,
+            number_of_bars=int(plan.number_of_bars[row]),
+            key=preset.key,
+            style=preset.style,
+            band_configuration=self._band_configuration_from_indices(plan.band_indices(row)),
+            random_seed=int(plan.random_seed[row]),
+        )
         return song_spec
 
         # -----------------------------------------------------
@@ -788,35 +1139,58 @@ class DatasetBuilder:
             self,
             song_spec: SongSpecification,
             band_configuration: BandConfiguration,
-    ) -> tuple[List[DrumEvent], List[NoteEvent]]:
+    ) -> tuple[NoteBlock, NoteBlock]:
+        """Erzeugt Drum- und Harmonie-Spuren eines Songs als NoteBlocks (Drums, Harmonie).
+
+        Auf der Tick-Zeitachse liefern die Generatoren Tick-Positionen; sie
+        werden hier einmal gerundet und vektorisiert in Sekunden umgerechnet.
+        """
+        tick_timeline = self.drum_pattern_generator.ticks_per_beat is not None
         drum_events: List[DrumEvent] = self.drum_pattern_generator.generate_drum_track(
             song_spec
         )
+        if tick_timeline:
+            drum_block = self.midi_song_builder.build_tick_drum_block(song_spec, drum_events)
+        else:
+            drum_block = self.midi_song_builder.build_drum_block(drum_events)
 
-        note_events: List[NoteEvent] = []
+        note_blocks: List[NoteBlock] = []
 
         chord_instruments = band_configuration.get_instruments_by_role("chords")
         bass_instruments = band_configuration.get_instruments_by_role("bass")
         pad_instruments = band_configuration.get_instruments_by_role("pad")
 
+        # eine Akkordfolge pro Song, gemeinsam für alle harmonischen Spuren
+        progression = self.harmony_generator.choose_chord_progression(song_spec)
+
         for inst in chord_instruments:
-            note_events.extend(
-                self.harmony_generator.generate_chord_track(song_spec, inst)
-            )
+            if self.harmony_generator.batched:
+                note_blocks.append(
+                    self.harmony_generator.generate_chord_block(song_spec, inst, progression)
+                )
+            else:
+                note_blocks.append(NoteBlock.from_note_events(
+                    self.harmony_generator.generate_chord_track(song_spec, inst, progression)
+                ))
 
         for inst in bass_instruments:
-            note_events.extend(
-                self.harmony_generator.generate_bass_track(song_spec, inst)
-            )
+            note_blocks.append(NoteBlock.from_note_events(
+                self.harmony_generator.generate_bass_track(song_spec, inst, progression)
+            ))
 
         if pad_instruments:
-            note_events.extend(
+            note_blocks.append(NoteBlock.from_note_events(
                 self.harmony_generator.generate_pad_or_lead_tracks(
-                    song_spec, pad_instruments
+                    song_spec, pad_instruments, progression
                 )
-            )
+            ))
 
-        return drum_events, note_events
+        note_block = NoteBlock.concat(note_blocks)
+        if tick_timeline:
+            note_block = note_block.tick_positions_to_seconds(
+                self.midi_song_builder.seconds_per_tick(song_spec)
+            )
+        return drum_block, note_block
 
         # -----------------------------------------------------
         # MIDI, Audio, Labels, DatasetExample
@@ -825,41 +1199,88 @@ class DatasetBuilder:
     def _build_midi_audio_labels_and_example(
             self,
             song_spec: SongSpecification,
-            drum_events: List[DrumEvent],
-            note_events: List[NoteEvent],
+            drum_block: NoteBlock,
+            note_block: NoteBlock,
             midi_path: str,
             audio_path: str,
             notes_npy_path: str,
             note_events_npy_path: str,
-            label_path: str,
-    ) -> DatasetExample:
-        # MIDI bauen + speichern
-        pm = self.midi_song_builder.build_pretty_midi(
-            song_specification=song_spec,
-            drum_events=drum_events,
-            note_events=note_events,
-        )
-        self.midi_song_builder.save_midi(pm, midi_path)
+            label_path: Optional[str],
+    ) -> List[DatasetExample]:
+        """Schreibt MIDI, Audio, Labels und notes eines Songs.
 
-        # Audio rendern
-        self.audio_renderer.render_midi_to_wav(
+        Returns:
+            Das Beispiel des Standard-Mixes, gefolgt von den augmentierten
+            Mix-Varianten (nur mit audio_augmenter).
+        """
+        # MIDI bauen + speichern
+        song_notes, tracks = self.midi_song_builder.arrange_tracks(song_spec, drum_block, note_block)
+        self.midi_song_builder.write_midi(song_spec, song_notes, tracks, midi_path)
+
+        # Audio rendern (Stems ggf. im selben Durchlauf, Soundfont aus soundfont_pool)
+        # Weitere Sampleraten entstehen im selben Durchlauf (audio_<rate>/)
+        stem_paths = self._stem_paths_for_audio(audio_path) if self.export_stems else None
+        sample_rate_paths = self._sample_rate_paths_for_audio(audio_path)
+        soundfont = self.audio_renderer.soundfont_for_song(song_spec.song_identifier)
+        audio, loudness = self.audio_renderer.render_midi_to_wav(
             midi_path=midi_path,
             output_wav_path=audio_path,
+            stem_paths=stem_paths,
+            soundfont_path=soundfont,
+            sample_rate_paths=sample_rate_paths,
         )
-
-        # Labels (optional, bleibt als Debug/Legacy)
-        labels: List[LabelEvent] = self.label_extractor.extract_from_midi(midi_path)
-        self.label_extractor.save_labels_json(labels, label_path)
+        audio_rates = {
+            str(sample_rate): {
+                "audio_path": path,
+                "n_frames": self._get_wav_n_frames_mono(path, sample_rate),
+            }
+            for sample_rate, path in sample_rate_paths.items()
+        } or None
+
+        # Noten so, wie sie in der MIDI-Datei stehen (ohne die Datei erneut einzulesen)
+        midi_notes = self.midi_song_builder.simulate_midi_roundtrip(song_spec, song_notes)
+
+        # Labels (optional, Debug/Legacy; Format je Lauf über label_format, "none" = keine Datei)
+        labels = self.label_extractor.extract_table_from_block(
+            midi_notes,
+            instrument_names={index: track.name for index, track in enumerate(tracks)},
+        )
+        if label_path is not None:
+            self.label_extractor.save_labels(labels, label_path)
 
         # notes.npy + note_events.npy + n_frames + (program/is_drum)
-        n_frames, programs, is_drum_flags = self._write_notes_and_note_events_npy(
+        used_tracks = set(np.unique(midi_notes.channel).tolist())
+        yourmt3_notes, programs, is_drum_flags = self._to_yourmt3_note_block(
+            midi_notes,
+            [(track.is_drum, track.program) for index, track in enumerate(tracks) if index in used_tracks],
+        )
+        if self._should_verify_labels(song_spec):
+            self._verify_against_midi_reparse(song_spec.song_identifier, midi_path, labels.to_events(), yourmt3_notes)
+
+        n_frames = self._write_notes_and_note_events_npy(
             song_id=song_spec.song_identifier,
-            midi_path=midi_path,
             audio_path=audio_path,
             notes_npy_path=notes_npy_path,
             note_events_npy_path=note_events_npy_path,
+            note_block=yourmt3_notes,
+            programs=programs,
+            is_drum_flags=is_drum_flags,
         )
 
+        # Segmente fester Länge mit Event-Fenstern (nur mit segment_slicer)
+        segment_paths = None
+        if self.segment_slicer is not None:
+            segment_paths = self._segment_paths_for_audio(audio_path)
+            self._write_segment_events_npy(
+                song_id=song_spec.song_identifier,
+                segment_events_npy_path=segment_paths["segment_events"],
+                note_block=yourmt3_notes,
+                n_frames=n_frames,
+                programs=programs,
+                is_drum_flags=is_drum_flags,
+            )
+            self._write_segments_npy(segment_paths["segments"], audio)
+
         # DatasetExample erzeugen
         example = DatasetExample(
             song_identifier=song_spec.song_identifier,
@@ -873,25 +1294,347 @@ class DatasetBuilder:
             n_frames=n_frames,
             program=programs,
             is_drum=is_drum_flags,
+            stem_paths=stem_paths,
+            soundfont=soundfont,
+            segment_paths=segment_paths,
+            loudness=loudness.to_dict() if loudness is not None else None,
+            audio_rates=audio_rates,
+        )
+        return [example] + self._write_augmented_examples(example, audio)
+
+    @staticmethod
+    def _stem_paths_for_audio(audio_path: str) -> Dict[str, str]:
+        """Stem-Pfade eines Songs: stems/ liegt neben audio/ im selben Datensatz-Ordner."""
+        audio_dir, filename = os.path.split(audio_path)
+        stems_dir = os.path.join(os.path.dirname(audio_dir), "stems")
+        basename = os.path.splitext(filename)[0]
+        return {name: os.path.join(stems_dir, f"{basename}_{name}.wav") for name in STEM_NAMES}
+
+    def _sample_rate_paths_for_audio(self, audio_path: str) -> Dict[int, str]:
+        """WAV-Pfade je weiterer Samplerate: audio_<rate>/ liegt neben audio/ im selben Datensatz-Ordner."""
+        audio_dir, filename = os.path.split(audio_path)
+        return {
+            sample_rate: os.path.join(os.path.dirname(audio_dir), f"audio_{sample_rate}", filename)
+            for sample_rate in self.audio_renderer.extra_sample_rates
+        }
+
+    @staticmethod
+    def _segment_paths_for_audio(audio_path: str) -> Dict[str, str]:
+        """Segment-Dateien einer WAV-Datei: segments/ liegt neben audio/ im selben Datensatz-Ordner."""
+        audio_dir, filename = os.path.split(audio_path)
+        segments_dir = os.path.join(os.path.dirname(audio_dir), "segments")
+        basename = os.path.splitext(filename)[0]
+        return {
+            "segments": os.path.join(segments_dir, f"{basename}_segments.npy"),
+            "segment_events": os.path.join(segments_dir, f"{basename}_segment_events.npy"),
+        }
+
+    def _write_segments_npy(self, segments_npy_path: str, audio: np.ndarray) -> None:
+        """Schreibt die Audio-Segmente als ein (Segmente, segment_length)-float32-Array."""
+        os.makedirs(os.path.dirname(segments_npy_path), exist_ok=True)
+        np.save(segments_npy_path, self.segment_slicer.slice_audio(audio), allow_pickle=False)
+
+    def _write_segment_events_npy(
+            self,
+            song_id: str,
+            segment_events_npy_path: str,
+            note_block: NoteBlock,
+            n_frames: int,
+            programs: list[int],
+            is_drum_flags: list[int],
+    ) -> None:
+        """Schreibt note_events und tie_note_events je Segment (YourMT3-Bundle, ein Eintrag pro Segment).
+
+        tie_note_events eines Segments sind die melodischen Noten, die schon
+        vor dem Segmentanfang begonnen haben und noch klingen (time = None,
+        wie in YourMT3).
+        """
+        slicer = self.segment_slicer
+        n_segments = slicer.number_of_segments(n_frames)
+
+        event_block = self._note_event_block(note_block)
+        note_events = self._note_event_block_to_yourmt3(event_block)
+        event_bounds = slicer.event_boundaries(event_block.start_time, n_segments)
+
+        tie_segments, tie_notes = slicer.tie_notes(
+            note_block.start_time, note_block.end_time, note_block.is_drum, n_segments
         )
-        return example
+        tie_bounds = np.searchsorted(tie_segments, np.arange(n_segments + 1), side="left")
+        tie_note_events = [
+            YourMT3NoteEvent(is_drum=False, program=program, time=None, velocity=1, pitch=pitch)
+            for program, pitch in zip(note_block.program[tie_notes].tolist(), note_block.pitch[tie_notes].tolist())
+        ]
+
+        payload = {
+            "synthetic_id": song_id,
+            "duration_sec": float(n_frames) / float(slicer.sample_rate),
+            "program": programs,
+            "is_drum": is_drum_flags,
+            "segment_seconds": slicer.segment_seconds,
+            "segment_length": slicer.segment_length,
+            "note_events": [note_events[event_bounds[k]:event_bounds[k + 1]] for k in range(n_segments)],
+            "tie_note_events": [tie_note_events[tie_bounds[k]:tie_bounds[k + 1]] for k in range(n_segments)],
+            "start_times": slicer.start_times(n_frames).tolist(),
+        }
+        os.makedirs(os.path.dirname(segment_events_npy_path), exist_ok=True)
+        np.save(segment_events_npy_path, payload, allow_pickle=True, fix_imports=False)
+
+    def _write_augmented_examples(self, example: DatasetExample, audio: np.ndarray) -> List[DatasetExample]:
+        """Schreibt die Mix-Varianten des audio_augmenter neben die WAV-Datei des Songs.
+
+        Die Varianten haben dieselbe Länge wie der Standard-Mix und teilen sich
+        dessen MIDI-, Label-, notes- und note_events-Dateien. Stems und weitere
+        Sampleraten (extra_sample_rates) gibt es nur für den Standard-Mix; der
+        DatasetReader meldet das für Varianten ausdrücklich. EQ und Hall
+        verändern Lautheit und Peak; mit loudness_normalizer wird daher jede
+        Variante selbst gemessen und normiert (loudness je Variante).
+        """
+        if self.audio_augmenter is None:
+            return []
+
+        import soundfile as sf
+
+        variants = self.audio_augmenter.augment(audio, example.song_specification.random_seed)
+        audio_stem = os.path.splitext(example.audio_path)[0]
+
+        augmented_examples: List[DatasetExample] = []
+        loudness_normalizer = self.audio_renderer.loudness_normalizer
+        for mix_variant, variant_audio in zip(self.audio_augmenter.variant_names, variants):
+            variant_path = f"{audio_stem}__{mix_variant}.wav"
+            loudness = None
+            if loudness_normalizer is not None:
+                measurement = loudness_normalizer.measure(variant_audio)
+                variant_audio = variant_audio * measurement.gain
+                loudness = measurement.to_dict()
+            sf.write(variant_path, variant_audio, self.audio_renderer.output_sample_rate)
+
+            # Eigene Audio-Segmente, Event-Fenster wie beim Standard-Mix
+            segment_paths = None
+            if example.segment_paths is not None:
+                segment_paths = {
+                    "segments": self._segment_paths_for_audio(variant_path)["segments"],
+                    "segment_events": example.segment_paths["segment_events"],
+                }
+                self._write_segments_npy(segment_paths["segments"], variant_audio)
+            augmented_examples.append(
+                DatasetExample(
+                    song_identifier=example.song_identifier,
+                    audio_path=variant_path,
+                    label_path=example.label_path,
+                    midi_path=example.midi_path,
+                    mix_variant=mix_variant,
+                    song_specification=example.song_specification,
+                    notes_npy_path=example.notes_npy_path,
+                    note_events_npy_path=example.note_events_npy_path,
+                    n_frames=example.n_frames,
+                    program=example.program,
+                    is_drum=example.is_drum,
+                    soundfont=example.soundfont,
+                    segment_paths=segment_paths,
+                    loudness=loudness,
+                )
+            )
+        return augmented_examples
+
+    def _should_verify_labels(self, song_spec: SongSpecification) -> bool:
+        """Stichprobe für den Abgleich mit der MIDI-Datei (deterministisch pro Song)."""
+        if self.label_verify_fraction <= 0.0:
+            return False
+        # eigener RNG, damit die Stichprobe die globalen Seeds nicht verschiebt
+        return random.Random(song_spec.random_seed).random() < self.label_verify_fraction
+
+    def _verify_against_midi_reparse(
+            self,
+            song_id: str,
+            midi_path: str,
+            labels: List[LabelEvent],
+            yourmt3_notes: NoteBlock,
+    ) -> None:
+        """Vergleicht die aus Events abgeleiteten Labels/Noten mit der gespeicherten MIDI-Datei.
+
+        Raises:
+            ValueError: Wenn Labels oder Noten von der MIDI-Datei abweichen.
+        """
+        reparsed_labels = self.label_extractor.extract_from_midi(midi_path)
+        if reparsed_labels != labels:
+            raise ValueError(
+                f"Labels aus Events weichen von der MIDI-Datei ab: {song_id} "
+                f"({len(labels)} statt {len(reparsed_labels)} Labels, {midi_path})"
+            )
+
+        reparsed_notes, _, _ = self._extract_notes_from_midi_all_instruments(midi_path)
+        for column in ("start_time", "end_time", "pitch", "velocity", "program", "is_drum"):
+            if not np.array_equal(getattr(reparsed_notes, column), getattr(yourmt3_notes, column)):
+                raise ValueError(
+                    f"Noten aus Events weichen von der MIDI-Datei ab: {song_id} "
+                    f"(Spalte {column}, {midi_path})"
+                )
+
+    def _generate_song_events(
+            self,
+            preset: DatasetPreset,
+            song_spec: SongSpecification,
+    ) -> tuple[NoteBlock, NoteBlock]:
+        """Setzt Preset-Parameter und Seeds des Songs und erzeugt alle Events eines Songs."""
+        self._update_drum_generator_from_preset(preset)
+        # Zufall nur aus dem Song-Seed, sonst hinge der Song vom Worker-Prozess ab
+        self.drum_pattern_generator.seed(song_spec.random_seed)
+
+        return self._generate_drum_and_note_events(
+            song_spec=song_spec,
+            band_configuration=song_spec.band_configuration,
+        )
+
+    def _build_song(
+            self,
+            preset: DatasetPreset,
+            song_spec: SongSpecification,
+            output_dirs: tuple[str, str, str, str, str],
+    ) -> List[DatasetExample]:
+        """Erzeugt Events, MIDI, Audio und Labels für einen vorbereiteten Song.
+
+        Returns:
+            Standard-Mix zuerst, danach die augmentierten Mix-Varianten.
+        """
+        midi_dir, audio_dir, label_dir, notes_dir, note_events_dir = output_dirs
+        midi_path, audio_path, label_path, notes_npy_path, note_events_npy_path = self._build_paths_for_basename(
+            midi_dir=midi_dir,
+            audio_dir=audio_dir,
+            label_dir=label_dir,
+            notes_dir=notes_dir,
+            note_events_dir=note_events_dir,
+            basename=song_spec.song_identifier,
+        )
+
+        drum_block, note_block = self._generate_song_events(preset, song_spec)
+
+        return self._build_midi_audio_labels_and_example(
+            song_spec=song_spec,
+            drum_block=drum_block,
+            note_block=note_block,
+            midi_path=midi_path,
+            audio_path=audio_path,
+            notes_npy_path=notes_npy_path,
+            note_events_npy_path=note_events_npy_path,
+            label_path=label_path,
+        )
+
+    def render_song(self, preset: DatasetPreset, song_spec: SongSpecification) -> RenderedSong:
+        """Erzeugt einen geplanten Song vollständig im Speicher, ohne Dateien zu schreiben.
+
+        Events, Soundfont (soundfont_pool), Kürzung und Lautheitsnormierung
+        wie im Build; Zufall nur aus dem Seed des Songs. Für den Online-Modus
+        (OnlineSongGenerator).
+        """
+        drum_block, note_block = self._generate_song_events(preset, song_spec)
+        pm = self.midi_song_builder.build_pretty_midi_from_blocks(
+            song_specification=song_spec,
+            drum_block=drum_block,
+            note_block=note_block,
+        )
+
+        soundfont = self.audio_renderer.soundfont_for_song(song_spec.song_identifier)
+        audio = self.audio_renderer.render_pretty_midi(pm, soundfont)
+        audio = audio[:self.audio_renderer.trimmed_length(audio, pm)]
+        loudness = self.audio_renderer.normalize_loudness(audio)
+        if loudness is not None:
+            audio = audio * loudness.gain
+
+        notes, program, is_drum = self._extract_note_block_from_pretty_midi(pm)
+        return RenderedSong(
+            audio=audio,
+            notes=notes,
+            program=program,
+            is_drum=is_drum,
+            soundfont=soundfont,
+            loudness=loudness,
+        )
+
+    def _build_songs(
+            self,
+            jobs: List[tuple[DatasetPreset, SongSpecification]],
+            output_dirs: tuple[str, str, str, str, str],
+            number_of_workers: int = 1,
+    ) -> Iterator[List[DatasetExample]]:
+        """Baut vorbereitete Songs und liefert die Beispiele je Song in Job-Reihenfolge.
+
+        Bei number_of_workers > 1 rendert ein Prozess-Pool die Songs parallel.
+        Jeder Worker erhält den Builder einmal beim Start; alle Entscheidungen
+        hängen nur von der SongSpecification ab, das Ergebnis ist also
+        unabhängig von der Anzahl Worker.
+        """
+        if number_of_workers <= 1 or len(jobs) <= 1:
+            for preset, song_spec in jobs:
+                yield self._build_song(preset=preset, song_spec=song_spec, output_dirs=output_dirs)
+            return
+
+        with ProcessPoolExecutor(
+                max_workers=number_of_workers,
+                mp_context=build_pool_context(),
+                initializer=_init_build_worker,
+                initargs=(self,),
+        ) as executor:
+            yield from executor.map(
+                _build_song_in_worker,
+                [(preset, song_spec, output_dirs) for preset, song_spec in jobs],
+            )
+
+    def _soundfont_build_order(self, jobs: List[tuple[DatasetPreset, SongSpecification]]) -> List[int]:
+        """Job-Positionen, gruppiert nach Soundfont (stabil, Plan-Reihenfolge innerhalb einer Gruppe).
+
+        Die Worker holen sich die Jobs der Reihe nach; so lädt jeder Worker
+        jede Soundfont aus soundfont_pool höchstens einmal pro Lauf. Ohne
+        Pool bleibt die Reihenfolge unverändert.
+        """
+        pool = self.audio_renderer.soundfont_pool
+        if len(pool) <= 1:
+            return list(range(len(jobs)))
+
+        pool_position = {soundfont: position for position, soundfont in enumerate(pool)}
+        soundfont_ids = [
+            pool_position[self.audio_renderer.soundfont_for_song(song_spec.song_identifier)]
+            for _, song_spec in jobs
+        ]
+        return sorted(range(len(jobs)), key=soundfont_ids.__getitem__)
+
+    @staticmethod
+    def _shard_suffix(shard_index: int, number_of_shards: int) -> str:
+        """Dateinamen-Suffix für Shard-Läufe, z. B. ".shard003of008" ("" ohne Sharding)."""
+        if number_of_shards <= 1:
+            return ""
+        return f".shard{shard_index:03d}of{number_of_shards:03d}"
 
     def _write_dataset_info(
             self,
             dataset_info: dict[str, Any],
             output_root: str,
+            filename: str = "dataset_info.json",
     ) -> None:
-        info_path = os.path.join(output_root, "dataset_info.json")
+        info_path = os.path.join(output_root, filename)
         with open(info_path, "w", encoding="utf-8") as f:
             json.dump(dataset_info, f, indent=2, ensure_ascii=False, default=str)
 
-    def _load_existing_dataset_info(self, output_root: str) -> dict[str, Any] | None:
+    @staticmethod
+    def _count_songs_in_info(dataset_info: dict[str, Any] | None) -> int:
+        """Zählt alle bereits registrierten Songs in einem dataset_info-Objekt."""
+        if dataset_info is None:
+            return 0
+        return sum(
+            len(preset_dict.get("songs", []))
+            for preset_dict in dataset_info.get("presets", {}).values()
+        )
+
+    def _load_existing_dataset_info(
+            self,
+            output_root: str,
+            filename: str = "dataset_info.json",
+    ) -> dict[str, Any] | None:
         """Lädt eine bestehende dataset_info.json, falls vorhanden.
 
         Returns:
             Das geladene Dict oder None, wenn keine Datei existiert.
         """
-        info_path = os.path.join(output_root, "dataset_info.json")
+        info_path = os.path.join(output_root, filename)
         if not os.path.exists(info_path):
             return None
 
@@ -996,8 +1739,8 @@ class DatasetBuilder:
 
         return song_spec
 
-    def save_index(self, output_root: str) -> None:
-        index_path = os.path.join(output_root, "dataset_index.json")
+    def save_index(self, output_root: str, filename: str = "dataset_index.json") -> None:
+        index_path = os.path.join(output_root, filename)
 
         if os.path.exists(index_path):
             with open(index_path, "r", encoding="utf-8") as f:
@@ -1027,17 +1770,22 @@ class DatasetBuilder:
         if abs((train_ratio + val_ratio + test_ratio) - 1.0) > 1e-9:
             raise ValueError("train/val/test ratios müssen zusammen 1.0 ergeben.")
 
-        examples_copy = list(examples)
+        # Mix-Varianten eines Songs landen immer im selben Split
+        songs: Dict[str, List[DatasetExample]] = {}
+        for example in examples:
+            songs.setdefault(example.song_identifier, []).append(example)
+
+        songs_copy = list(songs.values())
         rnd = random.Random(int(seed))
-        rnd.shuffle(examples_copy)
+        rnd.shuffle(songs_copy)
 
-        n_total = len(examples_copy)
+        n_total = len(songs_copy)
         n_train = int(n_total * train_ratio)
         n_val = int(n_total * val_ratio)
 
-        train = examples_copy[:n_train]
-        val = examples_copy[n_train:n_train + n_val]
-        test = examples_copy[n_train + n_val:]
+        train = [example for song in songs_copy[:n_train] for example in song]
+        val = [example for song in songs_copy[n_train:n_train + n_val] for example in song]
+        test = [example for song in songs_copy[n_train + n_val:] for example in song]
 
         return train, val, test
 
@@ -1054,7 +1802,10 @@ class DatasetBuilder:
 
     def _make_yourmt3_file_list_entry(self, example: DatasetExample) -> dict[str, Any]:
         return {
-            "synthetic_id": example.song_identifier,
+            "synthetic_id": (
+                example.song_identifier if example.mix_variant == "default"
+                else f"{example.song_identifier}__{example.mix_variant}"
+            ),
             "n_frames": int(example.n_frames) if example.n_frames is not None else None,
             "stem_file": None,
             "mix_audio_file": self._as_posix_rel_from_amt_src(example.audio_path),
@@ -1101,11 +1852,31 @@ class DatasetBuilder:
 
     def build_dataset(
             self,
-            presets: List[DatasetPreset],
+            presets: Iterable[DatasetPreset],
             output_root: str,
             dataset_config: dict[str, Any],
             yourmt3_index_output_dir: str | None = None,
+            number_of_workers: int = 1,
+            shard_index: int = 0,
+            number_of_shards: int = 1,
     ) -> List[DatasetExample]:
+        """Erzeugt alle Songs und schreibt Artefakte, dataset_info und Index.
+
+        Sharding:
+            Mit number_of_shards > 1 baut dieser Lauf nur die Songs mit
+            (global_song_index - 1) % number_of_shards == shard_index. Die
+            gemeinsame dataset_info.json wird nur gelesen (Start-Index), jeder
+            Shard schreibt eigene dataset_info/dataset_index-Dateien mit
+            Shard-Suffix und überspringt dort bereits registrierte Songs.
+            Die YourMT3-Splits entstehen erst in merge_shards.
+
+        presets darf auch ein Stream sein (z. B. ein PresetGrid); er wird
+        einmal gelesen, bevor der SongPlan entsteht.
+        """
+        presets = list(presets)
+
+        # Fehlende Soundfont-Presets fallen hier auf, nicht erst beim Anhören
+        self.audio_renderer.preflight(self.instrument_catalog.instruments)
 
         output_root_path = Path(output_root)
         output_root_path.mkdir(parents=True, exist_ok=True)
@@ -1119,88 +1890,77 @@ class DatasetBuilder:
 
         midi_dir, audio_dir, label_dir, notes_dir, note_events_dir = self._prepare_output_dirs(output_root)
 
-
-        all_examples: List[DatasetExample] = []
+        is_shard = number_of_shards > 1
+        shard_suffix = self._shard_suffix(shard_index, number_of_shards)
 
         # 2) Bestehende dataset_info laden (falls vorhanden)
         existing_info = self._load_existing_dataset_info(output_root)
+        existing_song_count = self._count_songs_in_info(existing_info)
 
-        if existing_info is not None:
-            dataset_info = existing_info
-            existing_song_count = 0
-            for preset_dict in dataset_info.get("presets", {}).values():
-                existing_song_count += len(preset_dict.get("songs", []))
+        if is_shard:
+            dataset_info = self._load_existing_dataset_info(
+                output_root, filename=f"dataset_info{shard_suffix}.json"
+            )
         else:
+            dataset_info = existing_info
+        if dataset_info is None:
             dataset_info = self._init_dataset_info(dataset_config)
-            existing_song_count = 0
-
-        global_song_index: int = existing_song_count + 1
-        total_songs = existing_song_count + self.number_of_songs * len(presets)
-
-        # 3) Hauptschleife über Presets und Songs
-        for preset in presets:
-            for _ in range(self.number_of_songs):
-                dynamic_number_of_bars = self._compute_dynamic_number_of_bars(
-                    preset=preset,
-                    dataset_config=dataset_config,
-                    global_song_index=global_song_index,
-                )
-
-                band_configuration = self._create_band_configuration_for_preset(preset)
-                song_spec = self._create_song_specification_for_preset(
-                    preset=preset,
-                    number_of_bars=dynamic_number_of_bars,
-                    band_configuration=band_configuration,
-                    global_song_index=global_song_index,
-                )
 
-                basename = DatasetBuilder.build_song_basename(
-                    song_specification=song_spec,
-                    song_index=global_song_index,
-                )
-                song_spec.song_identifier = basename
-
-                midi_path, audio_path, label_path, notes_npy_path, note_events_npy_path = self._build_paths_for_basename(
-                    midi_dir=midi_dir,
-                    audio_dir=audio_dir,
-                    label_dir=label_dir,
-                    notes_dir=notes_dir,
-                    note_events_dir=note_events_dir,
-                    basename=basename,
-                )
-
-                self._update_drum_generator_from_preset(preset)
-
-                drum_events, note_events = self._generate_drum_and_note_events(
-                    song_spec=song_spec,
-                    band_configuration=band_configuration,
-                )
+        already_built: set[str] = set()
+        if is_shard:
+            for preset_dict in dataset_info["presets"].values():
+                already_built.update(preset_dict.get("songs", []))
+
+        # 3) Songs planen (deterministisch, gespeicherter SongPlan) und bauen (ggf. parallel)
+        plan = self.load_or_create_song_plan(
+            presets=presets,
+            dataset_config=dataset_config,
+            output_root=output_root,
+            first_song_index=existing_song_count + 1,
+        ).shard(shard_index, number_of_shards)
+
+        jobs: List[tuple[DatasetPreset, SongSpecification]] = []
+        for row in range(len(plan)):
+            if str(plan.basename[row]) in already_built:
+                continue
+            preset = presets[int(plan.preset_id[row])]
+            jobs.append((preset, self.song_specification_from_plan(plan, row, preset)))
 
-                example = self._build_midi_audio_labels_and_example(
-                    song_spec=song_spec,
-                    drum_events=drum_events,
-                    note_events=note_events,
-                    midi_path=midi_path,
-                    audio_path=audio_path,
-                    notes_npy_path=notes_npy_path,
-                    note_events_npy_path=note_events_npy_path,
-                    label_path=label_path,
-                )
-                all_examples.append(example)
+        all_examples: List[DatasetExample] = []
+        output_dirs = (midi_dir, audio_dir, label_dir, notes_dir, note_events_dir)
+        build_order = self._soundfont_build_order(jobs)
+        examples_iter = self._build_songs(
+            [jobs[job_index] for job_index in build_order],
+            output_dirs,
+            number_of_workers=number_of_workers,
+        )
 
-                self._register_song_in_info(
-                    dataset_info=dataset_info,
-                    preset=preset,
-                    song_basename=basename,
-                )
+        examples_per_job: List[List[DatasetExample]] = [[] for _ in jobs]
+        for position, (job_index, song_examples) in enumerate(zip(build_order, examples_iter), start=1):
+            examples_per_job[job_index] = song_examples
+            self._print_progress(position, len(jobs))
 
-                if total_songs > 0:
-                    self._print_progress(global_song_index, total_songs)
+        # Index und dataset_info in Plan-Reihenfolge, unabhängig von der Build-Reihenfolge
+        for (preset, song_spec), song_examples in zip(jobs, examples_per_job):
+            all_examples.extend(song_examples)
 
-                global_song_index += 1
+            self._register_song_in_info(
+                dataset_info=dataset_info,
+                preset=preset,
+                song_basename=song_spec.song_identifier,
+            )
 
         self.examples = all_examples
 
+        if is_shard:
+            self._write_dataset_info(
+                dataset_info=dataset_info,
+                output_root=output_root,
+                filename=f"dataset_info{shard_suffix}.json",
+            )
+            self.save_index(output_root, filename=f"dataset_index{shard_suffix}.json")
+            return all_examples
+
         data_root = os.path.dirname(output_root)  # "data"
         train, val, test = self._split_examples(
             examples=all_examples,
@@ -1249,3 +2009,70 @@ class DatasetBuilder:
 
         return all_examples
 
+
+    def merge_shards(
+            self,
+            output_root: str,
+            dataset_config: dict[str, Any],
+    ) -> List[DatasetExample]:
+        """Führt die Dateien aller Shard-Läufe in dataset_info.json und dataset_index.json zusammen.
+
+        Beschreibung:
+            Song-Listen und Index-Einträge werden nach Song-Index sortiert
+            übernommen, danach werden die YourMT3-Splits für die neuen Songs
+            geschrieben (wie am Ende eines normalen Laufs) und die
+            Shard-Dateien gelöscht.
+
+        Returns:
+            Die zusammengeführten Beispiele (aus den Index-Einträgen rekonstruiert).
+        """
+        info_paths = sorted(glob(os.path.join(output_root, "dataset_info.shard*.json")))
+        index_paths = sorted(glob(os.path.join(output_root, "dataset_index.shard*.json")))
+        if not info_paths:
+            return []
+
+        dataset_info = self._load_existing_dataset_info(output_root)
+        if dataset_info is None:
+            dataset_info = self._init_dataset_info(dataset_config)
+
+        for info_path in info_paths:
+            with open(info_path, "r", encoding="utf-8") as f:
+                shard_info = json.load(f)
+            for preset_name, shard_preset_dict in shard_info.get("presets", {}).items():
+                preset_dict = dataset_info["presets"].setdefault(
+                    preset_name, {**shard_preset_dict, "songs": []}
+                )
+                preset_dict["songs"].extend(shard_preset_dict.get("songs", []))
+
+        # Basenames beginnen mit dem nullgepolsterten Song-Index
+        for preset_dict in dataset_info["presets"].values():
+            preset_dict["songs"].sort()
+
+        shard_entries: list[dict] = []
+        for index_path in index_paths:
+            with open(index_path, "r", encoding="utf-8") as f:
+                shard_entries.extend(json.load(f))
+        shard_entries.sort(key=lambda entry: entry["song_identifier"])
+
+        merged_examples = [DatasetExample.from_index_entry(entry) for entry in shard_entries]
+
+        self._write_dataset_info(dataset_info=dataset_info, output_root=output_root)
+        self.examples = merged_examples
+        self.save_index(output_root)
+
+        data_root = os.path.dirname(output_root)
+        train, val, test = self._split_examples(
+            examples=merged_examples,
+            train_ratio=float(dataset_config.get("train_ratio", 0.80)),
+            val_ratio=float(dataset_config.get("val_ratio", 0.10)),
+            test_ratio=float(dataset_config.get("test_ratio", 0.10)),
+            seed=int(dataset_config.get("split_seed", 1234)),
+        )
+        self._write_yourmt3_file_list_json(data_root, "synthetic_drums_train_file_list.json", train)
+        self._write_yourmt3_file_list_json(data_root, "synthetic_drums_validation_file_list.json", val)
+        self._write_yourmt3_file_list_json(data_root, "synthetic_drums_test_file_list.json", test)
+
+        for path in info_paths + index_paths:
+            os.remove(path)
+
+        return merged_examples
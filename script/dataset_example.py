@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List
 
 from .song_specification import SongSpecification
 
@@ -20,7 +20,7 @@ class DatasetExample:
         self,
         song_identifier: str,
         audio_path: str,
-        label_path: str,
+        label_path: Optional[str],
         midi_path: str,
         mix_variant: str,
         song_specification: SongSpecification,
@@ -30,21 +30,37 @@ class DatasetExample:
         n_frames: Optional[int] = None,
         program: Optional[List[int]] = None,
         is_drum: Optional[List[int]] = None,
+        stem_paths: Optional[Dict[str, str]] = None,
+        soundfont: Optional[str] = None,
+        segment_paths: Optional[Dict[str, str]] = None,
+        loudness: Optional[Dict[str, Optional[float]]] = None,
+        audio_rates: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> None:
         """Konstruktor für ein DatasetExample.
 
         Args:
             song_identifier: Bezeichner des Songs (z. B. "song_0001_pop_c_major").
             audio_path: Pfad zur zugehörigen Audiodatei.
-            label_path: Pfad zur zugehörigen Label-Datei.
+            label_path: Pfad zur zugehörigen Label-Datei (None, wenn keine geschrieben wird).
             midi_path: Pfad zur zugehörigen MIDI-Datei.
             mix_variant: Name der Mix-Variante (z. B. "drums_loud").
             song_specification: Ursprüngliche SongSpecification dieses Beispiels.
             notes_npy_path: Pfad zur notes-NumPy-Datei (YourMT3-kompatibel).
             note_events_npy_path: Pfad zur note_events-NumPy-Datei (YourMT3-kompatibel).
-            n_frames: Anzahl Samples (Frames) der WAV-Datei bei 16 kHz.
+            n_frames: Anzahl Samples (Frames) der WAV-Datei (audio_sample_rate, für YourMT3 16 kHz).
             program: Liste der verwendeten Programme (GM 0-127, Drums=128).
             is_drum: Liste der Drum-Flags (0/1) passend zu program.
+            stem_paths: Pfade der Stem-WAVs je Stem-Name ("drums",
+                "accompaniment"), None ohne Stem-Export.
+            soundfont: Soundfont, mit der der Song gerendert wurde (nur mit
+                soundfont_pool, sonst None = soundfont_path des Laufs).
+            segment_paths: Pfade der vorgeschnittenen Segmente ("segments",
+                "segment_events"), None ohne segment_slicing.
+            loudness: Gemessene Lautheit des gerenderten Mixes und die
+                angewendete Verstärkung ("integrated_lufs", "peak_dbfs",
+                "gain_db"), None ohne loudness_normalization.
+            audio_rates: Mix in weiteren Sampleraten, je Rate (als String)
+                "audio_path" und "n_frames"; None ohne extra_sample_rates.
         """
         self.song_identifier = song_identifier
         self.audio_path = audio_path
@@ -58,6 +74,48 @@ class DatasetExample:
         self.n_frames = n_frames
         self.program = program
         self.is_drum = is_drum
+        self.stem_paths = stem_paths
+        self.soundfont = soundfont
+        self.segment_paths = segment_paths
+        self.loudness = loudness
+        self.audio_rates = audio_rates
+
+    @classmethod
+    def from_index_entry(cls, entry: Dict) -> "DatasetExample":
+        """Rekonstruiert ein DatasetExample aus einem Eintrag von to_index_entry.
+
+        Die SongSpecification enthält nur die im Index gespeicherten Parameter
+        (keine BandConfiguration).
+        """
+        spec_dict = entry.get("song_specification") or {}
+        song_specification = SongSpecification(
+            song_identifier=spec_dict.get("song_identifier") or entry["song_identifier"],
+            tempo_bpm=spec_dict.get("tempo_bpm") or 0.0,
+            time_signature=spec_dict.get("time_signature") or (4, 4),
+            number_of_bars=spec_dict.get("number_of_bars") or 0,
+            key=spec_dict.get("key"),
+            style=spec_dict.get("style"),
+            band_configuration=None,  # type: ignore[arg-type]
+            random_seed=spec_dict.get("random_seed") or 0,
+        )
+        return cls(
+            song_identifier=entry["song_identifier"],
+            audio_path=entry["audio_path"],
+            label_path=entry["label_path"],
+            midi_path=entry["midi_path"],
+            mix_variant=entry.get("mix_variant", "default"),
+            song_specification=song_specification,
+            notes_npy_path=entry.get("notes_npy_path"),
+            note_events_npy_path=entry.get("note_events_npy_path"),
+            n_frames=entry.get("n_frames"),
+            program=entry.get("program"),
+            is_drum=entry.get("is_drum"),
+            stem_paths=entry.get("stem_paths"),
+            soundfont=entry.get("soundfont"),
+            segment_paths=entry.get("segment_paths"),
+            loudness=entry.get("loudness"),
+            audio_rates=entry.get("audio_rates"),
+        )
 
     def to_index_entry(self) -> Dict:
         """Erzeugt einen Dictionary-Eintrag für eine Index-Datei.
@@ -84,7 +142,7 @@ class DatasetExample:
             "random_seed": getattr(spec, "random_seed", None),
         }
 
-        return {
+        entry: Dict = {
             "song_identifier": self.song_identifier,
             "audio_path": self.audio_path,
             "label_path": self.label_path,
@@ -99,3 +157,15 @@ class DatasetExample:
 
             "song_specification": song_spec_dict,
         }
+        # Nur mit Stem-Export, damit bestehende Index-Dateien unverändert bleiben
+        if self.stem_paths is not None:
+            entry["stem_paths"] = dict(self.stem_paths)
+        if self.soundfont is not None:
+            entry["soundfont"] = self.soundfont
+        if self.segment_paths is not None:
+            entry["segment_paths"] = dict(self.segment_paths)
+        if self.loudness is not None:
+            entry["loudness"] = dict(self.loudness)
+        if self.audio_rates is not None:
+            entry["audio_rates"] = {rate: dict(values) for rate, values in self.audio_rates.items()}
+        return entry
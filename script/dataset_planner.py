@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import copy
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .audio_renderer import STEM_NAMES
+from .dataset_builder import DatasetBuilder
+from .dataset_presets import DatasetPreset
+from .worker_startup import WorkerStartupReport, measure_worker_startup
+
+# WAV-Header (RIFF/fmt/data) von soundfile bei PCM_16 ohne Zusatz-Chunks
+WAV_HEADER_BYTES = 44
+WAV_BYTES_PER_SAMPLE = 2  # sf.write schreibt float-Arrays als PCM_16
+# pretty_midi.fluidsynth hängt nach dem letzten Event 1 s Stille an
+RENDER_TAIL_SECONDS = 1.0
+
+
+@dataclass
+class PlannedSong:
+    """Alle deterministischen Entscheidungen für einen Song, ohne Rendering."""
+    global_song_index: int
+    preset_name: str
+    random_seed: int
+    number_of_bars: int
+    duration_seconds: float
+    instrument_names: List[str]
+    basename: str
+
+
+@dataclass
+class PlanCalibration:
+    """Gemessene Kosten eines kurzen Probe-Songs, normiert auf eine Audio-Sekunde."""
+    audio_seconds: float
+    wall_seconds: float
+    bytes_per_artifact: Dict[str, int]
+
+    @property
+    def wall_seconds_per_audio_second(self) -> float:
+        return self.wall_seconds / self.audio_seconds
+
+    def bytes_per_audio_second(self, artifact: str) -> float:
+        return self.bytes_per_artifact.get(artifact, 0) / self.audio_seconds
+
+
+@dataclass
+class DatasetPlanReport:
+    """Hochrechnung für einen kompletten Datensatzlauf."""
+    songs: List[PlannedSong]
+    total_audio_seconds: float
+    bytes_per_artifact: Dict[str, int] = field(default_factory=dict)
+    projected_wall_seconds: Optional[float] = None
+    calibration: Optional[PlanCalibration] = None
+    worker_startup: Optional[WorkerStartupReport] = None
+    planning_seconds: float = 0.0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.bytes_per_artifact.values())
+
+    def summary(self) -> str:
+        lines = [
+            f"Geplante Songs:  {len(self.songs)}",
+            f"Audio gesamt:    {self.total_audio_seconds / 3600.0:.1f} h",
+        ]
+        for artifact, n_bytes in self.bytes_per_artifact.items():
+            lines.append(f"  {artifact:<12} {_format_bytes(n_bytes)}")
+        lines.append(f"Speicher gesamt: {_format_bytes(self.total_bytes)}")
+
+        if self.projected_wall_seconds is not None and self.calibration is not None:
+            lines.append(
+                f"Laufzeit (seq.): {self.projected_wall_seconds / 3600.0:.1f} h "
+                f"({self.calibration.wall_seconds_per_audio_second:.3f} s pro Audio-Sekunde, "
+                f"kalibriert an {self.calibration.audio_seconds:.1f} s Audio)"
+            )
+        else:
+            lines.append("Laufzeit (seq.): unbekannt (keine Kalibrierung)")
+
+        if self.worker_startup is not None:
+            lines.append(self.worker_startup.summary())
+
+        lines.append(f"Planungsdauer:   {self.planning_seconds:.2f} s")
+        return "\n".join(lines)
+
+
+def _format_bytes(n_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n_bytes) < 1024.0:
+            return f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024.0
+    return f"{n_bytes:.1f} TB"
+
+
+class DatasetPlanner:
+    """Plant einen Datensatzlauf, ohne Audio zu synthetisieren (Dry-Run).
+
+    Verantwortung:
+        DatasetPlanner führt nur die deterministischen Schritte des
+        DatasetBuilder aus (Taktanzahl, Bandauswahl, Seeds, Dateinamen) und
+        rechnet daraus Audio-Stunden, Speicherbedarf pro Artefakt-Typ und die
+        voraussichtliche Laufzeit hoch.
+        Die Laufzeit stammt aus einem kurzen Kalibrier-Song, der einmal durch
+        die komplette Pipeline (inkl. Rendering) läuft.
+    """
+
+    def __init__(self, dataset_builder: DatasetBuilder) -> None:
+        """Konstruktor für den DatasetPlanner.
+
+        Args:
+            dataset_builder: Der DatasetBuilder, dessen Lauf geplant werden soll.
+        """
+        self.dataset_builder = dataset_builder
+
+    def plan_songs(
+            self,
+            presets: List[DatasetPreset],
+            dataset_config: dict[str, Any],
+            output_root: str,
+    ) -> List[PlannedSong]:
+        """Plant alle Songs so, wie build_dataset sie erzeugen würde.
+
+        Args:
+            presets: Die ausgewählten Presets.
+            dataset_config: Globale Datensatz-Parameter (Song-Längen etc.).
+            output_root: Ziel-Ordner; bereits vorhandene Songs verschieben
+                den Start-Index wie beim Fortsetzen eines Laufs.
+
+        Returns:
+            Liste aller geplanten Songs in Build-Reihenfolge.
+        """
+        builder = self.dataset_builder
+        existing_info = builder._load_existing_dataset_info(output_root)
+        global_song_index = builder._count_songs_in_info(existing_info) + 1
+
+        plan = builder.create_song_plan(presets, dataset_config, first_song_index=global_song_index)
+
+        planned: List[PlannedSong] = []
+        for row in range(len(plan)):
+            preset = presets[int(plan.preset_id[row])]
+            song_spec = builder.song_specification_from_plan(plan, row, preset)
+            planned.append(
+                PlannedSong(
+                    global_song_index=int(plan.global_song_index[row]),
+                    preset_name=preset.name,
+                    random_seed=song_spec.random_seed,
+                    number_of_bars=song_spec.number_of_bars,
+                    duration_seconds=song_spec.get_duration_seconds() + RENDER_TAIL_SECONDS,
+                    instrument_names=[
+                        inst.name for inst in song_spec.band_configuration.instruments
+                    ],
+                    basename=song_spec.song_identifier,
+                )
+            )
+
+        return planned
+
+    def calibrate(
+            self,
+            preset: DatasetPreset,
+            dataset_config: dict[str, Any],
+            number_of_bars: int = 16,
+    ) -> PlanCalibration:
+        """Rendert einen kurzen Probe-Song in ein temporäres Verzeichnis und misst die Kosten.
+
+        Gerendert wird mit einer Kopie des DatasetBuilder (wie ein frischer
+        Worker: eigene Generatoren und Zufallsquellen, leerer Synth-Cache).
+        Der eigentliche Builder und die globalen Zufallsgeneratoren bleiben
+        unverändert; ein anschließender Build liefert dieselben Songs.
+
+        Args:
+            preset: Preset für den Probe-Song.
+            dataset_config: Globale Datensatz-Parameter.
+            number_of_bars: Länge des Probe-Songs in Takten.
+
+        Returns:
+            PlanCalibration mit Laufzeit und Dateigrößen pro Artefakt-Typ.
+        """
+        builder = copy.deepcopy(self.dataset_builder)
+        song_spec = builder._prepare_song_specification(
+            preset=preset,
+            dataset_config=dataset_config,
+            global_song_index=0,
+        )
+        song_spec.number_of_bars = int(number_of_bars)
+
+        with tempfile.TemporaryDirectory(prefix="dataset_plan_") as tmp_root:
+            output_dirs = builder._prepare_output_dirs(tmp_root)
+
+            start = time.perf_counter()
+            examples = builder._build_song(
+                preset=preset,
+                song_spec=song_spec,
+                output_dirs=output_dirs,
+            )
+            wall_seconds = time.perf_counter() - start
+            example = examples[0]
+
+            bytes_per_artifact = {
+                # inklusive augmentierter Mix-Varianten, Stems und weiterer Sampleraten
+                "audio": sum(os.path.getsize(variant.audio_path) for variant in examples)
+                + sum(os.path.getsize(path) for path in (example.stem_paths or {}).values())
+                + sum(os.path.getsize(rate["audio_path"]) for rate in (example.audio_rates or {}).values()),
+                "midi": os.path.getsize(example.midi_path),
+                "labels": os.path.getsize(example.label_path) if example.label_path else 0,
+                "notes": os.path.getsize(example.notes_npy_path),
+                "note_events": os.path.getsize(example.note_events_npy_path),
+            }
+            if example.segment_paths:
+                # Segmente je Mix-Variante, Event-Fenster einmal je Song
+                bytes_per_artifact["segments"] = sum(
+                    os.path.getsize(variant.segment_paths["segments"]) for variant in examples
+                ) + os.path.getsize(example.segment_paths["segment_events"])
+
+        sample_rate = float(builder.audio_renderer.output_sample_rate)
+        return PlanCalibration(
+            audio_seconds=float(example.n_frames) / sample_rate,
+            wall_seconds=wall_seconds,
+            bytes_per_artifact=bytes_per_artifact,
+        )
+
+    def estimate(
+            self,
+            presets: List[DatasetPreset],
+            dataset_config: dict[str, Any],
+            output_root: str,
+            calibrate: bool = True,
+    ) -> DatasetPlanReport:
+        """Plant alle Songs und rechnet Speicher und Laufzeit hoch.
+
+        Beschreibung:
+            Die WAV-Größe wird exakt aus Samplerate und Songlänge berechnet,
+            alle anderen Artefakte und die Laufzeit werden anhand der
+            Kalibrierung pro Audio-Sekunde hochgerechnet. Schlägt die
+            Kalibrierung fehl (z. B. Soundfont fehlt), wird nur die WAV-Größe
+            angegeben. Zusätzlich wird die Startzeit eines frischen
+            Worker-Prozesses gemessen (Fixkosten pro Worker).
+
+        Args:
+            presets: Die ausgewählten Presets.
+            dataset_config: Globale Datensatz-Parameter.
+            output_root: Ziel-Ordner des Laufs.
+            calibrate: False, um Kalibrier-Song und Worker-Startmessung zu überspringen.
+
+        Returns:
+            Ein DatasetPlanReport.
+        """
+        start = time.perf_counter()
+        songs = self.plan_songs(presets, dataset_config, output_root)
+        total_audio_seconds = sum(song.duration_seconds for song in songs)
+
+        builder = self.dataset_builder
+        audio_renderer = builder.audio_renderer
+        # In output_sample_rate: Mix, augmentierte Varianten und die beiden Stems;
+        # in jeder weiteren Rate (extra_sample_rates) nur der Mix
+        files_at_output_rate = 1 + len(STEM_NAMES) * int(builder.export_stems)
+        if builder.audio_augmenter is not None:
+            files_at_output_rate += builder.audio_augmenter.number_of_variants
+        samples_per_second = (
+            files_at_output_rate * int(audio_renderer.output_sample_rate)
+            + sum(audio_renderer.extra_sample_rates)
+        )
+        files_per_song = files_at_output_rate + len(audio_renderer.extra_sample_rates)
+        bytes_per_artifact: Dict[str, int] = {
+            "audio": int(
+                total_audio_seconds * samples_per_second * WAV_BYTES_PER_SAMPLE
+                + len(songs) * files_per_song * WAV_HEADER_BYTES
+            ),
+        }
+
+        calibration: Optional[PlanCalibration] = None
+        if calibrate and presets:
+            try:
+                calibration = self.calibrate(presets[0], dataset_config)
+            except (FileNotFoundError, ImportError, OSError, ValueError) as exc:
+                print(f"[DatasetPlanner] WARNUNG: Kalibrierung fehlgeschlagen ({exc}).")
+
+        worker_startup: Optional[WorkerStartupReport] = None
+        if calibrate:
+            try:
+                worker_startup = measure_worker_startup()
+            except (ImportError, OSError, RuntimeError) as exc:
+                print(f"[DatasetPlanner] WARNUNG: Worker-Startmessung fehlgeschlagen ({exc}).")
+
+        projected_wall_seconds: Optional[float] = None
+        if calibration is not None:
+            for artifact in ("midi", "labels", "notes", "note_events", "segments"):
+                if artifact not in calibration.bytes_per_artifact:
+                    continue
+                bytes_per_artifact[artifact] = int(
+                    calibration.bytes_per_audio_second(artifact) * total_audio_seconds
+                )
+            projected_wall_seconds = (
+                calibration.wall_seconds_per_audio_second * total_audio_seconds
+            )
+
+        return DatasetPlanReport(
+            songs=songs,
+            total_audio_seconds=total_audio_seconds,
+            bytes_per_artifact=bytes_per_artifact,
+            projected_wall_seconds=projected_wall_seconds,
+            calibration=calibration,
+            worker_startup=worker_startup,
+            planning_seconds=time.perf_counter() - start,
+        )
@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from .dataset_verifier import ARTIFACT_LAYOUT, AUDIO_ARTIFACTS
+
+# Standardgröße des LRU-Caches für offene Datei-Handles
+HANDLE_CACHE_SIZE = 32
+
+# WAV-Formatcodes (fmt-Chunk)
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (Formatcode, Bits pro Sample) -> NumPy-dtype, das direkt gememmappt werden kann
+_MEMMAP_DTYPES: Dict[tuple, str] = {
+    (_WAVE_FORMAT_PCM, 8): "u1",
+    (_WAVE_FORMAT_PCM, 16): "<i2",
+    (_WAVE_FORMAT_PCM, 32): "<i4",
+    (_WAVE_FORMAT_IEEE_FLOAT, 32): "<f4",
+    (_WAVE_FORMAT_IEEE_FLOAT, 64): "<f8",
+}
+
+
+@dataclass(frozen=True)
+class AudioInfo:
+    """Aus dem WAV-Header gelesene Eckdaten (ohne die Samples zu laden)."""
+    sample_rate: int
+    channels: int
+    n_frames: int
+    bits_per_sample: int
+    format_code: int
+    data_offset: int
+
+    @property
+    def duration_sec(self) -> float:
+        return self.n_frames / float(self.sample_rate)
+
+    @property
+    def memmap_dtype(self) -> Optional[str]:
+        """dtype für np.memmap oder None, wenn das Format nicht direkt abbildbar ist (z. B. 24 Bit)."""
+        return _MEMMAP_DTYPES.get((self.format_code, self.bits_per_sample))
+
+
+def _is_sample_rate_kind(kind: str) -> bool:
+    """True für "audio_<rate>" (Mix in einer weiteren Samplerate, extra_sample_rates)."""
+    return kind.startswith("audio_") and kind[len("audio_"):].isdigit()
+
+
+def _missing_artifact_error(entry: Dict[str, Any], kind: str, option: str) -> FileNotFoundError:
+    """Fehler für ein Artefakt, das der Eintrag nicht hat (option = zuständiger Konfigurationsschlüssel)."""
+    mix_variant = entry.get("mix_variant", "default")
+    if mix_variant != "default":
+        # Augmentierte Varianten gibt es nur als Mix in output_sample_rate
+        return FileNotFoundError(
+            f"Mix-Variante {mix_variant!r} von Song {entry['song_identifier']!r} hat kein {kind}: "
+            "augmentierte Varianten werden nur als Mix in output_sample_rate geschrieben."
+        )
+    return FileNotFoundError(f"Song {entry['song_identifier']!r} hat kein {kind} ({option}).")
+
+
+def read_wav_info(path: str) -> AudioInfo:
+    """Liest fmt- und data-Chunk eines RIFF/WAVE-Headers.
+
+    Raises:
+        ValueError: Wenn die Datei kein RIFF/WAVE ist oder fmt/data fehlen.
+    """
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"Keine RIFF/WAVE-Datei: {path}")
+
+        fmt: Optional[tuple] = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"WAV ohne data-Chunk: {path}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+                chunk = f.read(chunk_size)
+                format_code, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", chunk[:16])
+                if format_code == _WAVE_FORMAT_EXTENSIBLE and len(chunk) >= 26:
+                    # Die ersten zwei Bytes der SubFormat-GUID tragen den eigentlichen Formatcode
+                    format_code = struct.unpack("<H", chunk[24:26])[0]
+                fmt = (format_code, channels, sample_rate, block_align, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"WAV ohne fmt-Chunk vor den Daten: {path}")
+                format_code, channels, sample_rate, block_align, bits = fmt
+                return AudioInfo(
+                    sample_rate=int(sample_rate),
+                    channels=int(channels),
+                    n_frames=int(chunk_size // block_align),
+                    bits_per_sample=int(bits),
+                    format_code=int(format_code),
+                    data_offset=f.tell(),
+                )
+            else:
+                f.seek(chunk_size, os.SEEK_CUR)
+
+            # Chunks sind auf gerade Längen aufgefüllt
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+
+
+class _HandleCache:
+    """LRU-Cache für offene Datei-Handles (Memmaps, SoundFiles, geladene Payloads).
+
+    Verdrängte Einträge werden geschlossen, sofern sie eine close-Methode haben.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max(1, int(max_size))
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, open_handle: Callable[[], Any]) -> Any:
+        handle = self._entries.get(key)
+        if handle is not None:
+            self._entries.move_to_end(key)
+            return handle
+
+        handle = open_handle()
+        self._entries[key] = handle
+        while len(self._entries) > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._close(evicted)
+        return handle
+
+    def clear(self) -> None:
+        while self._entries:
+            _, handle = self._entries.popitem(last=False)
+            self._close(handle)
+
+    @staticmethod
+    def _close(handle: Any) -> None:
+        close = getattr(handle, "close", None)
+        if callable(close):
+            close()
+
+
+class SongRecord:
+    """Ein Song des Datensatzes mit verzögertem Zugriff auf seine Artefakte.
+
+    Verantwortung:
+        SongRecord liefert die Metadaten direkt aus dem Index-Eintrag
+        (Frames, Programme, Drum-Flags, SongSpecification). Audio, notes und
+        note_events werden erst beim Zugriff über den DatasetReader geöffnet
+        und dort im LRU-Cache gehalten.
+    """
+
+    def __init__(self, reader: "DatasetReader", entry: Dict[str, Any]) -> None:
+        self._reader = reader
+        self.entry: Dict[str, Any] = entry
+
+    def __repr__(self) -> str:
+        return f"SongRecord({self.song_identifier!r}, n_frames={self.n_frames})"
+
+    @property
+    def song_identifier(self) -> str:
+        return self.entry["song_identifier"]
+
+    @property
+    def mix_variant(self) -> str:
+        return self.entry.get("mix_variant", "default")
+
+    @property
+    def n_frames(self) -> Optional[int]:
+        return self.entry.get("n_frames")
+
+    @property
+    def program(self) -> List[int]:
+        return list(self.entry.get("program") or [])
+
+    @property
+    def is_drum(self) -> List[int]:
+        return list(self.entry.get("is_drum") or [])
+
+    @property
+    def soundfont(self) -> Optional[str]:
+        """Soundfont des Songs (nur mit soundfont_pool im Index, sonst None)."""
+        return self.entry.get("soundfont")
+
+    @property
+    def loudness(self) -> Optional[Dict[str, Any]]:
+        """Lautheit und angewendete Verstärkung (nur mit loudness_normalization im Index)."""
+        return self.entry.get("loudness")
+
+    @property
+    def sample_rates(self) -> List[int]:
+        """Weitere Sampleraten des Mixes (read_audio(kind=f"audio_{rate}")), ohne extra_sample_rates leer."""
+        return sorted(int(sample_rate) for sample_rate in self.entry.get("audio_rates") or {})
+
+    @property
+    def song_specification(self) -> Dict[str, Any]:
+        return dict(self.entry.get("song_specification") or {})
+
+    def path(self, kind: str) -> str:
+        return self._reader.artifact_path(self.entry, kind)
+
+    @property
+    def audio_info(self) -> AudioInfo:
+        return self._reader.audio_info(self.entry)
+
+    def audio_view(self) -> np.ndarray:
+        return self._reader.audio_view(self.entry)
+
+    def read_audio(self, start: int = 0, stop: Optional[int] = None, kind: str = "audio") -> np.ndarray:
+        return self._reader.read_audio(self.entry, start, stop, kind)
+
+    @property
+    def notes(self) -> List[Any]:
+        return self._reader.load_payload(self.entry, "notes")["notes"]
+
+    def read_segments(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        return self._reader.read_segments(self.entry, start, stop)
+
+    @property
+    def segment_events(self) -> Dict[str, Any]:
+        return self._reader.load_payload(self.entry, "segment_events")
+
+    @property
+    def labels(self) -> Any:
+        return self._reader.load_labels(self.entry)
+
+    @property
+    def note_events(self) -> List[Any]:
+        # Bundle-Form: [[events]] -> flache Liste
+        return self._reader.load_payload(self.entry, "note_events")["note_events"][0]
+
+
+class DatasetReader:
+    """Lesender Zugriff auf einen erzeugten Datensatz.
+
+    Verantwortung:
+        DatasetReader öffnet einen Datensatz über seine dataset_index.json
+        und stellt jeden Song als SongRecord bereit (per Position oder
+        song_identifier). Metadaten stammen nur aus dem Index bzw. dem
+        WAV-Header, ohne eine Datei vollständig zu lesen.
+        Audio wird, wenn das Sampleformat es erlaubt, als np.memmap auf die
+        PCM-Daten abgebildet (Frame-Bereiche lesen nur die betroffenen
+        Seiten); andere Formate werden über soundfile mit start/stop gelesen.
+        Offene Memmaps, SoundFiles und geladene notes/note_events liegen in
+        einem LRU-Cache, damit wiederholte Zugriffe keine Dateien neu öffnen.
+
+        Die Pfade im Index sind absolut; fehlen sie (z. B. weil der
+        Datensatz verschoben wurde), wird der Dateiname im Standard-Layout
+        unter output_root gesucht.
+    """
+
+    def __init__(self, output_root_directory: str, max_open_handles: int = HANDLE_CACHE_SIZE) -> None:
+        """Konstruktor für den DatasetReader.
+
+        Args:
+            output_root_directory: Wurzelverzeichnis des Datensatzes (mit dataset_index.json).
+            max_open_handles: Größe des LRU-Caches für offene Dateien.
+
+        Raises:
+            FileNotFoundError: Wenn dataset_index.json fehlt.
+        """
+        self.output_root_directory = os.path.abspath(output_root_directory)
+        index_path = os.path.join(self.output_root_directory, "dataset_index.json")
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"Keine dataset_index.json in {self.output_root_directory!r} gefunden.")
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.entries: List[Dict[str, Any]] = json.load(f)
+        # Mix-Varianten teilen sich den song_identifier; der Name verweist auf den ersten Eintrag (Standard-Mix)
+        self._position_by_identifier: Dict[str, int] = {}
+        for position, entry in enumerate(self.entries):
+            self._position_by_identifier.setdefault(entry["song_identifier"], position)
+        self._handles = _HandleCache(max_open_handles)
+        self._audio_infos: Dict[str, AudioInfo] = {}
+
+    # ------------------------------------------------------------------
+    # Container-Protokoll
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[SongRecord]:
+        for entry in self.entries:
+            yield SongRecord(self, entry)
+
+    def __getitem__(self, song: Union[int, str]) -> SongRecord:
+        return SongRecord(self, self._entry(song))
+
+    def __contains__(self, song_identifier: object) -> bool:
+        return song_identifier in self._position_by_identifier
+
+    def __enter__(self) -> "DatasetReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def song_identifiers(self) -> List[str]:
+        return [entry["song_identifier"] for entry in self.entries]
+
+    def close(self) -> None:
+        """Schließt alle offenen Handles."""
+        self._handles.clear()
+
+    # ------------------------------------------------------------------
+    # Hilfsfunktionen (intern)
+    # ------------------------------------------------------------------
+
+    def _entry(self, song: Union[int, str, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(song, dict):
+            return song
+        if isinstance(song, str):
+            if song not in self._position_by_identifier:
+                raise KeyError(f"Unbekannter Song: {song!r}")
+            return self.entries[self._position_by_identifier[song]]
+        return self.entries[song]
+
+    def artifact_path(self, song: Union[int, str, Dict[str, Any]], kind: str) -> str:
+        """Pfad eines Artefakts (Schlüssel von ARTIFACT_LAYOUT, Stems als "drum_stem"/"accompaniment_stem").
+
+        Der Mix in weiteren Sampleraten (extra_sample_rates) hat den Typ
+        "audio_<rate>", z. B. "audio_44100". Augmentierte Mix-Varianten haben
+        weder Stems noch weitere Sampleraten.
+
+        Raises:
+            FileNotFoundError: Wenn der Eintrag das Artefakt nicht hat.
+        """
+        entry = self._entry(song)
+        if _is_sample_rate_kind(kind):
+            rate_entry = (entry.get("audio_rates") or {}).get(kind[len("audio_"):])
+            if not rate_entry:
+                raise _missing_artifact_error(entry, kind, "extra_sample_rates")
+            path = rate_entry["audio_path"]
+            if os.path.exists(path):
+                return path
+            return os.path.join(self.output_root_directory, kind, os.path.basename(path))
+        if kind in ("drum_stem", "accompaniment_stem"):
+            stem_paths = entry.get("stem_paths") or {}
+            path = stem_paths.get("drums" if kind == "drum_stem" else "accompaniment")
+            if not path:
+                raise _missing_artifact_error(entry, kind, "export_stems")
+            if os.path.exists(path):
+                return path
+            return os.path.join(self.output_root_directory, ARTIFACT_LAYOUT[kind][0], os.path.basename(path))
+        if kind in ("segments", "segment_events"):
+            path = (entry.get("segment_paths") or {}).get(kind)
+            if not path:
+                raise FileNotFoundError(f"Song {entry['song_identifier']!r} hat keine Segmente (segment_slicing).")
+            if os.path.exists(path):
+                return path
+            return os.path.join(self.output_root_directory, ARTIFACT_LAYOUT[kind][0], os.path.basename(path))
+
+        index_key = {
+            "audio": "audio_path",
+            "midi": "midi_path",
+            "labels": "label_path",
+            "notes": "notes_npy_path",
+            "note_events": "note_events_npy_path",
+        }[kind]
+
+        path = entry.get(index_key)
+        if path and os.path.exists(path):
+            return path
+        if kind == "labels" and index_key in entry and not path:
+            raise FileNotFoundError(f"Song {entry['song_identifier']!r} hat keine Label-Datei (label_format='none').")
+
+        subdir, suffix = ARTIFACT_LAYOUT[kind]
+        filename = os.path.basename(path) if path else f"{entry['song_identifier']}{suffix}"
+        return os.path.join(self.output_root_directory, subdir, filename)
+
+    # ------------------------------------------------------------------
+    # Audio
+    # ------------------------------------------------------------------
+
+    def audio_info(self, song: Union[int, str, Dict[str, Any]], kind: str = "audio") -> AudioInfo:
+        """Header-Daten der WAV-Datei (einmal gelesen, danach aus dem Speicher).
+
+        kind wählt Mix ("audio"), Stem ("drum_stem", "accompaniment_stem")
+        oder den Mix in einer weiteren Samplerate ("audio_<rate>").
+        """
+        if kind not in AUDIO_ARTIFACTS and not _is_sample_rate_kind(kind):
+            raise ValueError(f"kind muss eines von {AUDIO_ARTIFACTS} oder 'audio_<rate>' sein (ist {kind!r}).")
+        path = self.artifact_path(song, kind)
+        info = self._audio_infos.get(path)
+        if info is None:
+            info = read_wav_info(path)
+            self._audio_infos[path] = info
+        return info
+
+    def _audio_handle(self, path: str, info: AudioInfo) -> Any:
+        if info.memmap_dtype is not None:
+            return self._handles.get(
+                ("memmap", path),
+                lambda: np.memmap(
+                    path,
+                    dtype=np.dtype(info.memmap_dtype),
+                    mode="r",
+                    offset=info.data_offset,
+                    shape=(info.n_frames, info.channels),
+                ),
+            )
+
+        import soundfile as sf
+
+        return self._handles.get(("soundfile", path), lambda: sf.SoundFile(path, "r"))
+
+    def audio_view(self, song: Union[int, str, Dict[str, Any]], kind: str = "audio") -> np.ndarray:
+        """Unkonvertierte Samples als schreibgeschützte Memmap, Form (Frames, Kanäle).
+
+        Raises:
+            ValueError: Wenn das Sampleformat nicht direkt abbildbar ist.
+        """
+        info = self.audio_info(song, kind)
+        path = self.artifact_path(song, kind)
+        if info.memmap_dtype is None:
+            raise ValueError(
+                f"Sampleformat ({info.bits_per_sample} Bit, Format {info.format_code}) "
+                f"lässt sich nicht memmappen: {path}"
+            )
+        return self._audio_handle(path, info)
+
+    def read_audio(
+            self,
+            song: Union[int, str, Dict[str, Any]],
+            start: int = 0,
+            stop: Optional[int] = None,
+            kind: str = "audio",
+    ) -> np.ndarray:
+        """Liest die Frames [start, stop) als float32 im Bereich [-1, 1].
+
+        Args:
+            song: Position, song_identifier oder Index-Eintrag.
+            start: Erster Frame.
+            stop: Frame nach dem letzten (None = bis zum Ende).
+            kind: "audio" (Mix), "drum_stem", "accompaniment_stem" oder
+                "audio_<rate>" (Mix in einer weiteren Samplerate).
+
+        Returns:
+            Array der Form (Frames,) bei Mono, sonst (Frames, Kanäle).
+        """
+        info = self.audio_info(song, kind)
+        path = self.artifact_path(song, kind)
+        start, stop, _ = slice(start, stop).indices(info.n_frames)
+        stop = max(start, stop)
+        handle = self._audio_handle(path, info)
+
+        if isinstance(handle, np.memmap):
+            samples = np.asarray(handle[start:stop])
+            if samples.dtype == np.uint8:
+                audio = (samples.astype(np.float32) - 128.0) / 128.0
+            elif samples.dtype.kind == "i":
+                audio = samples.astype(np.float32) / float(2 ** (8 * samples.dtype.itemsize - 1))
+            else:
+                audio = samples.astype(np.float32)
+        else:
+            handle.seek(start)
+            audio = handle.read(stop - start, dtype="float32", always_2d=True)
+
+        return audio[:, 0] if info.channels == 1 else audio
+
+    # ------------------------------------------------------------------
+    # notes / note_events
+    # ------------------------------------------------------------------
+
+    def load_payload(self, song: Union[int, str, Dict[str, Any]], kind: str) -> Dict[str, Any]:
+        """Lädt die notes-, note_events- bzw. segment_events-Payload eines Songs (im LRU-Cache gehalten).
+
+        Die Payload ist ein gepickeltes dict und kann daher nicht gememmappt
+        werden; sie wird beim ersten Zugriff einmal vollständig geladen.
+        """
+        if kind not in ("notes", "note_events", "segment_events"):
+            raise ValueError(f"kind muss 'notes', 'note_events' oder 'segment_events' sein (ist {kind!r}).")
+        path = self.artifact_path(song, kind)
+        return self._handles.get(
+            ("payload", path),
+            lambda: np.load(path, allow_pickle=True, fix_imports=False).item(),
+        )
+
+    def read_segments(
+            self,
+            song: Union[int, str, Dict[str, Any]],
+            start: int = 0,
+            stop: Optional[int] = None,
+    ) -> np.ndarray:
+        """Liest die Segmente start..stop (ein sequenzieller Read aus der Memmap).
+
+        Returns:
+            float32-Array (Segmente, segment_length); note_events und
+            tie_note_events derselben Segmente stehen in
+            load_payload(song, "segment_events").
+        """
+        path = self.artifact_path(song, "segments")
+        segments = self._handles.get(
+            ("segments", path),
+            lambda: np.load(path, mmap_mode="r", allow_pickle=False),
+        )
+        return np.array(segments[start:stop])
+
+    def load_labels(self, song: Union[int, str, Dict[str, Any]]) -> Any:
+        """Lädt die Label-Datei eines Songs (im LRU-Cache gehalten).
+
+        Returns:
+            Bei label_format="binary" ein dict der .npz-Spalten, sonst das
+            geparste JSON (Liste bzw. NoteSequence-dict).
+        """
+        path = self.artifact_path(song, "labels")
+
+        def load() -> Any:
+            if path.endswith(".npz"):
+                with np.load(path, allow_pickle=False) as data:
+                    return {name: data[name] for name in data.files}
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        return self._handles.get(("labels", path), load)
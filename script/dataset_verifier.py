@@ -0,0 +1,436 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Artefakt-Typ -> (Unterordner, Dateiendung relativ zum Song-Basename)
+ARTIFACT_LAYOUT: Dict[str, Tuple[str, str]] = {
+    "audio": ("audio", ".wav"),
+    "midi": ("midi", ".mid"),
+    "labels": ("labels", "_labels.json"),
+    "labels_binary": ("labels", "_labels.npz"),  # label_format="binary"
+    "notes": ("notes", "_notes.npy"),
+    "note_events": ("note_events", "_note_events.npy"),
+    "drum_stem": ("stems", "_drums.wav"),  # export_stems
+    "accompaniment_stem": ("stems", "_accompaniment.wav"),
+    "segments": ("segments", "_segments.npy"),  # segment_slicing
+    "segment_events": ("segments", "_segment_events.npy"),
+}
+
+# WAV-Artefakte (Samplerate und Länge wie laut Index)
+AUDIO_ARTIFACTS: Tuple[str, ...] = ("audio", "drum_stem", "accompaniment_stem")
+
+# Artefakte, deren Länge laut Index (n_frames) geprüft wird
+FRAME_ARTIFACTS: Tuple[str, ...] = AUDIO_ARTIFACTS + ("segments",)
+
+# Labels sind Debug/Legacy und dürfen fehlen, Stems und Segmente sind optional, alles andere ist Pflicht
+REQUIRED_ARTIFACTS: Tuple[str, ...] = ("audio", "midi", "notes", "note_events")
+
+CACHE_FILENAME = ".verify_cache.json"
+MANIFEST_FILENAME = "checksums.sha256"
+
+
+@dataclass
+class VerificationReport:
+    """Ergebnis eines Verifikationslaufs über einen Datensatz-Ordner."""
+    number_of_songs: int = 0
+    number_of_checked_files: int = 0
+    number_of_cached_files: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)  # relpath -> Fehlermeldung
+    missing: List[str] = field(default_factory=list)      # relpaths erwarteter, fehlender Dateien
+    orphans: List[str] = field(default_factory=list)      # relpaths ohne Song in dataset_info.json
+    elapsed_seconds: float = 0.0
+
+    @property
+    def is_ok(self) -> bool:
+        return not self.errors and not self.missing
+
+    def summary(self) -> str:
+        lines = [
+            f"Songs:           {self.number_of_songs}",
+            f"Dateien geprüft: {self.number_of_checked_files} "
+            f"(davon {self.number_of_cached_files} aus dem Cache)",
+            f"Fehlerhaft:      {len(self.errors)}",
+            f"Fehlend:         {len(self.missing)}",
+            f"Verwaist:        {len(self.orphans)}",
+            f"Dauer:           {self.elapsed_seconds:.1f} s",
+        ]
+        for relpath, message in sorted(self.errors.items()):
+            lines.append(f"  FEHLER   {relpath}: {message}")
+        for relpath in self.missing:
+            lines.append(f"  FEHLT    {relpath}")
+        for relpath in self.orphans:
+            lines.append(f"  VERWAIST {relpath}")
+        return "\n".join(lines)
+
+
+def _sha256_of_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _check_artifact_content(
+        kind: str,
+        path: str,
+        expected_n_frames: Optional[int],
+        expected_sample_rate: Optional[int],
+) -> None:
+    """Lädt ein Artefakt und wirft eine Exception, wenn es unbrauchbar ist."""
+    if kind in AUDIO_ARTIFACTS:
+        import soundfile as sf
+
+        info = sf.info(path)
+        if expected_sample_rate is not None and int(info.samplerate) != int(expected_sample_rate):
+            raise ValueError(f"Samplerate {info.samplerate} statt {expected_sample_rate}")
+        if int(info.channels) != 1:
+            raise ValueError(f"{info.channels} Kanäle statt mono")
+        if int(info.frames) <= 0:
+            raise ValueError("WAV hat keine Frames")
+        if expected_n_frames is not None and int(info.frames) != int(expected_n_frames):
+            raise ValueError(f"n_frames {info.frames} statt {expected_n_frames} laut Index")
+
+    elif kind == "midi":
+        import pretty_midi
+
+        pretty_midi.PrettyMIDI(path)
+
+    elif kind in ("notes", "note_events"):
+        payload = np.load(path, allow_pickle=True).item()
+        if not isinstance(payload, dict) or kind not in payload:
+            raise ValueError(f"Payload enthält keinen Schlüssel {kind!r}")
+
+    elif kind == "segments":
+        segments = np.load(path, mmap_mode="r", allow_pickle=False)
+        if segments.ndim != 2 or segments.dtype != np.float32:
+            raise ValueError(f"Segmente mit Form {segments.shape} und Typ {segments.dtype} statt (n, Länge) float32")
+        n_segments, segment_length = segments.shape
+        if expected_n_frames is not None and not (
+                (n_segments - 1) * segment_length < int(expected_n_frames) <= n_segments * segment_length
+        ):
+            raise ValueError(f"{n_segments} Segmente à {segment_length} passen nicht zu n_frames {expected_n_frames}")
+
+    elif kind == "segment_events":
+        payload = np.load(path, allow_pickle=True).item()
+        lengths = {len(payload[key]) for key in ("note_events", "tie_note_events", "start_times")}
+        if len(lengths) != 1:
+            raise ValueError("note_events, tie_note_events und start_times haben verschiedene Längen")
+
+    elif kind == "labels":
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+
+    elif kind == "labels_binary":
+        with np.load(path, allow_pickle=False) as data:
+            if "onset" not in data.files:
+                raise ValueError("Label-Datei enthält keine Spalte 'onset'")
+
+    else:
+        raise ValueError(f"Unbekannter Artefakt-Typ: {kind!r}")
+
+
+def _verify_artifact(job: Tuple[str, str, Optional[int], Optional[int]]) -> Dict[str, Any]:
+    """Worker-Funktion für den Prozess-Pool: prüft eine Datei und berechnet die Checksumme."""
+    kind, path, expected_n_frames, expected_sample_rate = job
+    try:
+        _check_artifact_content(kind, path, expected_n_frames, expected_sample_rate)
+        error = None
+    except Exception as exc:  # jede Lade-Exception ist ein Befund, kein Abbruch
+        error = f"{type(exc).__name__}: {exc}"
+
+    return {"error": error, "sha256": _sha256_of_file(path)}
+
+
+class DatasetVerifier:
+    """Prüft alle Artefakte eines erzeugten Datensatzes.
+
+    Verantwortung:
+        DatasetVerifier lädt für jeden Song aus dataset_info.json die WAV-,
+        MIDI-, notes- und note_events-Dateien und prüft, ob sie lesbar sind und
+        (bei Audio) die im Index angegebene Anzahl Frames haben.
+        Die Prüfung läuft in einem Prozess-Pool; Ergebnisse werden pro
+        (Pfad, Größe, mtime) gecacht, sodass erneute Läufe nur geänderte
+        Dateien anfassen. Nebenbei wird ein Checksummen-Manifest geschrieben.
+    """
+
+    def __init__(
+            self,
+            output_root_directory: str,
+            number_of_workers: Optional[int] = None,
+            use_cache: bool = True,
+    ) -> None:
+        """Konstruktor für den DatasetVerifier.
+
+        Args:
+            output_root_directory: Wurzelverzeichnis des Datensatzes
+                (enthält dataset_info.json und dataset_index.json).
+            number_of_workers: Anzahl Prozesse (None = os.cpu_count()).
+            use_cache: False, um alle Dateien unabhängig vom Cache neu zu prüfen.
+        """
+        self.output_root_directory = os.path.abspath(output_root_directory)
+        self.number_of_workers = number_of_workers
+        self.use_cache = use_cache
+
+    # ------------------------------------------------------------------
+    # Hilfsfunktionen (intern)
+    # ------------------------------------------------------------------
+
+    def _load_json(self, filename: str) -> Any:
+        path = os.path.join(self.output_root_directory, filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_dataset_info(self) -> Dict[str, Any]:
+        dataset_info = self._load_json("dataset_info.json")
+        if dataset_info is None:
+            raise FileNotFoundError(
+                f"Keine dataset_info.json in {self.output_root_directory!r} gefunden."
+            )
+        return dataset_info
+
+    @staticmethod
+    def _song_basenames(dataset_info: Dict[str, Any]) -> List[str]:
+        basenames: List[str] = []
+        for preset_dict in dataset_info.get("presets", {}).values():
+            basenames.extend(preset_dict.get("songs", []))
+        return basenames
+
+    @staticmethod
+    def _expected_sample_rate(dataset_info: Dict[str, Any]) -> Optional[int]:
+        sample_rate = dataset_info.get("dataset_config", {}).get("audio_sample_rate")
+        return int(sample_rate) if sample_rate is not None else None
+
+    def _load_index_entries(self) -> List[Dict[str, Any]]:
+        index_entries = self._load_json("dataset_index.json")
+        return index_entries if isinstance(index_entries, list) else []
+
+    def _load_n_frames_by_song(self, index_entries: List[Dict[str, Any]]) -> Dict[str, int]:
+        n_frames_by_song: Dict[str, int] = {}
+        for entry in index_entries:
+            song_identifier = entry.get("song_identifier")
+            n_frames = entry.get("n_frames")
+            if song_identifier and isinstance(n_frames, int):
+                n_frames_by_song[song_identifier] = n_frames
+        return n_frames_by_song
+
+    @staticmethod
+    def _expected_artifacts(
+            basenames: List[str],
+            index_entries: List[Dict[str, Any]],
+    ) -> List[Tuple[str, str, str]]:
+        """(Artefakt-Typ, Song-Basename, relpath) aller erwarteten Dateien.
+
+        Neben dem Standard-Layout je Song gehören dazu die WAV-Dateien der
+        augmentierten Mix-Varianten laut Index (gleiche Länge wie der Song)
+        und deren Segment-Dateien.
+        """
+        expected: List[Tuple[str, str, str]] = []
+        for basename in basenames:
+            for kind, (subdir, suffix) in ARTIFACT_LAYOUT.items():
+                expected.append((kind, basename, f"{subdir}/{basename}{suffix}"))
+
+        audio_subdir = ARTIFACT_LAYOUT["audio"][0]
+        for entry in index_entries:
+            if entry.get("mix_variant", "default") != "default" and entry.get("audio_path"):
+                relpath = f"{audio_subdir}/{os.path.basename(entry['audio_path'])}"
+                expected.append(("audio", entry["song_identifier"], relpath))
+                segments_path = (entry.get("segment_paths") or {}).get("segments")
+                if segments_path:
+                    relpath = f"{ARTIFACT_LAYOUT['segments'][0]}/{os.path.basename(segments_path)}"
+                    expected.append(("segments", entry["song_identifier"], relpath))
+        return expected
+
+    @staticmethod
+    def _sample_rate_artifacts(index_entries: List[Dict[str, Any]]) -> List[Tuple[str, int, int]]:
+        """(relpath, n_frames, Samplerate) des Mixes in weiteren Raten (extra_sample_rates) laut Index."""
+        artifacts: List[Tuple[str, int, int]] = []
+        for entry in index_entries:
+            for sample_rate, rate_entry in (entry.get("audio_rates") or {}).items():
+                relpath = f"audio_{sample_rate}/{os.path.basename(rate_entry['audio_path'])}"
+                artifacts.append((relpath, int(rate_entry["n_frames"]), int(sample_rate)))
+        return artifacts
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.use_cache:
+            return {}
+        try:
+            cache = self._load_json(CACHE_FILENAME)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _write_cache(self, cache: Dict[str, Dict[str, Any]]) -> None:
+        path = os.path.join(self.output_root_directory, CACHE_FILENAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, path)
+
+    def _write_manifest(self, checksums: Dict[str, str]) -> str:
+        """Schreibt das Manifest im `sha256sum`-Format (prüfbar mit `sha256sum -c`)."""
+        path = os.path.join(self.output_root_directory, MANIFEST_FILENAME)
+        with open(path, "w", encoding="utf-8") as f:
+            for relpath in sorted(checksums):
+                f.write(f"{checksums[relpath]}  {relpath}\n")
+        return path
+
+    @staticmethod
+    def _cache_key(
+            relpath: str,
+            stat: os.stat_result,
+            expected_n_frames: Optional[int],
+            expected_sample_rate: Optional[int],
+    ) -> str:
+        # Erwartungswerte gehören mit in den Schlüssel: ändert sich der Index,
+        # muss die Datei neu geprüft werden, obwohl sie selbst gleich blieb.
+        return (
+            f"{relpath}|{stat.st_size}|{stat.st_mtime_ns}"
+            f"|{expected_n_frames}|{expected_sample_rate}"
+        )
+
+    def _find_orphans(self, expected_relpaths: set[str], extra_subdirs: Iterable[str] = ()) -> List[str]:
+        orphans: List[str] = []
+        for subdir in sorted({subdir for subdir, _ in ARTIFACT_LAYOUT.values()} | set(extra_subdirs)):
+            directory = os.path.join(self.output_root_directory, subdir)
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                relpath = f"{subdir}/{filename}"
+                if relpath not in expected_relpaths:
+                    orphans.append(relpath)
+        return orphans
+
+    # ------------------------------------------------------------------
+    # Öffentliche API
+    # ------------------------------------------------------------------
+
+    def verify(self) -> VerificationReport:
+        """Prüft alle Artefakte und schreibt Cache + Checksummen-Manifest.
+
+        Beschreibung:
+            Ermittelt aus dataset_info.json die erwarteten Dateien jedes Songs,
+            meldet fehlende und verwaiste Dateien und prüft alle vorhandenen,
+            nicht gecachten Dateien parallel im Prozess-Pool.
+
+        Returns:
+            Ein VerificationReport mit allen Befunden.
+        """
+        start = time.perf_counter()
+        report = VerificationReport()
+
+        dataset_info = self._load_dataset_info()
+        basenames = self._song_basenames(dataset_info)
+        index_entries = self._load_index_entries()
+        n_frames_by_song = self._load_n_frames_by_song(index_entries)
+        expected_sample_rate = self._expected_sample_rate(dataset_info)
+        report.number_of_songs = len(basenames)
+
+        cache = self._load_cache()
+        new_cache: Dict[str, Dict[str, Any]] = {}
+        checksums: Dict[str, str] = {}
+
+        expected_relpaths: set[str] = set()
+        pending_keys: List[Tuple[str, str]] = []  # (relpath, cache_key)
+        pending_jobs: List[Tuple[str, str, Optional[int], Optional[int]]] = []
+
+        # (Typ, relpath, erwartete Frames, erwartete Samplerate, Pflicht)
+        artifacts: List[Tuple[str, str, Optional[int], Optional[int], bool]] = [
+            (
+                kind,
+                relpath,
+                n_frames_by_song.get(basename) if kind in FRAME_ARTIFACTS else None,
+                expected_sample_rate if kind in AUDIO_ARTIFACTS else None,
+                kind in REQUIRED_ARTIFACTS,
+            )
+            for kind, basename, relpath in self._expected_artifacts(basenames, index_entries)
+        ]
+        # Weitere Sampleraten haben eigene n_frames und sind laut Index Pflicht
+        sample_rate_artifacts = self._sample_rate_artifacts(index_entries)
+        artifacts.extend(
+            ("audio", relpath, n_frames, sample_rate, True)
+            for relpath, n_frames, sample_rate in sample_rate_artifacts
+        )
+
+        for kind, relpath, expected_n_frames, sample_rate, required in artifacts:
+            expected_relpaths.add(relpath)
+            path = os.path.join(self.output_root_directory, *relpath.split("/"))
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if required:
+                    report.missing.append(relpath)
+                continue
+
+            key = self._cache_key(relpath, stat, expected_n_frames, sample_rate)
+
+            cached = cache.get(key)
+            if cached is not None:
+                new_cache[key] = cached
+                report.number_of_cached_files += 1
+                continue
+
+            pending_keys.append((relpath, key))
+            pending_jobs.append((kind, path, expected_n_frames, sample_rate))
+
+        if pending_jobs:
+            number_of_workers = self.number_of_workers or os.cpu_count() or 1
+            chunksize = max(1, len(pending_jobs) // (4 * number_of_workers))
+            with ProcessPoolExecutor(max_workers=number_of_workers) as executor:
+                results = executor.map(_verify_artifact, pending_jobs, chunksize=chunksize)
+                for (relpath, key), result in zip(pending_keys, results):
+                    new_cache[key] = result
+
+        for key, result in new_cache.items():
+            relpath = key.split("|", 1)[0]
+            checksums[relpath] = result["sha256"]
+            if result.get("error"):
+                report.errors[relpath] = result["error"]
+
+        report.number_of_checked_files = len(new_cache)
+        report.orphans = self._find_orphans(
+            expected_relpaths,
+            extra_subdirs={relpath.split("/", 1)[0] for relpath, _, _ in sample_rate_artifacts},
+        )
+
+        # Nur Einträge für aktuell existierende Dateien behalten -> Cache wächst nicht unbegrenzt
+        self._write_cache(new_cache)
+        self._write_manifest(checksums)
+
+        report.elapsed_seconds = time.perf_counter() - start
+        return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Prüft alle Artefakte eines erzeugten Datensatzes (parallel, inkrementell).",
+    )
+    parser.add_argument("output_root", help="Datensatz-Ordner mit dataset_info.json")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Default: CPU-Anzahl)")
+    parser.add_argument("--no-cache", action="store_true", help="Cache ignorieren und alles neu prüfen")
+    args = parser.parse_args(argv)
+
+    verifier = DatasetVerifier(
+        output_root_directory=args.output_root,
+        number_of_workers=args.workers,
+        use_cache=not args.no_cache,
+    )
+    report = verifier.verify()
+    print(report.summary())
+    return 0 if report.is_ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
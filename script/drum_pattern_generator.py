@@ -1,39 +1,73 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
+import importlib
 import random
 
 import numpy as np
-import muspy
 
 from .drum_mapping import DrumMapping
 from .song_specification import SongSpecification
 from .band_configuration import BandConfiguration
 from .instrument import Instrument
 
-from .drum_patterns import (
-    pop_straight_patterns,
-    rock_patterns,
-    funk_patterns,
-    disco_patterns,
-    shuffle_patterns,
-    dance_pop_patterns,
-    synth_pop_patterns,
-    electropop_patterns,
-    indie_pop_patterns,
-    rnb_pop_patterns,
-    funk_pop_patterns,
-    pop_rock_patterns,
-    latin_pop_patterns,
+# Stil-Stichwort(e) -> Modul in script/drum_patterns. Reihenfolge ist relevant:
+# spezifische Stile ("funk-pop", "pop-rock") vor den allgemeinen ("funk", "rock").
+_STYLE_PATTERN_MODULES: tuple[tuple[tuple[str, ...], str], ...] = (
+    (("dance",), "dance_pop_patterns"),
+    (("synth",), "synth_pop_patterns"),
+    (("electro",), "electropop_patterns"),
+    (("indie",), "indie_pop_patterns"),
+    (("rnb", "r&b"), "rnb_pop_patterns"),
+    (("funk-pop",), "funk_pop_patterns"),
+    (("pop-rock",), "pop_rock_patterns"),
+    (("latin",), "latin_pop_patterns"),
+    (("funk",), "funk_patterns"),
+    (("disco",), "disco_patterns"),
+    (("shuffle",), "shuffle_patterns"),
+    (("rock",), "rock_patterns"),
 )
+_DEFAULT_PATTERN_MODULE = "pop_straight_patterns"
+
+
+@lru_cache(maxsize=None)
+def pattern_module_for_style(style: str | None) -> str:
+    """Liefert das Pattern-Modul (in script/drum_patterns) für einen Stil.
+
+    Die Stichwort-Suche läuft nur einmal pro Stil, danach aus dem Cache.
+    """
+    style = (style or "").lower()
+
+    for keywords, module_name in _STYLE_PATTERN_MODULES:
+        if any(keyword in style for keyword in keywords):
+            return module_name
+
+    return _DEFAULT_PATTERN_MODULE
+
+
+@lru_cache(maxsize=None)
+def load_pattern_library(module_name: str) -> tuple[Dict[str, Dict[str, str]], int]:
+    """Importiert ein Pattern-Modul erst bei der ersten Verwendung.
+
+    Jeder Prozess lädt so nur die Stile, die er tatsächlich erzeugt.
+    """
+    module = importlib.import_module(f"{__package__}.drum_patterns.{module_name}")
+    return module.PATTERNS, module.STEP_RESOLUTION
 
 
 @dataclass
 class DrumEvent:
-    """Repräsentiert ein einzelnes Drum-Ereignis."""
-    time_sec: float
+    """Repräsentiert ein einzelnes Drum-Ereignis.
+
+    time_sec ist der Zeitpunkt in Sekunden. Arbeitet der
+    DrumPatternGenerator mit ticks_per_beat, steht die ganzzahlige
+    Tick-Position in tick und time_sec ist None.
+    """
+    time_sec: Optional[float]
     drum_class: str
     velocity: int
+    tick: Optional[int] = None
 
 
 class DrumPatternGenerator:
@@ -47,12 +81,17 @@ class DrumPatternGenerator:
             fill_probability: float,
             swing_amount: float,
             pause_probability: float,
+            ticks_per_beat: Optional[int] = None,
     ) -> None:
         """Konstruktor mit allen Parametern für die Drum-Generierung.
 
         pause_probability:
             Basiswahrscheinlichkeit (0–1), dass in einem Takt eine kurze Pause
             eingefügt wird (unabhängig von der Komplexität).
+        ticks_per_beat:
+            Tick-Zeitachse. Ist der Wert gesetzt, enthalten die DrumEvents
+            ganzzahlige Tick-Positionen in tick (Viertelnote = ticks_per_beat)
+            statt Sekunden in time_sec. None = Sekunden.
         """
         self.drum_mapping: DrumMapping = drum_mapping
         self.complexity: float = float(complexity)
@@ -61,6 +100,17 @@ class DrumPatternGenerator:
         self.swing_amount: float = float(swing_amount)
         self.pause_probability: float = float(pause_probability)
         self.step_resolution: int = 16  # 16 Steps pro Takt (1 e & a etc.)
+        self.ticks_per_beat: Optional[int] = None if ticks_per_beat is None else int(ticks_per_beat)
+
+        # Eigene Zufallsquellen (per seed je Song gesetzt), damit die globalen
+        # random/np.random des Aufrufers unberührt bleiben
+        self._random = random.Random()
+        self._np_random = np.random.RandomState()
+
+    def seed(self, random_seed: int) -> None:
+        """Setzt die Zufallsquellen für einen Song (gleiche Folgen wie random.seed/np.random.seed)."""
+        self._random.seed(int(random_seed))
+        self._np_random.seed(int(random_seed) % (2 ** 32))
 
     # ------------------------------------------------------------------ #
     # Hilfsfunktionen für Pattern-Auswahl und -Mutation
@@ -70,68 +120,7 @@ class DrumPatternGenerator:
         self, style: str | None
     ) -> tuple[Dict[str, Dict[str, str]], int]:
         """Wählt je nach Stil das passende Pattern-Lexikon aus."""
-        style = (style or "").lower()
-
-        if "dance" in style:
-            return (
-                dance_pop_patterns.PATTERNS,
-                dance_pop_patterns.STEP_RESOLUTION,
-            )
-        if "synth" in style:
-            return (
-                synth_pop_patterns.PATTERNS,
-                synth_pop_patterns.STEP_RESOLUTION,
-            )
-        if "electro" in style:
-            return (
-                electropop_patterns.PATTERNS,
-                electropop_patterns.STEP_RESOLUTION,
-            )
-        if "indie" in style:
-            return (
-                indie_pop_patterns.PATTERNS,
-                indie_pop_patterns.STEP_RESOLUTION,
-            )
-        if "rnb" in style or "r&b" in style:
-            return (
-                rnb_pop_patterns.PATTERNS,
-                rnb_pop_patterns.STEP_RESOLUTION,
-            )
-        if "funk-pop" in style:
-            return (
-                funk_pop_patterns.PATTERNS,
-                funk_pop_patterns.STEP_RESOLUTION,
-            )
-        if "pop-rock" in style:
-            return (
-                pop_rock_patterns.PATTERNS,
-                pop_rock_patterns.STEP_RESOLUTION,
-            )
-        if "latin" in style:
-            return (
-                latin_pop_patterns.PATTERNS,
-                latin_pop_patterns.STEP_RESOLUTION,
-            )
-
-        if "funk" in style:
-            return funk_patterns.PATTERNS, funk_patterns.STEP_RESOLUTION
-        if "disco" in style:
-            return disco_patterns.PATTERNS, disco_patterns.STEP_RESOLUTION
-        if "shuffle" in style:
-            return (
-                shuffle_patterns.PATTERNS,
-                shuffle_patterns.STEP_RESOLUTION,
-            )
-        if "rock" in style:
-            return (
-                rock_patterns.PATTERNS,
-                rock_patterns.STEP_RESOLUTION,
-            )
-
-        return (
-            pop_straight_patterns.PATTERNS,
-            pop_straight_patterns.STEP_RESOLUTION,
-        )
+        return load_pattern_library(pattern_module_for_style(style))
 
     @staticmethod
     def _pattern_str_to_array(pattern: str, subdivisions: int) -> np.ndarray:
@@ -168,9 +157,9 @@ class DrumPatternGenerator:
             a = arr.copy()
 
             # --- 1) kleine Shifts (alles leicht nach links/rechts versetzen) ---
-            if random.random() < shift_prob and a.any():
+            if self._random.random() < shift_prob and a.any():
                 max_shift = 2  # bis zu 2 Steps
-                shift = random.randint(-max_shift, max_shift)
+                shift = self._random.randint(-max_shift, max_shift)
                 if shift != 0:
                     indices = np.flatnonzero(a)
                     new_a = np.zeros_like(a)
@@ -180,10 +169,10 @@ class DrumPatternGenerator:
                     a = new_a
 
             # --- 2) Hits ein-/ausschalten (deutlich mehr Variation) ---
-            if random.random() < toggle_prob:
+            if self._random.random() < toggle_prob:
                 n_toggles = max(1, int(len(a) * 0.1 * (0.5 + complexity)))
                 for _ in range(n_toggles):
-                    idx = random.randrange(len(a))
+                    idx = self._random.randrange(len(a))
                     a[idx] = ~a[idx]
 
             # --- 3) Spezielle Behandlung für geschlossene Hi-Hat ---
@@ -192,7 +181,7 @@ class DrumPatternGenerator:
 
                 # a) Wenn extrem dicht (z.B. 16tel-Dauerfeuer) → dünner machen
                 if fill_ratio > 0.7:
-                    mode = random.choice(["eighths", "offbeat", "broken"])
+                    mode = self._random.choice(["eighths", "offbeat", "broken"])
                     if mode == "eighths":
                         # Nur jede 2. 16tel behalten → Achtel
                         a[1::2] = False
@@ -213,10 +202,10 @@ class DrumPatternGenerator:
                 # b) Bei hoher complexity ein paar geschlossene HH → Open HH
                 if complexity > 0.5 and a.any():
                     open_prob = 0.3 * complexity
-                    if random.random() < open_prob:
+                    if self._random.random() < open_prob:
                         idxs = np.flatnonzero(a)
                         n_open = max(1, int(len(idxs) * 0.2 * complexity))
-                        open_idxs = np.random.choice(idxs, size=n_open, replace=False)
+                        open_idxs = self._np_random.choice(idxs, size=n_open, replace=False)
                         a_open = np.zeros_like(a)
                         a_open[open_idxs] = True
                         a[open_idxs] = False
@@ -237,16 +226,22 @@ class DrumPatternGenerator:
 
         return mutated
 
+    def _make_event(self, position: float, drum_class: str, velocity: int) -> DrumEvent:
+        """DrumEvent an position (Sekunden bzw. Tick-Position, auf ganze Ticks gerundet)."""
+        if self.ticks_per_beat is not None:
+            return DrumEvent(time_sec=None, drum_class=drum_class, velocity=velocity, tick=int(np.rint(position)))
+        return DrumEvent(time_sec=position, drum_class=drum_class, velocity=velocity)
+
     def _arrays_to_events(
         self,
         arrays: Dict[str, np.ndarray],
         bar_start: float,
-        seconds_per_bar: float,
+        bar_length: float,
     ) -> List[DrumEvent]:
-        """Konvertiert ein Bar-Pattern (Arrays) in DrumEvents."""
+        """Konvertiert ein Bar-Pattern (Arrays) in DrumEvents (Zeiten wie bar_start/bar_length)."""
         events: List[DrumEvent] = []
         subdivisions = self.step_resolution
-        step_duration = seconds_per_bar / subdivisions
+        step_duration = bar_length / subdivisions
 
         base_velocity = {
             "KICK": 100,
@@ -266,13 +261,9 @@ class DrumPatternGenerator:
             for step_idx, is_hit in enumerate(arr):
                 if not is_hit:
                     continue
-                time_sec = bar_start + step_idx * step_duration
+                position = bar_start + step_idx * step_duration
                 events.append(
-                    DrumEvent(
-                        time_sec=time_sec,
-                        drum_class=drum_class,
-                        velocity=vel,
-                    )
+                    self._make_event(position, drum_class, vel)
                 )
         return events
 
@@ -285,11 +276,18 @@ class DrumPatternGenerator:
         seconds_per_bar = beats_per_bar * seconds_per_beat
         return beats_per_bar, seconds_per_beat, seconds_per_bar
 
+    def _bar_length(self, song_spec: SongSpecification) -> float:
+        """Taktlänge auf der Zeitachse des Generators (Sekunden oder Ticks)."""
+        beats_per_bar, _, seconds_per_bar = self._compute_timing(song_spec)
+        if self.ticks_per_beat is not None:
+            return beats_per_bar * self.ticks_per_beat
+        return seconds_per_bar
+
     def _add_ghostnotes_for_bar(
             self,
             snare_steps: np.ndarray | None,
             bar_start: float,
-            seconds_per_bar: float,
+            bar_length: float,
     ) -> list[DrumEvent]:
         """Fügt abhängig von complexity/ghostnote_probability Snare-Ghostnotes hinzu."""
         if (
@@ -300,7 +298,7 @@ class DrumPatternGenerator:
             return []
 
         subdivisions = self.step_resolution
-        step_duration = seconds_per_bar / subdivisions
+        step_duration = bar_length / subdivisions
         events: list[DrumEvent] = []
 
         # stärkere Abhängigkeit von complexity
@@ -312,14 +310,10 @@ class DrumPatternGenerator:
             neighborhood = snare_steps[max(0, idx - 2): min(subdivisions, idx + 3)]
             if not neighborhood.any():
                 continue
-            if random.random() < base_p:
-                time_sec = bar_start + idx * step_duration
+            if self._random.random() < base_p:
+                position = bar_start + idx * step_duration
                 events.append(
-                    DrumEvent(
-                        time_sec=time_sec,
-                        drum_class="SNARE",
-                        velocity=45 if self.complexity < 0.8 else 50,
-                    )
+                    self._make_event(position, "SNARE", 45 if self.complexity < 0.8 else 50)
                 )
 
         return events
@@ -341,7 +335,7 @@ class DrumPatternGenerator:
         densities_arr = np.array(densities, dtype=float)
         max_d = float(densities_arr.max())
         if max_d <= 0:
-            return random.choice(names)
+            return self._random.choice(names)
 
         # Gewichte: bei hoher complexity → dichter Patterns bevorzugen,
         # bei niedriger complexity → eher einfache Patterns.
@@ -355,10 +349,10 @@ class DrumPatternGenerator:
         weights = weights / weights.sum()
 
         # Kleine Chance auf komplett random Pattern, damit es nicht zu berechenbar wird
-        if random.random() < 0.1 * self.complexity:
-            return random.choice(names)
+        if self._random.random() < 0.1 * self.complexity:
+            return self._random.choice(names)
 
-        r = random.random()
+        r = self._random.random()
         cum = 0.0
         for name, w in zip(names, weights):
             cum += w
@@ -380,7 +374,7 @@ class DrumPatternGenerator:
             return arrays
 
         # Entscheide überhaupt, ob in diesem Takt eine Pause kommt
-        if random.random() > self.pause_probability:
+        if self._random.random() > self.pause_probability:
             return arrays
 
         subdivisions = self.step_resolution
@@ -397,7 +391,7 @@ class DrumPatternGenerator:
         pause_lengths = [len_16, len_8, len_4, len_2]
         pause_weights = [0.05, 0.35, 0.45, 0.15]  # sum ~ 1.0
 
-        r = random.random()
+        r = self._random.random()
         cum = 0.0
         chosen_len = pause_lengths[-1]
         for length, w in zip(pause_lengths, pause_weights):
@@ -411,7 +405,7 @@ class DrumPatternGenerator:
         if max_start <= 0:
             start = 0
         else:
-            start = random.randint(0, max_start)
+            start = self._random.randint(0, max_start)
 
         end = start + chosen_len
 
@@ -444,9 +438,9 @@ class DrumPatternGenerator:
             a = arr.copy()
 
             # --- 1) kleine Shifts (alles leicht nach links/rechts versetzen) ---
-            if random.random() < shift_prob and a.any():
+            if self._random.random() < shift_prob and a.any():
                 max_shift = 2  # bis zu 2 Steps
-                shift = random.randint(-max_shift, max_shift)
+                shift = self._random.randint(-max_shift, max_shift)
                 if shift != 0:
                     indices = np.flatnonzero(a)
                     new_a = np.zeros_like(a)
@@ -456,10 +450,10 @@ class DrumPatternGenerator:
                     a = new_a
 
             # --- 2) Hits ein-/ausschalten (deutlich mehr Variation) ---
-            if random.random() < toggle_prob:
+            if self._random.random() < toggle_prob:
                 n_toggles = max(1, int(len(a) * 0.1 * (0.5 + complexity)))
                 for _ in range(n_toggles):
-                    idx = random.randrange(len(a))
+                    idx = self._random.randrange(len(a))
                     a[idx] = ~a[idx]
 
             # --- 3) Spezielle Behandlung für geschlossene Hi-Hat ---
@@ -468,7 +462,7 @@ class DrumPatternGenerator:
 
                 # a) Wenn extrem dicht (z.B. 16tel-Dauerfeuer) → dünner machen
                 if fill_ratio > 0.7:
-                    mode = random.choice(["eighths", "offbeat", "broken"])
+                    mode = self._random.choice(["eighths", "offbeat", "broken"])
                     if mode == "eighths":
                         # Nur jede 2. 16tel behalten → Achtel
                         a[1::2] = False
@@ -489,10 +483,10 @@ class DrumPatternGenerator:
                 # b) Bei hoher complexity ein paar geschlossene HH → Open HH
                 if complexity > 0.5 and a.any():
                     open_prob = 0.3 * complexity
-                    if random.random() < open_prob:
+                    if self._random.random() < open_prob:
                         idxs = np.flatnonzero(a)
                         n_open = max(1, int(len(idxs) * 0.2 * complexity))
-                        open_idxs = np.random.choice(idxs, size=n_open, replace=False)
+                        open_idxs = self._np_random.choice(idxs, size=n_open, replace=False)
                         a_open = np.zeros_like(a)
                         a_open[open_idxs] = True
                         a[open_idxs] = False
@@ -525,7 +519,7 @@ class DrumPatternGenerator:
             song_specification: SongSpecification,
     ) -> list[DrumEvent]:
         """Erzeugt eine Drum-Spur für den gesamten Song anhand von Pattern-Templates."""
-        _, _, seconds_per_bar = self._compute_timing(song_specification)
+        bar_length = self._bar_length(song_specification)
         patterns_dict, step_res = self._select_pattern_library(
             getattr(song_specification, "style", None)
         )
@@ -534,7 +528,7 @@ class DrumPatternGenerator:
         events: list[DrumEvent] = []
 
         for bar_index in range(song_specification.number_of_bars):
-            bar_start = bar_index * seconds_per_bar
+            bar_start = bar_index * bar_length
 
             # Pattern abhängig von complexity (dicht vs. simpel) auswählen
             pattern_name = self._choose_pattern_name(patterns_dict)
@@ -545,7 +539,7 @@ class DrumPatternGenerator:
                 base_pattern_strs, self.step_resolution
             )
             arrays = self._mutate_bar_arrays(arrays, self.complexity)
-            events.extend(self._arrays_to_events(arrays, bar_start, seconds_per_bar))
+            events.extend(self._arrays_to_events(arrays, bar_start, bar_length))
 
             # Ghostnotes pro Takt ergänzen (wenn SNARE existiert)
             snare_steps = arrays.get("SNARE")
@@ -553,7 +547,7 @@ class DrumPatternGenerator:
                 self._add_ghostnotes_for_bar(
                     snare_steps=snare_steps,
                     bar_start=bar_start,
-                    seconds_per_bar=seconds_per_bar,
+                    bar_length=bar_length,
                 )
             )
 
@@ -566,16 +560,16 @@ class DrumPatternGenerator:
         number_of_bars: int,
     ) -> List[DrumEvent]:
         """Erstellt Drum-Fills für einen bestimmten Abschnitt (Tom-Läufe + Crash)."""
-        _, _, seconds_per_bar = self._compute_timing(song_specification)
+        bar_length = self._bar_length(song_specification)
         subdivisions = self.step_resolution
-        step_duration = seconds_per_bar / subdivisions
+        step_duration = bar_length / subdivisions
 
         events: List[DrumEvent] = []
         tom_cycle = ["TOM_LOW", "TOM_MID", "TOM_HIGH"]
 
         for local_bar in range(number_of_bars):
             global_bar = start_bar + local_bar
-            bar_start = global_bar * seconds_per_bar
+            bar_start = global_bar * bar_length
 
             # einfacher „laufender“ Fill über 16tel mit leichter Variation
             steps = np.zeros(subdivisions, dtype=bool)
@@ -586,30 +580,22 @@ class DrumPatternGenerator:
             # kleine Variation: zufällige Steps deaktivieren
             if self.complexity > 0.3:
                 for _ in range(int(subdivisions * 0.1 * self.complexity)):
-                    idx = random.randrange(subdivisions)
+                    idx = self._random.randrange(subdivisions)
                     steps[idx] = not steps[idx]
 
             for step_idx, is_hit in enumerate(steps):
                 if not is_hit:
                     continue
                 drum_class = tom_cycle[(local_bar + step_idx) % len(tom_cycle)]
-                time_sec = bar_start + step_idx * step_duration
+                position = bar_start + step_idx * step_duration
                 events.append(
-                    DrumEvent(
-                        time_sec=time_sec,
-                        drum_class=drum_class,
-                        velocity=100,
-                    )
+                    self._make_event(position, drum_class, 100)
                 )
 
         # Crash auf der "1" nach dem Fill-Ende
-        end_bar_start = (start_bar + number_of_bars) * seconds_per_bar
+        end_bar_start = (start_bar + number_of_bars) * bar_length
         events.append(
-            DrumEvent(
-                time_sec=end_bar_start,
-                drum_class="CRASH",
-                velocity=110,
-            )
+            self._make_event(end_bar_start, "CRASH", 110)
         )
 
         return events
@@ -1,8 +1,13 @@
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple, Optional
 import random
 
+import numpy as np
+
+from .note_block import NoteBlock
 from .song_specification import SongSpecification
 from .instrument import Instrument
 
@@ -30,8 +35,9 @@ class NoteEvent:
     """Einfache Darstellung eines MIDI-Notenereignisses.
 
     Attribute:
-        start_time: Startzeit der Note in Sekunden.
-        end_time: Endzeit der Note in Sekunden.
+        start_time: Startzeit der Note in Sekunden (Tick-Position, wenn der
+            HarmonyGenerator mit ticks_per_beat arbeitet).
+        end_time: Endzeit der Note in Sekunden (bzw. Tick-Position).
         pitch: MIDI-Notennummer (z. B. 60 = C4).
         velocity: Anschlagsstärke (0–127).
         channel: MIDI-Kanal (0–15).
@@ -43,6 +49,68 @@ class NoteEvent:
     channel: int
 
 
+# ---------------------------------------------------------------------------
+# Kompilierte Pläne (pro Tonart, Akkordzyklus und Instrument-Typ gecacht)
+# ---------------------------------------------------------------------------
+
+# Maximale Anzahl kompilierter Pläne pro HarmonyGenerator
+PLAN_CACHE_SIZE = 512
+
+
+@dataclass(frozen=True)
+class ProgressionPlan:
+    """Stufentabelle eines Akkordzyklus in einer Tonart.
+
+    Alle Tabellen haben die Länge des Zyklus (z. B. 4 für I–V–vi–IV);
+    Takt i eines Songs nutzt Eintrag i % period.
+    """
+    cycle: Tuple[str, ...]
+    scale: Tuple[int, ...]
+    degree_indices: Tuple[int, ...]
+    qualities: Tuple[str, ...]
+    root_offsets: Tuple[int, ...]
+
+    @property
+    def period(self) -> int:
+        return len(self.cycle)
+
+
+@dataclass(frozen=True)
+class ChordTrackPlan:
+    """Basis-Voicings und Pattern-Gruppen einer Akkordspur für einen Instrument-Typ."""
+    progression: ProgressionPlan
+    triad_voicings: Tuple[Tuple[int, ...], ...]
+    seventh_voicings: Tuple[Optional[Tuple[int, ...]], ...]  # None = kein 7er im chord_vocab
+    all_patterns: Tuple[ChordPattern, ...]
+    arp_patterns: Tuple[ChordPattern, ...]
+    non_arp_patterns: Tuple[ChordPattern, ...]
+    is_guitar: bool
+    is_piano: bool
+    is_organ: bool
+
+
+@dataclass(frozen=True)
+class ChordPatternTemplate:
+    """Ein Chord-Pattern als Arrays (eine Zeile pro Note), relativ zum Taktanfang.
+
+    Entspricht den Ausgaben von _render_block_chord/_render_arp_up/
+    _render_arp_down/_render_top_pulse für ein Voicing mit n Stimmen.
+    """
+    rel_start_quarters: np.ndarray
+    rel_end_quarters: np.ndarray
+    voice_index: np.ndarray      # Index ins Voicing, -1 = oberste Stimme
+    base_velocity: np.ndarray    # Basis-Velocity inkl. Akzent auf 1 und 3
+
+
+def _progression_cycle(progression: List[str]) -> Tuple[str, ...]:
+    """Kürzester Zyklus, dessen Wiederholung die Progression ergibt."""
+    n = len(progression)
+    for period in range(1, n + 1):
+        if all(progression[i] == progression[i % period] for i in range(period, n)):
+            return tuple(progression[:period])
+    return tuple(progression)
+
+
 # ---------------------------------------------------------------------------
 # HarmonyGenerator
 # ---------------------------------------------------------------------------
@@ -61,7 +129,9 @@ class HarmonyGenerator:
     def __init__(
             self,
             scale_vocab: Dict[str, List[int]],
-            chord_vocab: Dict[str, List[int]]
+            chord_vocab: Dict[str, List[int]],
+            batched: bool = False,
+            ticks_per_beat: Optional[int] = None,
     ) -> None:
         """Konstruktor für den HarmonyGenerator.
 
@@ -72,15 +142,28 @@ class HarmonyGenerator:
                 (z. B. "maj" → [0, 4, 7], "min" → [0,3,7]).
             pattern_templates: Sammlung von Pattern-Templates für Bass, Akkorde usw.
                 (in dieser einfachen Version werden sie nur optional verwendet).
+            batched: True = Akkordspuren spaltenweise als NoteBlock erzeugen
+                (generate_chord_block). Die Noten sind identisch zum
+                Einzel-Modus (gleicher RNG-Strom pro Spur).
+            ticks_per_beat: Tick-Zeitachse. Ist der Wert gesetzt, enthalten
+                start_time/end_time aller erzeugten Noten Tick-Positionen
+                (Viertelnote = ticks_per_beat) statt Sekunden; die Umrechnung
+                in Sekunden erfolgt später einmal für den ganzen Song
+                (NoteBlock.tick_positions_to_seconds). None = Sekunden.
         """
         self.scale_vocab = scale_vocab
         self.chord_vocab = chord_vocab
+        self.batched = bool(batched)
+        self.ticks_per_beat: Optional[int] = None if ticks_per_beat is None else int(ticks_per_beat)
+        # LRU für kompilierte Pläne (schlüssel -> ProgressionPlan/ChordTrackPlan/...)
+        self._plan_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
 
     # ------------------------------------------------------------------
     # Interne Hilfsfunktionen
     # ------------------------------------------------------------------
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _roman_to_degree_and_quality(roman: str) -> Tuple[int, str]:
         """Wandelt eine Stufenbezeichnung (z. B. 'vi', 'IV') in (Stufe, Qualität) um.
 
@@ -130,6 +213,14 @@ class HarmonyGenerator:
         bar_duration = beats_per_bar * quarter_duration
         return bar_duration, quarter_duration
 
+    def _timeline_durations(self, song_specification: SongSpecification) -> Tuple[float, float]:
+        """Takt- und Viertellänge auf der Zeitachse des Generators (Sekunden oder Ticks)."""
+        numerator, denominator = song_specification.time_signature
+        if self.ticks_per_beat is not None:
+            beats_per_bar = numerator * (4.0 / denominator)
+            return beats_per_bar * self.ticks_per_beat, float(self.ticks_per_beat)
+        return self._bar_and_qnote_duration(song_specification.tempo_bpm, numerator, denominator)
+
     def _get_scale_for_key(self, key: str) -> List[int]:
         """Gibt die Skala für eine Tonart zurück, mit Fallback auf 'C major'."""
         if key in self.scale_vocab:
@@ -160,6 +251,173 @@ class HarmonyGenerator:
             f"[HarmonyGenerator] WARNUNG: Keine Akkorde für Qualität '{quality}' gefunden. Fallback auf '{first_key}'.")
         return self.chord_vocab[first_key]
 
+    def _cached_plan(self, cache_key: Hashable, compile_plan: Callable[[], Any]) -> Any:
+        """Liefert einen Plan aus dem LRU-Cache oder kompiliert und speichert ihn."""
+        plan = self._plan_cache.get(cache_key)
+        if plan is not None:
+            self._plan_cache.move_to_end(cache_key)
+            return plan
+
+        plan = compile_plan()
+        self._plan_cache[cache_key] = plan
+        if len(self._plan_cache) > PLAN_CACHE_SIZE:
+            self._plan_cache.popitem(last=False)
+        return plan
+
+    def _get_progression_plan(self, key: str, progression: List[str]) -> ProgressionPlan:
+        """Stufen, Qualitäten und Grundtöne des Akkordzyklus (einmal pro Tonart/Zyklus)."""
+        cycle = _progression_cycle(progression)
+
+        def compile_plan() -> ProgressionPlan:
+            scale = tuple(self._get_scale_for_key(key))
+            degree_indices = []
+            qualities = []
+            for roman in cycle:
+                degree_index, quality = self._roman_to_degree_and_quality(roman)
+                degree_indices.append(degree_index % len(scale))
+                qualities.append(quality)
+            return ProgressionPlan(
+                cycle=cycle,
+                scale=scale,
+                degree_indices=tuple(degree_indices),
+                qualities=tuple(qualities),
+                root_offsets=tuple(scale[d] for d in degree_indices),
+            )
+
+        return self._cached_plan(("progression", key, cycle), compile_plan)
+
+    def _get_chord_track_plan(
+            self,
+            key: str,
+            progression: List[str],
+            instrument: Instrument,
+    ) -> ChordTrackPlan:
+        """Kompiliert Voicings und Pattern-Gruppen für (Tonart, Zyklus, Instrument-Typ)."""
+        progression_plan = self._get_progression_plan(key, progression)
+        is_guitar, is_piano, is_organ = self._get_instrument_type_flags(instrument)
+
+        def compile_plan() -> ChordTrackPlan:
+            # mittlere Lage für Akkorde (C3 als Basis), Gitarre eine Oktave höher
+            base_c_midi = 48 + (12 if is_guitar else 0)
+
+            triad_voicings = []
+            seventh_voicings: List[Optional[Tuple[int, ...]]] = []
+            for quality, root_offset in zip(progression_plan.qualities, progression_plan.root_offsets):
+                root_pitch = base_c_midi + root_offset
+                intervals = self._get_chord_intervals(quality)
+                triad_voicings.append(tuple(root_pitch + interval for interval in intervals))
+
+                extended_quality = quality + "7"
+                if extended_quality in self.chord_vocab:
+                    seventh_voicings.append(
+                        tuple(root_pitch + interval for interval in self.chord_vocab[extended_quality])
+                    )
+                else:
+                    seventh_voicings.append(None)
+
+            all_patterns = self._get_chord_patterns_for_instrument(instrument)
+            if not all_patterns:
+                all_patterns = [[(0.0, 4.0, "block")]]
+            arp_patterns, non_arp_patterns = self._group_patterns_by_arp(all_patterns)
+
+            return ChordTrackPlan(
+                progression=progression_plan,
+                triad_voicings=tuple(triad_voicings),
+                seventh_voicings=tuple(seventh_voicings),
+                all_patterns=tuple(all_patterns),
+                arp_patterns=tuple(arp_patterns),
+                non_arp_patterns=tuple(non_arp_patterns),
+                is_guitar=is_guitar,
+                is_piano=is_piano,
+                is_organ=is_organ,
+            )
+
+        return self._cached_plan(
+            ("chord", key, progression_plan.cycle, is_guitar, is_piano, is_organ),
+            compile_plan,
+        )
+
+    def _get_pad_voicings(
+            self,
+            key: str,
+            progression: List[str],
+            base_c_midi_pad: int,
+            voicing_type: str,
+    ) -> Tuple[Tuple[int, ...], ...]:
+        """Pad-Voicings pro Zyklus-Takt für (Tonart, Zyklus, Lage, Voicing-Typ)."""
+        progression_plan = self._get_progression_plan(key, progression)
+
+        def compile_plan() -> Tuple[Tuple[int, ...], ...]:
+            return tuple(
+                tuple(
+                    self._compute_pad_voicing_for_bar(
+                        roman=roman,
+                        scale=list(progression_plan.scale),
+                        base_c_midi_pad=base_c_midi_pad,
+                        voicing_type=voicing_type,
+                    )
+                )
+                for roman in progression_plan.cycle
+            )
+
+        return self._cached_plan(
+            ("pad", key, progression_plan.cycle, base_c_midi_pad, voicing_type),
+            compile_plan,
+        )
+
+    def _get_chord_pattern_template(
+            self,
+            pattern: List[Tuple[float, float, str]],
+            n_voices: int,
+    ) -> ChordPatternTemplate:
+        """Kompiliert ein Chord-Pattern für n Stimmen in Arrays (gecacht pro Pattern)."""
+
+        def compile_plan() -> ChordPatternTemplate:
+            rel_start, rel_end, voice_index, base_velocity, offsets = [], [], [], [], []
+
+            for offset_quarters, duration_quarters, mode in pattern:
+                if mode in ("arp_up", "arp_down", "top_pulse"):
+                    step_quarters = 0.5  # 8tel
+                    steps = np.arange(max(1, int(duration_quarters / step_quarters)))
+                    starts = offset_quarters + steps * step_quarters
+                    note_length = step_quarters * (0.6 if mode == "top_pulse" else 0.9)
+
+                    if mode == "arp_up":
+                        voices = steps % n_voices
+                    elif mode == "arp_down":
+                        voices = n_voices - 1 - steps % n_voices
+                    else:
+                        voices = np.full(steps.shape, -1)
+
+                    rel_start.append(starts)
+                    rel_end.append(starts + note_length)
+                    voice_index.append(voices)
+                    base_velocity.append(np.full(steps.shape, 85 if mode == "top_pulse" else 80))
+                    offsets.append(starts)
+                else:
+                    # "block" und unbekannte Modes (Fallback wie _render_pattern_for_bar)
+                    rel_start.append(np.full(n_voices, offset_quarters))
+                    rel_end.append(np.full(n_voices, offset_quarters + duration_quarters))
+                    voice_index.append(np.arange(n_voices))
+                    base_velocity.append(np.full(n_voices, 90))
+                    offsets.append(np.full(n_voices, offset_quarters))
+
+            local_offsets = np.concatenate(offsets)
+            # Akzent auf Zählzeit 1 und 3 wie in _compute_chord_velocity
+            accent = (np.abs(local_offsets) < 1e-3) | (np.abs(local_offsets - 2.0) < 1e-3)
+
+            return ChordPatternTemplate(
+                rel_start_quarters=np.concatenate(rel_start),
+                rel_end_quarters=np.concatenate(rel_end),
+                voice_index=np.concatenate(voice_index).astype(np.intp),
+                base_velocity=np.concatenate(base_velocity) + 10 * accent,
+            )
+
+        return self._cached_plan(
+            ("chord_template", tuple(pattern), n_voices),
+            compile_plan,
+        )
+
     def _get_chord_patterns_for_instrument(self, instrument: Instrument) -> List[ChordPattern]:
         """Wählt die Chord-Patterns aus CHORD_PATTERNS_BY_ROLE passend zum Instrument.
 
@@ -397,9 +655,9 @@ class HarmonyGenerator:
             is_guitar: bool,
             is_piano: bool,
             is_organ: bool,
-            all_patterns: List[List[Tuple[float, float, str]]],
-            arp_patterns: List[List[Tuple[float, float, str]]],
-            non_arp_patterns: List[List[Tuple[float, float, str]]],
+            all_patterns: Sequence[List[Tuple[float, float, str]]],
+            arp_patterns: Sequence[List[Tuple[float, float, str]]],
+            non_arp_patterns: Sequence[List[Tuple[float, float, str]]],
             rnd: random.Random,
     ) -> List[Tuple[float, float, str]]:
         """Wählt für einen Takt ein Pattern abhängig vom Instrument-Typ."""
@@ -741,10 +999,10 @@ class HarmonyGenerator:
             roman: str,
             scale: List[int],
             base_c_midi_pad: int,
-            rnd: random.Random,
             voicing_type: str,
+            rnd: Optional[random.Random] = None,
     ) -> List[int]:
-        """Berechnet ein 2–3-stimmiges Voicing für Pads."""
+        """Berechnet ein 2–3-stimmiges Voicing für Pads (deterministisch, rnd wird nicht genutzt)."""
         degree_index, quality = self._roman_to_degree_and_quality(roman)
         if degree_index >= len(scale):
             degree_index = degree_index % len(scale)
@@ -902,8 +1160,8 @@ class HarmonyGenerator:
 
     def _generate_single_pad_track(
             self,
+            key: str,
             progression: List[str],
-            scale: List[int],
             bar_duration: float,
             quarter_duration: float,
             instrument: Instrument,
@@ -916,18 +1174,14 @@ class HarmonyGenerator:
         base_c_midi_pad = 48 if rnd.random() < 0.5 else 60
 
         voicing_type = self._select_pad_voicing_type(instrument, rnd)
+        pad_voicings = self._get_pad_voicings(key, progression, base_c_midi_pad, voicing_type)
+        period = len(pad_voicings)
 
         # Patterns pro Instrument holen
         pad_patterns = self._get_pad_patterns_for_instrument(instrument)
 
-        for bar_index, roman in enumerate(progression):
-            voicing = self._compute_pad_voicing_for_bar(
-                roman=roman,
-                scale=scale,
-                base_c_midi_pad=base_c_midi_pad,
-                rnd=rnd,
-                voicing_type=voicing_type,
-            )
+        for bar_index in range(len(progression)):
+            voicing = pad_voicings[bar_index % period]
 
             bar_start_time = bar_index * bar_duration
 
@@ -1083,6 +1337,7 @@ class HarmonyGenerator:
             self,
             song_specification: SongSpecification,
             instrument: Instrument,
+            progression: Optional[List[str]] = None,
     ) -> List[NoteEvent]:
         """Erzeugt eine dynamischere Akkordspur für ein Instrument.
 
@@ -1091,27 +1346,21 @@ class HarmonyGenerator:
         - Voice Leading (minimale Bewegung zum vorherigen Akkord)
         - Instrument-Typ (Piano/Gitarre/Orgel) steuert Pattern-Auswahl
         - leichte Velocity-Variation mit Akzenten
+
+        Args:
+            progression: Akkordfolge des Songs (None = choose_chord_progression).
+                Wird einmal pro Song bestimmt und an alle Spuren übergeben.
         """
-        progression = self.choose_chord_progression(song_specification)
-        key = song_specification.key
-        numerator, denominator = song_specification.time_signature
-        tempo = song_specification.tempo_bpm
+        if progression is None:
+            progression = self.choose_chord_progression(song_specification)
+        bar_duration, quarter_duration = self._timeline_durations(song_specification)
 
-        scale = self._get_scale_for_key(key)
-        bar_duration, quarter_duration = self._bar_and_qnote_duration(
-            tempo, numerator, denominator
-        )
+        # Basis-Voicings und Pattern-Gruppen kommen vorkompiliert aus dem Cache
+        plan = self._get_chord_track_plan(song_specification.key, progression, instrument)
+        period = plan.progression.period
 
         events: List[NoteEvent] = []
 
-        # mittlere Lage für Akkorde (C3 als Basis)
-        base_c_midi = 48  # C3
-
-        # Instrument-spezifische Pattern-Liste aus chord_patterns.py
-        all_patterns = self._get_chord_patterns_for_instrument(instrument)
-        if not all_patterns:
-            all_patterns = [[(0.0, 4.0, "block")]]
-
         # Eigener Zufallsgenerator pro Instrument, damit zwei Chord-Instrumente
         # nicht genau denselben Pattern-Stream haben
         seed = getattr(song_specification, "random_seed", 42)
@@ -1119,178 +1368,158 @@ class HarmonyGenerator:
 
         prev_voicing: Optional[List[int]] = None
 
-        # Instrument-Typen erkennen
-        name_lower = instrument.name.lower()
-        is_guitar = "guitar" in name_lower
-        is_piano = "piano" in name_lower or "keys" in name_lower
-        is_organ = "organ" in name_lower
+        for bar_index in range(len(progression)):
+            cycle_index = bar_index % period
 
-        # Pattern-Gruppen nach Arpeggio / Nicht-Arpeggio
-        arp_patterns = [
-            p for p in all_patterns
-            if any(mode in ("arp_up", "arp_down") for _, _, mode in p)
-        ]
-        non_arp_patterns = [
-            p for p in all_patterns
-            if all(mode not in ("arp_up", "arp_down") for _, _, mode in p)
-        ]
+            # gelegentlich 7er-Akkord statt Dreiklang
+            base_voicing = plan.triad_voicings[cycle_index]
+            seventh_voicing = plan.seventh_voicings[cycle_index]
+            if seventh_voicing is not None and rnd.random() < 0.3:
+                base_voicing = seventh_voicing
 
-        for bar_index, roman in enumerate(progression):
-            # Stufe + Qualität (maj/min/dim)
-            degree_index, quality = self._roman_to_degree_and_quality(roman)
-            if degree_index >= len(scale):
-                degree_index = degree_index % len(scale)
+            # Voice Leading: auf nahe Lage zum vorherigen Akkord ziehen
+            voicing = self._apply_voice_leading(list(base_voicing), prev_voicing)
+            prev_voicing = voicing
 
-            # Akkordintervalle bestimmen, gelegentlich 7er-Akkord
-            intervals = self._get_chord_intervals(quality)
-            extended_quality = quality + "7"
-            if extended_quality in self.chord_vocab and rnd.random() < 0.3:
-                intervals = self.chord_vocab[extended_quality]
+            pattern = self._select_pattern_for_bar(
+                is_guitar=plan.is_guitar,
+                is_piano=plan.is_piano,
+                is_organ=plan.is_organ,
+                all_patterns=plan.all_patterns,
+                arp_patterns=plan.arp_patterns,
+                non_arp_patterns=plan.non_arp_patterns,
+                rnd=rnd,
+            )
+            self._render_pattern_for_bar(
+                events=events,
+                pattern=pattern,
+                voicing=voicing,
+                bar_start_time=bar_index * bar_duration,
+                quarter_duration=quarter_duration,
+                rnd=rnd,
+                channel=instrument.channel,
+            )
 
-            # Root-Ton in dieser Tonart
-            root_offset_from_c = scale[degree_index]
-            root_pitch = base_c_midi + root_offset_from_c
+        return events
 
-            # Basis-Voicing im Stack (Root + Intervalle)
-            base_voicing = [root_pitch + interval for interval in intervals]
+    def generate_chord_block(
+            self,
+            song_specification: SongSpecification,
+            instrument: Instrument,
+            progression: Optional[List[str]] = None,
+    ) -> NoteBlock:
+        """Erzeugt eine Akkordspur spaltenweise (Batched-Modus von generate_chord_track).
 
-            # für Gitarre etwas höher legen
-            if is_guitar:
-                base_voicing = [p + 12 for p in base_voicing]
+        Beschreibung:
+            Voicings, Voice Leading und Pattern-Auswahl laufen wie in
+            generate_chord_track pro Takt. Die Noten selbst entstehen erst am
+            Ende für die ganze Spur: kompilierte Pattern-Templates (Schritte ×
+            Stimmen) werden per Broadcasting auf Taktanfänge und Voicings
+            abgebildet. Die Velocity-Streuung wird je Takt direkt nach der
+            Pattern-Auswahl aus demselben random.Random gezogen (ein randint
+            je Note, in Notenreihenfolge), genau wie die Einzel-Renderer; der
+            RNG-Strom und damit Septimen, Patterns und Velocities sind
+            identisch zu generate_chord_track.
 
-            # Voice Leading: auf nahe Lage zum vorherigen Akkord ziehen
-            voicing = self._apply_voice_leading(base_voicing, prev_voicing)
-            prev_voicing = voicing
+        Returns:
+            NoteBlock mit denselben Noten wie generate_chord_track, in
+            derselben Reihenfolge.
+        """
+        if progression is None:
+            progression = self.choose_chord_progression(song_specification)
+        bar_duration, quarter_duration = self._timeline_durations(song_specification)
 
-            bar_start_time = bar_index * bar_duration
+        plan = self._get_chord_track_plan(song_specification.key, progression, instrument)
+        period = plan.progression.period
 
-            # ---------------------------------
-            # Pattern für diesen Takt auswählen
-            # ---------------------------------
-            if is_guitar and arp_patterns:
-                # Gitarren: stark arpeggio-lastig
-                if rnd.random() < 0.7:
-                    pattern = rnd.choice(arp_patterns)
-                elif non_arp_patterns:
-                    pattern = rnd.choice(non_arp_patterns)
-                else:
-                    pattern = rnd.choice(all_patterns)
-
-            elif is_piano and all_patterns:
-                # Piano: Mix aus block/syncopated und Arpeggios
-                if arp_patterns and rnd.random() < 0.4:
-                    pattern = rnd.choice(arp_patterns)
-                elif non_arp_patterns:
-                    pattern = rnd.choice(non_arp_patterns)
-                else:
-                    pattern = rnd.choice(all_patterns)
-
-            elif is_organ and all_patterns:
-                # Orgel: fast nur lange Akkorde, selten Arpeggio
-                if arp_patterns and rnd.random() < 0.1:
-                    pattern = rnd.choice(arp_patterns)
-                elif non_arp_patterns:
-                    pattern = rnd.choice(non_arp_patterns)
-                else:
-                    pattern = rnd.choice(all_patterns)
+        seed = getattr(song_specification, "random_seed", 42)
+        rnd = random.Random(seed + instrument.channel * 97)
 
-            else:
-                # alle anderen Chord-Instrumente
-                pattern = rnd.choice(all_patterns)
+        number_of_bars = len(progression)
+        if number_of_bars == 0:
+            return NoteBlock.empty()
 
-            # ---------------------------------
-            # Pattern ausführen
-            # ---------------------------------
-            for offset_quarters, duration_quarters, mode in pattern:
-                start_time = bar_start_time + offset_quarters * quarter_duration
-                end_time = start_time + duration_quarters * quarter_duration
+        templates: List[ChordPatternTemplate] = []
+        voicings: List[List[int]] = []
+        jitters: List[int] = []
+        prev_voicing: Optional[List[int]] = None
 
-                if mode == "block":
-                    self._render_block_chord(
-                        events=events,
-                        voicing=voicing,
-                        start_time=start_time,
-                        end_time=end_time,
-                        offset_quarters=offset_quarters,
-                        rnd=rnd,
-                        base_velocity=90,
-                        channel=instrument.channel,
-                    )
+        for bar_index in range(number_of_bars):
+            cycle_index = bar_index % period
 
-                elif mode == "arp_up":
-                    self._render_arp_up(
-                        events=events,
-                        voicing=voicing,
-                        start_time=start_time,
-                        duration_quarters=duration_quarters,
-                        quarter_duration=quarter_duration,
-                        offset_quarters=offset_quarters,
-                        rnd=rnd,
-                        base_velocity=80,
-                        channel=instrument.channel,
-                    )
+            base_voicing = plan.triad_voicings[cycle_index]
+            seventh_voicing = plan.seventh_voicings[cycle_index]
+            if seventh_voicing is not None and rnd.random() < 0.3:
+                base_voicing = seventh_voicing
 
-                elif mode == "arp_down":
-                    self._render_arp_down(
-                        events=events,
-                        voicing=voicing,
-                        start_time=start_time,
-                        duration_quarters=duration_quarters,
-                        quarter_duration=quarter_duration,
-                        offset_quarters=offset_quarters,
-                        rnd=rnd,
-                        base_velocity=80,
-                        channel=instrument.channel,
-                    )
+            voicing = self._apply_voice_leading(list(base_voicing), prev_voicing)
+            prev_voicing = voicing
 
-                elif mode == "top_pulse":
-                    self._render_top_pulse(
-                        events=events,
-                        voicing=voicing,
-                        start_time=start_time,
-                        duration_quarters=duration_quarters,
-                        quarter_duration=quarter_duration,
-                        offset_quarters=offset_quarters,
-                        rnd=rnd,
-                        base_velocity=85,
-                        channel=instrument.channel,
-                    )
+            pattern = self._select_pattern_for_bar(
+                is_guitar=plan.is_guitar,
+                is_piano=plan.is_piano,
+                is_organ=plan.is_organ,
+                all_patterns=plan.all_patterns,
+                arp_patterns=plan.arp_patterns,
+                non_arp_patterns=plan.non_arp_patterns,
+                rnd=rnd,
+            )
+            template = self._get_chord_pattern_template(pattern, len(voicing))
+            templates.append(template)
+            voicings.append(voicing)
+            # Streuung wie _compute_chord_velocity, an derselben Stelle im RNG-Strom
+            jitters.extend(rnd.randint(-8, 8) for _ in range(template.voice_index.shape[0]))
+
+        # Voicings als Matrix (Takte × Stimmen), kürzere Voicings mit -1 aufgefüllt
+        voicing_matrix = np.full((number_of_bars, max(len(v) for v in voicings)), -1, dtype=np.int16)
+        for bar_index, voicing in enumerate(voicings):
+            voicing_matrix[bar_index, : len(voicing)] = voicing
+        top_pitch = voicing_matrix.max(axis=1)
+
+        notes_per_bar = np.fromiter((len(t.voice_index) for t in templates), dtype=np.intp, count=number_of_bars)
+        bar_of_note = np.repeat(np.arange(number_of_bars), notes_per_bar)
+        bar_start = bar_of_note * bar_duration
+
+        voice_index = np.concatenate([t.voice_index for t in templates])
+        pitch = np.where(
+            voice_index < 0,
+            top_pitch[bar_of_note],
+            voicing_matrix[bar_of_note, voice_index],
+        )
 
-                else:
-                    # unbekannter Mode -> sicherer Fallback
-                    self._render_block_chord(
-                        events=events,
-                        voicing=voicing,
-                        start_time=start_time,
-                        end_time=end_time,
-                        offset_quarters=offset_quarters,
-                        rnd=rnd,
-                        base_velocity=90,
-                        channel=instrument.channel,
-                    )
+        base_velocity = np.concatenate([t.base_velocity for t in templates])
+        velocity = np.clip(base_velocity + np.asarray(jitters, dtype=base_velocity.dtype), 40, 127)
 
-        return events
+        return NoteBlock(
+            start_time=bar_start + np.concatenate([t.rel_start_quarters for t in templates]) * quarter_duration,
+            end_time=bar_start + np.concatenate([t.rel_end_quarters for t in templates]) * quarter_duration,
+            pitch=pitch,
+            velocity=velocity,
+            channel=np.full(pitch.shape[0], instrument.channel),
+        )
 
     def generate_bass_track(
             self,
             song_specification: SongSpecification,
             instrument: Instrument,
+            progression: Optional[List[str]] = None,
     ) -> List[NoteEvent]:
         """Erzeugt eine dynamische Basslinie mit Pattern-Templates.
 
         - nutzt instrument-spezifische Bass-Patterns aus bass_patterns.py
         - Patterns enthalten Infos wie "root", "fifth", "octave", "walk_up", "approach_next"
         - berücksichtigt einfachen Walking/Passing in Richtung des nächsten Akkords
+
+        Args:
+            progression: Akkordfolge des Songs (None = choose_chord_progression).
         """
-        progression = self.choose_chord_progression(song_specification)
-        key = song_specification.key
-        numerator, denominator = song_specification.time_signature
-        tempo = song_specification.tempo_bpm
+        if progression is None:
+            progression = self.choose_chord_progression(song_specification)
+        bar_duration, quarter_duration = self._timeline_durations(song_specification)
 
-        scale = self._get_scale_for_key(key)
-        bar_duration, quarter_duration = self._bar_and_qnote_duration(
-            tempo, numerator, denominator
-        )
+        plan = self._get_progression_plan(song_specification.key, progression)
+        scale = list(plan.scale)
+        total_bars = len(progression)
 
         events: List[NoteEvent] = []
         base_c_midi_bass = 36  # C2
@@ -1302,13 +1531,12 @@ class HarmonyGenerator:
         # Patterns für dieses Instrument holen
         bass_patterns = self._get_bass_patterns_for_instrument(instrument)
 
-        for bar_index, roman in enumerate(progression):
-            degree_index, _ = self._roman_to_degree_and_quality(roman)
+        for bar_index in range(total_bars):
+            degree_index = plan.degree_indices[bar_index % plan.period]
 
             # nächsten Akkord (für Approaches)
-            if bar_index + 1 < len(progression):
-                next_roman = progression[bar_index + 1]
-                next_degree_index, _ = self._roman_to_degree_and_quality(next_roman)
+            if bar_index + 1 < total_bars:
+                next_degree_index = plan.degree_indices[(bar_index + 1) % plan.period]
             else:
                 next_degree_index = degree_index
 
@@ -1336,6 +1564,7 @@ class HarmonyGenerator:
             self,
             song_specification: SongSpecification,
             instruments: List[Instrument],
+            progression: Optional[List[str]] = None,
     ) -> List[NoteEvent]:
         """Erzeugt zusätzliche Pad- oder Lead-Spuren.
 
@@ -1345,16 +1574,16 @@ class HarmonyGenerator:
         Leads:
             - kurze Motive in 8teln
             - Call & Response (Motiv meist alle 2 Takte)
+
+        Args:
+            progression: Akkordfolge des Songs (None = choose_chord_progression).
         """
-        progression = self.choose_chord_progression(song_specification)
+        if progression is None:
+            progression = self.choose_chord_progression(song_specification)
         key = song_specification.key
-        numerator, denominator = song_specification.time_signature
-        tempo = song_specification.tempo_bpm
 
         scale = self._get_scale_for_key(key)
-        bar_duration, quarter_duration = self._bar_and_qnote_duration(
-            tempo, numerator, denominator
-        )
+        bar_duration, quarter_duration = self._timeline_durations(song_specification)
 
         all_events: List[NoteEvent] = []
 
@@ -1371,8 +1600,8 @@ class HarmonyGenerator:
 
             if is_pad:
                 events = self._generate_single_pad_track(
+                    key=key,
                     progression=progression,
-                    scale=scale,
                     bar_duration=bar_duration,
                     quarter_duration=quarter_duration,
                     instrument=instrument,
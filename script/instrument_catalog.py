@@ -0,0 +1,165 @@
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+import random
+
+import numpy as np
+
+from .instrument import Instrument
+
+# Rollen, die jede Band mindestens einmal enthält (in Auswahlreihenfolge)
+REQUIRED_ROLES: Tuple[str, ...] = ("chords", "bass", "pad", "lead")
+
+# Rollen, mit denen freie Plätze einer Band aufgefüllt werden (keine extra Leads)
+EXTRA_ROLES: Tuple[str, ...] = ("chords", "bass", "pad")
+
+# Füllwert in Band-Tabellen für nicht belegte Plätze
+NO_INSTRUMENT = -1
+
+
+class InstrumentCatalog:
+    """Unveränderlicher Katalog aller Instrumente, aus denen Bands gewählt werden.
+
+    Verantwortung:
+        InstrumentCatalog wird einmal pro DatasetBuilder angelegt und hält
+        die Instrumente als Tupel sowie je Rolle ein (schreibgeschütztes)
+        Index-Array. Die Bandauswahl arbeitet nur noch auf Indizes; die
+        Instrument-Objekte werden von allen Songs geteilt.
+        Mit sample_bands lassen sich die Bands vieler Songs auf einmal
+        vorab ziehen (z. B. für den DatasetPlanner oder parallele Worker).
+    """
+
+    def __init__(self, instruments: Sequence[Instrument]) -> None:
+        """Konstruktor für den InstrumentCatalog.
+
+        Args:
+            instruments: Alle verfügbaren Instrumente (Reihenfolge = Index).
+        """
+        self.instruments: Tuple[Instrument, ...] = tuple(instruments)
+        self.roles: np.ndarray = np.array([inst.role for inst in self.instruments], dtype=object)
+
+        self.role_indices: Dict[str, np.ndarray] = {}
+        for role in dict.fromkeys(inst.role for inst in self.instruments):
+            self.role_indices[role] = self._read_only(np.flatnonzero(self.roles == role))
+        self.extra_indices: np.ndarray = self._read_only(
+            np.flatnonzero(np.isin(self.roles, EXTRA_ROLES))
+        )
+
+    @staticmethod
+    def _read_only(indices: np.ndarray) -> np.ndarray:
+        indices = indices.astype(np.int64)
+        indices.setflags(write=False)
+        return indices
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def indices_for_role(self, role: str) -> np.ndarray:
+        """Liefert die Katalog-Indizes aller Instrumente einer Rolle (ggf. leer)."""
+        return self.role_indices.get(role, self._read_only(np.empty(0, dtype=np.int64)))
+
+    def instruments_for_indices(self, indices: Sequence[int]) -> List[Instrument]:
+        """Übersetzt Katalog-Indizes (ohne NO_INSTRUMENT-Füllwerte) in Instrumente."""
+        return [self.instruments[int(index)] for index in indices if index != NO_INSTRUMENT]
+
+    def max_band_size(self, min_instruments: int, max_instruments: int) -> int:
+        """Maximale Bandgröße für die gegebenen Grenzen (Breite von sample_bands)."""
+        return min(len(self.instruments), max(4, min_instruments, max_instruments))
+
+    def sample_band_indices(
+            self,
+            rng: random.Random,
+            min_instruments: int = 4,
+            max_instruments: int = 8,
+    ) -> List[int]:
+        """Wählt zufällig eine Band und liefert ihre Katalog-Indizes.
+
+        Beschreibung:
+            Gleiche Regeln wie BandConfiguration.choose_random_band: je ein
+            Chords-, Bass-, Pad- und Lead-Instrument, die restlichen Plätze
+            (bis zu einer zufälligen Bandgröße zwischen min_instruments und
+            max_instruments) mit weiteren Chords/Bass/Pad-Instrumenten.
+            Der RNG wird dabei genauso verwendet wie dort, dieselbe Seed
+            ergibt also dieselbe Band.
+
+        Args:
+            rng: Zufallsgenerator (z. B. random.Random(seed)).
+            min_instruments: Minimale Bandgröße (mindestens 4).
+            max_instruments: Maximale Bandgröße.
+
+        Returns:
+            Liste der Katalog-Indizes in Auswahlreihenfolge.
+
+        Raises:
+            ValueError: Wenn der Katalog leer ist, eine Pflichtrolle fehlt oder
+                weniger als 4 Instrumente verfügbar sind.
+        """
+        if not self.instruments:
+            raise ValueError("Es wurden keine verfügbaren Instrumente übergeben.")
+
+        # min_instruments darf nicht kleiner als 4 sein
+        if min_instruments < 4:
+            min_instruments = 4
+        if max_instruments < min_instruments:
+            max_instruments = min_instruments
+
+        # Sicherstellen, dass jede benötigte Rolle überhaupt existiert
+        for role_name in REQUIRED_ROLES:
+            if not len(self.indices_for_role(role_name)):
+                raise ValueError(
+                    f"Es sind keine Instrumente mit Rolle {role_name!r} in available_patches vorhanden."
+                )
+
+        # Obergrenze durch verfügbare Patches begrenzen
+        max_possible = min(len(self.instruments), max_instruments)
+        if max_possible < 4:
+            raise ValueError(
+                "Nicht genug Instrumente verfügbar, um mindestens 4 zu wählen."
+            )
+
+        # Bandgröße zufällig zwischen min_instruments und max_possible
+        band_size = rng.randint(min_instruments, max_possible)
+
+        # Mindestens je ein Instrument pro Rolle wählen
+        chosen: List[int] = [int(rng.choice(self.role_indices[role])) for role in REQUIRED_ROLES]
+
+        # Restliche Slots mit zufälligen Chords/Bass/Pad auffüllen
+        remaining_slots = band_size - len(chosen)
+        if remaining_slots > 0:
+            extras_pool = [index for index in self.extra_indices.tolist() if index not in chosen]
+            if extras_pool:
+                k = min(remaining_slots, len(extras_pool))
+                chosen.extend(rng.sample(extras_pool, k=k))
+
+        return chosen
+
+    def sample_bands(
+            self,
+            seeds: Sequence[int],
+            min_instruments: int = 4,
+            max_instruments: int = 8,
+    ) -> np.ndarray:
+        """Zieht die Bands vieler Songs auf einmal.
+
+        Beschreibung:
+            Jede Zeile entspricht sample_band_indices(random.Random(seed), ...)
+            für die Seed an derselben Position; freie Plätze kleinerer Bands
+            enthalten NO_INSTRUMENT. Da nur Indizes gezogen werden, entstehen
+            dabei keine Instrument- oder BandConfiguration-Objekte.
+
+        Args:
+            seeds: Eine Seed pro Song.
+            min_instruments: Minimale Bandgröße (mindestens 4).
+            max_instruments: Maximale Bandgröße.
+
+        Returns:
+            int-Array der Form (len(seeds), max_band_size).
+        """
+        bands = np.full(
+            (len(seeds), self.max_band_size(min_instruments, max_instruments)),
+            NO_INSTRUMENT,
+            dtype=np.int64,
+        )
+        for row, seed in enumerate(seeds):
+            indices = self.sample_band_indices(random.Random(seed), min_instruments, max_instruments)
+            bands[row, :len(indices)] = indices
+        return bands
@@ -1,24 +1,155 @@
 from __future__ import annotations
-from dataclasses import dataclass, asdict
-from typing import List
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, IO, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 import json
+import math
 import os
 
-import pretty_midi
+import numpy as np
+
+if TYPE_CHECKING:  # pretty_midi wird erst beim Einlesen einer MIDI-Datei importiert
+    import pretty_midi
 
 from .drum_mapping import DrumMapping
+from .note_block import NoteBlock
+
+# Ausgabeformate der Label-Dateien -> Dateiendung relativ zum Song-Basename (None = keine Datei)
+LABEL_FORMATS: Dict[str, Optional[str]] = {
+    "json": "_labels.json",           # Liste von Label-Objekten, eingerückt (bisheriges Format)
+    "json_compact": "_labels.json",   # wie "json", ohne Leerraum
+    "note_sequence": "_labels.json",  # {"time_unit": ..., "notes": [...]}
+    "binary": "_labels.npz",          # Spalten als .npz (ohne Pickle)
+    "none": None,                     # keine Label-Datei
+}
+
+# Felder eines LabelEvent in Ausgabe-Reihenfolge
+LABEL_FIELDS = ("instrument_class", "onset", "offset", "velocity", "is_drum")
 
 
 @dataclass
 class LabelEvent:
     """Repräsentiert ein einzelnes Label-Ereignis (z. B. eine Note im Ground-Truth)."""
     instrument_class: str  # z. B. "KICK", "SNARE", "Piano"
-    onset: float           # Startzeit (Sekunden)
-    offset: float          # Endzeit (Sekunden)
+    onset: float           # Startzeit (Sekunden bzw. MIDI-Tick bei time_unit="ticks")
+    offset: float          # Endzeit (Sekunden bzw. MIDI-Tick)
     velocity: int          # MIDI-Velocity (1–127)
     is_drum: bool          # True für Drums, False für andere Instrumente
 
 
+@dataclass
+class LabelTable:
+    """Labels eines Songs als parallele Spalten (struct of arrays).
+
+    instrument_classes enthält jede Klasse einmal; class_id verweist je
+    Label in dieses Tupel. onset/offset sind float64-Sekunden bzw.
+    int64-Ticks (time_unit="ticks").
+    """
+    instrument_classes: Tuple[str, ...]
+    class_id: np.ndarray
+    onset: np.ndarray
+    offset: np.ndarray
+    velocity: np.ndarray
+    is_drum: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.class_id.shape[0])
+
+    def rows(self) -> Iterator[Tuple[str, Any, Any, int, bool]]:
+        """Labels als Tupel in der Reihenfolge von LABEL_FIELDS."""
+        classes = self.instrument_classes
+        return zip(
+            [classes[class_id] for class_id in self.class_id.tolist()],
+            self.onset.tolist(),
+            self.offset.tolist(),
+            self.velocity.tolist(),
+            self.is_drum.tolist(),
+        )
+
+    def to_events(self) -> List[LabelEvent]:
+        return [LabelEvent(*row) for row in self.rows()]
+
+    @classmethod
+    def from_events(cls, labels: List[LabelEvent]) -> "LabelTable":
+        instrument_classes = tuple(dict.fromkeys(label.instrument_class for label in labels))
+        class_ids = {name: class_id for class_id, name in enumerate(instrument_classes)}
+        return cls(
+            instrument_classes=instrument_classes,
+            class_id=np.array([class_ids[label.instrument_class] for label in labels], dtype=np.int16),
+            onset=np.array([label.onset for label in labels]),
+            offset=np.array([label.offset for label in labels]),
+            velocity=np.array([label.velocity for label in labels], dtype=np.uint8),
+            is_drum=np.array([label.is_drum for label in labels], dtype=np.bool_),
+        )
+
+
+def _label_rows(labels: Union[List[LabelEvent], LabelTable]) -> Iterable[Tuple[Any, ...]]:
+    if isinstance(labels, LabelTable):
+        return labels.rows()
+    return (
+        (label.instrument_class, label.onset, label.offset, label.velocity, label.is_drum)
+        for label in labels
+    )
+
+
+def _json_number(value: Any) -> str:
+    """Zahl wie json.dumps (NaN/Infinity inklusive), ohne den Encoder je Wert aufzurufen."""
+    if isinstance(value, float):
+        return float.__repr__(value) if math.isfinite(value) else json.dumps(value)
+    return int.__repr__(value)
+
+
+def _write_label_rows(
+        f: IO[str],
+        rows: Iterable[Tuple[Any, ...]],
+        indent: Optional[int],
+        level: int = 0,
+) -> None:
+    """Schreibt Labels als JSON-Liste von Objekten, Label für Label.
+
+    Erzeugt dieselben Bytes wie json.dump(..., indent=indent, ensure_ascii=False)
+    auf der entsprechenden Liste von dicts (indent=None: ohne Leerraum), baut
+    diese Liste aber nie auf.
+    """
+    encode_string = json.encoder.encode_basestring
+    encoded_classes: Dict[str, str] = {}
+
+    if indent is None:
+        item_start, item_separator, list_end = "", ",", "]"
+        keys = [f"{encode_string(name)}:" for name in LABEL_FIELDS]
+        object_start, field_separator, object_end = "{", ",", "}"
+    else:
+        outer = "\n" + " " * (indent * (level + 1))
+        inner = "\n" + " " * (indent * (level + 2))
+        item_start, item_separator, list_end = outer, "," + outer, "\n" + " " * (indent * level) + "]"
+        keys = [f"{encode_string(name)}: " for name in LABEL_FIELDS]
+        object_start, field_separator, object_end = "{" + inner, "," + inner, outer + "}"
+
+    f.write("[")
+    separator = item_start
+    is_empty = True
+    for instrument_class, onset, offset, velocity, is_drum in rows:
+        encoded_class = encoded_classes.get(instrument_class)
+        if encoded_class is None:
+            encoded_class = encode_string(instrument_class)
+            encoded_classes[instrument_class] = encoded_class
+        values = (
+            encoded_class,
+            _json_number(onset),
+            _json_number(offset),
+            _json_number(velocity),
+            "true" if is_drum else "false",
+        )
+        f.write(separator)
+        f.write(object_start)
+        f.write(field_separator.join(key + value for key, value in zip(keys, values)))
+        f.write(object_end)
+        separator = item_separator
+        is_empty = False
+
+    # Leere Liste: "[]" wie beim json-Modul
+    f.write("]" if is_empty else list_end)
+
+
 class LabelExtractor:
     """Extrahiert Ground-Truth-Labels aus MIDI-Dateien.
 
@@ -37,6 +168,7 @@ class LabelExtractor:
         minimum_velocity: int,
         time_unit: str,
         include_non_drums: bool,
+        label_format: str = "json",
     ) -> None:
         """Konstruktor für den LabelExtractor.
 
@@ -45,30 +177,70 @@ class LabelExtractor:
                 zu übersetzen.
             minimum_velocity: Untere Grenze der Velocity, um extrem leise Noten
                 zu filtern (z. B. 5).
-            time_unit: Zeiteinheit für die Labels (z. B. "seconds").
-                       Aktuell wird nur "seconds" unterstützt.
+            time_unit: Zeiteinheit für die Labels: "seconds" oder "ticks"
+                       (ganzzahlige MIDI-Ticks der gespeicherten Datei).
             include_non_drums: True, wenn auch andere Instrumente gelabelt werden
                 sollen, sonst False.
+            label_format: Format der Label-Datei (Schlüssel von LABEL_FORMATS):
+                "json", "json_compact", "note_sequence", "binary" oder "none".
+
+        Raises:
+            ValueError: Bei unbekanntem label_format.
         """
+        if label_format not in LABEL_FORMATS:
+            raise ValueError(
+                f"label_format muss eines von {tuple(LABEL_FORMATS)} sein (ist {label_format!r})."
+            )
+
         self.drum_mapping: DrumMapping = drum_mapping
         self.minimum_velocity: int = int(minimum_velocity)
         self.time_unit: str = time_unit
         self.include_non_drums: bool = include_non_drums
+        self.label_format: str = label_format
+
+    @property
+    def label_file_suffix(self) -> Optional[str]:
+        """Dateiendung der Label-Datei (None bei label_format="none")."""
+        return LABEL_FORMATS[self.label_format]
 
     def _convert_time(self, pm: pretty_midi.PrettyMIDI, t: float) -> float:
         """Konvertiert Zeit t gemäß self.time_unit.
 
         Aktuell:
             - "seconds": gibt t unverändert zurück
+            - "ticks": MIDI-Tick von t (pm.time_to_tick)
             - andere Werte: NotImplementedError
         """
         if self.time_unit == "seconds":
             return float(t)
+        if self.time_unit == "ticks":
+            return pm.time_to_tick(t)
+        raise NotImplementedError(
+            f"time_unit {self.time_unit!r} wird derzeit nicht unterstützt. "
+            "Verwende 'seconds' oder 'ticks'."
+        )
+
+    def _convert_times(self, block: NoteBlock) -> Tuple[np.ndarray, np.ndarray]:
+        """Array-Variante von _convert_time: (Onsets, Offsets) aller Noten eines NoteBlock.
+
+        Raises:
+            ValueError: Bei time_unit="ticks", wenn der Block keine Tick-Spalten hat.
+        """
+        if self.time_unit == "seconds":
+            return block.start_time, block.end_time
+        if self.time_unit == "ticks":
+            if not block.has_ticks:
+                raise ValueError("time_unit 'ticks' braucht einen NoteBlock mit start_tick/end_tick.")
+            return block.start_tick, block.end_tick
         raise NotImplementedError(
             f"time_unit {self.time_unit!r} wird derzeit nicht unterstützt. "
-            "Verwende 'seconds' für diese Version des LabelExtractor."
+            "Verwende 'seconds' oder 'ticks'."
         )
 
+    def _drum_class_table(self) -> List[Optional[str]]:
+        """Drum-Klasse je MIDI-Note 0–127 (None = nicht im Mapping)."""
+        return [self.drum_mapping.map_note_to_class(note) for note in range(128)]
+
     def extract_from_midi(self, midi_path: str) -> List[LabelEvent]:
         """Extrahiert Labels aus einer MIDI-Datei.
 
@@ -82,46 +254,99 @@ class LabelExtractor:
         Returns:
             Liste von LabelEvent-Objekten mit allen extrahierten Labels.
         """
-        pm = pretty_midi.PrettyMIDI(midi_path)
-        labels: List[LabelEvent] = []
-
-        for instrument in pm.instruments:
-            is_drum_inst = bool(instrument.is_drum)
-
-            # Nicht-Drums ggf. überspringen
-            if not is_drum_inst and not self.include_non_drums:
-                continue
-
-            for note in instrument.notes:
-                if note.velocity < self.minimum_velocity:
-                    continue
-
-                onset = self._convert_time(pm, note.start)
-                offset = self._convert_time(pm, note.end)
-
-                if is_drum_inst:
-                    drum_class = self.drum_mapping.map_note_to_class(note.pitch)
-                    # Unbekannte Drum-Noten überspringen
-                    if drum_class is None:
-                        continue
-                    instrument_class = drum_class
-                    is_drum_flag = True
-                else:
-                    # Für Nicht-Drums verwenden wir den Instrumentnamen als Klasse
-                    instrument_class = instrument.name or "NON_DRUM"
-                    is_drum_flag = False
-
-                labels.append(
-                    LabelEvent(
-                        instrument_class=instrument_class,
-                        onset=onset,
-                        offset=offset,
-                        velocity=int(note.velocity),
-                        is_drum=is_drum_flag,
-                    )
-                )
-
-        return labels
+        import pretty_midi
+
+        return self.extract_from_pretty_midi(pretty_midi.PrettyMIDI(midi_path))
+
+    def extract_from_pretty_midi(self, pm: pretty_midi.PrettyMIDI) -> List[LabelEvent]:
+        """Extrahiert Labels aus einem bereits geladenen PrettyMIDI-Objekt."""
+        block = NoteBlock.from_pretty_midi(pm)
+        if self.time_unit == "ticks":
+            block = block.with_ticks(
+                [self._convert_time(pm, t) for t in block.start_time.tolist()],
+                [self._convert_time(pm, t) for t in block.end_time.tolist()],
+            )
+        return self.extract_from_block(
+            block,
+            instrument_names={index: inst.name for index, inst in enumerate(pm.instruments)},
+        )
+
+    def extract_from_block(
+            self,
+            block: NoteBlock,
+            instrument_names: Mapping[int, str],
+    ) -> List[LabelEvent]:
+        """Extrahiert Labels aus einem NoteBlock.
+
+        Beschreibung:
+            Wie extract_table_from_block, aber als Liste von LabelEvents.
+
+        Args:
+            block: Noten des Songs (alle Instrumente); bei time_unit="ticks"
+                mit start_tick/end_tick.
+            instrument_names: Instrumentname je Wert der channel-Spalte
+                (Klasse der Nicht-Drum-Labels; fehlt er, gilt "NON_DRUM").
+
+        Returns:
+            Liste von LabelEvent-Objekten mit allen extrahierten Labels.
+        """
+        return self.extract_table_from_block(block, instrument_names).to_events()
+
+    def extract_table_from_block(
+            self,
+            block: NoteBlock,
+            instrument_names: Mapping[int, str],
+    ) -> LabelTable:
+        """Extrahiert Labels aus einem NoteBlock als LabelTable.
+
+        Beschreibung:
+            Velocity-Filter, Drum-/Nicht-Drum-Auswahl und das Drum-Mapping
+            laufen als Masken über die Spalten des Blocks; es entstehen keine
+            Objekte je Label. Die Reihenfolge der Noten im Block bleibt
+            erhalten.
+
+        Args:
+            block: Noten des Songs (alle Instrumente); bei time_unit="ticks"
+                mit start_tick/end_tick.
+            instrument_names: Instrumentname je Wert der channel-Spalte
+                (Klasse der Nicht-Drum-Labels; fehlt er, gilt "NON_DRUM").
+
+        Returns:
+            LabelTable mit allen extrahierten Labels.
+        """
+        keep = block.velocity >= self.minimum_velocity
+        if not self.include_non_drums:
+            # Nicht-Drums überspringen
+            keep &= block.is_drum
+
+        drum_classes = self._drum_class_table()
+        is_known_drum = np.array([drum_class is not None for drum_class in drum_classes])
+        # Unbekannte Drum-Noten überspringen
+        keep &= ~block.is_drum | is_known_drum[np.clip(block.pitch, 0, 127)]
+        block = block.filter(keep)
+
+        onsets, offsets = self._convert_times(block)
+
+        # Klasse je (Drum-Pitch) bzw. (Nicht-Drum-Kanal): Drum-Klasse oder Instrumentname
+        class_keys = np.where(block.is_drum, block.pitch.astype(np.int64), -1 - block.channel.astype(np.int64))
+        unique_keys, inverse = np.unique(class_keys, return_inverse=True)
+        key_classes = [
+            drum_classes[key] if key >= 0 else (instrument_names.get(-1 - key) or "NON_DRUM")
+            for key in unique_keys.tolist()
+        ]
+        # Gleiche Namen (z. B. zwei Pitches derselben Drum-Klasse) teilen sich eine ID
+        instrument_classes = tuple(dict.fromkeys(key_classes))
+        class_ids = {name: class_id for class_id, name in enumerate(instrument_classes)}
+        key_class_ids = np.array([class_ids[name] for name in key_classes], dtype=np.int16)
+
+        return LabelTable(
+            instrument_classes=instrument_classes,
+            class_id=key_class_ids[inverse.reshape(-1)],
+            onset=np.asarray(onsets),
+            offset=np.asarray(offsets),
+            velocity=block.velocity.astype(np.uint8),
+            is_drum=block.is_drum.astype(np.bool_),
+        )
 
     def filter_to_drums(self, labels: List[LabelEvent]) -> List[LabelEvent]:
         """Filtert eine Label-Liste auf Drum-Ereignisse.
@@ -138,27 +363,55 @@ class LabelExtractor:
         """
         return [label for label in labels if label.is_drum]
 
-    def save_labels_json(self, labels: List[LabelEvent], path: str) -> None:
+    @staticmethod
+    def _ensure_parent_directory(path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def save_labels(self, labels: Union[List[LabelEvent], LabelTable], path: str) -> None:
+        """Speichert Labels im Format self.label_format (bei "none" nichts).
+
+        Args:
+            labels: LabelEvents oder LabelTable.
+            path: Zielpfad (Endung siehe label_file_suffix).
+        """
+        if self.label_format == "json":
+            self.save_labels_json(labels, path)
+        elif self.label_format == "json_compact":
+            self.save_labels_json(labels, path, compact=True)
+        elif self.label_format == "note_sequence":
+            self.save_labels_note_sequence_format(labels, path)
+        elif self.label_format == "binary":
+            self.save_labels_binary(labels, path)
+
+    def save_labels_json(
+        self,
+        labels: Union[List[LabelEvent], LabelTable],
+        path: str,
+        compact: bool = False,
+    ) -> None:
         """Speichert Labels als JSON-Datei.
 
         Beschreibung:
             Speichert eine Liste von Labels als JSON-Datei auf der Festplatte.
+            Die Labels werden einzeln in die Datei geschrieben (kein asdict,
+            keine Zwischenliste); das Ergebnis entspricht json.dump mit
+            indent=2 bzw. bei compact=True ohne Leerraum.
 
         Args:
-            labels: Liste der zu speichernden LabelEvent-Objekte.
+            labels: LabelEvents oder LabelTable.
             path: Zielpfad für die JSON-Datei.
+            compact: True für JSON ohne Einrückung und Leerzeichen.
         """
-        directory = os.path.dirname(path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
+        self._ensure_parent_directory(path)
 
-        data = [asdict(label) for label in labels]
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            _write_label_rows(f, _label_rows(labels), indent=None if compact else 2)
 
     def save_labels_note_sequence_format(
         self,
-        labels: List[LabelEvent],
+        labels: Union[List[LabelEvent], LabelTable],
         path: str,
     ) -> None:
         """Speichert Labels im NoteSequence-/YourMT3-ähnlichen Format.
@@ -184,20 +437,41 @@ class LabelExtractor:
                 }
 
         Args:
-            labels: Liste der zu speichernden LabelEvent-Objekte.
+            labels: LabelEvents oder LabelTable.
             path: Zielpfad für die Ausgabedatei.
         """
-        directory = os.path.dirname(path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-
-        data = {
-            "time_unit": self.time_unit,
-            "notes": [asdict(label) for label in labels],
-        }
+        self._ensure_parent_directory(path)
 
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write('{\n  "time_unit": ')
+            f.write(json.dumps(self.time_unit, ensure_ascii=False))
+            f.write(',\n  "notes": ')
+            _write_label_rows(f, _label_rows(labels), indent=2, level=1)
+            f.write("\n}")
 
+    def save_labels_binary(self, labels: Union[List[LabelEvent], LabelTable], path: str) -> None:
+        """Speichert Labels spaltenweise als .npz-Datei (ohne Pickle).
 
+        Beschreibung:
+            Enthält instrument_classes (Klassennamen), class_id, onset,
+            offset, velocity, is_drum und time_unit; laden mit
+            np.load(path, allow_pickle=False).
 
+        Args:
+            labels: LabelEvents oder LabelTable.
+            path: Zielpfad für die .npz-Datei.
+        """
+        self._ensure_parent_directory(path)
+        table = labels if isinstance(labels, LabelTable) else LabelTable.from_events(labels)
+
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                instrument_classes=np.asarray(table.instrument_classes, dtype=np.str_),
+                class_id=table.class_id,
+                onset=table.onset,
+                offset=table.offset,
+                velocity=table.velocity,
+                is_drum=table.is_drum,
+                time_unit=np.asarray(self.time_unit),
+            )
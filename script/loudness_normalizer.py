@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .biquad_filters import biquad_response, highpass_coefficients, shelf_coefficients
+
+# K-Filter nach ITU-R BS.1770: High-Shelf (Kopfeinfluss) + Hochpass (RLB)
+K_SHELF_HZ = 1500.0
+K_SHELF_GAIN_DB = 4.0
+K_HIGHPASS_HZ = 38.0
+K_HIGHPASS_Q = 0.5
+
+# Gating nach BS.1770: 400-ms-Blöcke mit 75 % Überlappung
+GATE_BLOCK_SECONDS = 0.4
+GATE_STEPS_PER_BLOCK = 4
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+# Ausklang des K-Filters, der beim Falten über die FFT nicht umlaufen soll
+FILTER_TAIL_SECONDS = 0.1
+
+
+@dataclass(frozen=True)
+class LoudnessMeasurement:
+    """Gemessene Lautheit eines Signals und die angewendete Verstärkung."""
+    integrated_lufs: float  # -inf bei Stille
+    peak_dbfs: float  # Sample-Peak vor der Verstärkung, -inf bei Stille
+    gain_db: float
+    # Sample-Peak des Mixes je weiterer Samplerate (extra_sample_rates), vor der Verstärkung
+    sample_rate_peaks_dbfs: Tuple[Tuple[int, float], ...] = ()
+
+    @property
+    def gain(self) -> float:
+        return float(10.0 ** (self.gain_db / 20.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Für den Index (JSON kennt kein -inf: Stille = None)."""
+        entry: Dict[str, Any] = {
+            "integrated_lufs": _rounded_db(self.integrated_lufs),
+            "peak_dbfs": _rounded_db(self.peak_dbfs),
+            "gain_db": round(self.gain_db, 3),
+        }
+        if self.sample_rate_peaks_dbfs:
+            entry["sample_rate_peaks_dbfs"] = {
+                str(sample_rate): _rounded_db(peak_dbfs) for sample_rate, peak_dbfs in self.sample_rate_peaks_dbfs
+            }
+        return entry
+
+
+def _rounded_db(value: float) -> Optional[float]:
+    return round(value, 3) if np.isfinite(value) else None
+
+
+def _peak_dbfs(audio: np.ndarray) -> float:
+    """Sample-Peak in dBFS (-inf bei Stille oder leerem Signal)."""
+    peak = float(np.max(np.abs(audio))) if audio.shape[0] else 0.0
+    return 20.0 * float(np.log10(peak)) if peak > 0.0 else float("-inf")
+
+
+class LoudnessNormalizer:
+    """Normiert gerenderte Songs auf eine Ziel-Lautheit mit Spitzenpegel-Grenze.
+
+    Verantwortung:
+        Je nach Besetzung (4–8 Instrumente) und Velocities sind gerenderte
+        Songs sehr unterschiedlich laut. LoudnessNormalizer misst in einem
+        Durchlauf über den Puffer:
+            - die integrierte Lautheit nach ITU-R BS.1770 (K-Filter als
+              Frequenzgang in einer FFT-Faltung, mittlere Leistung je
+              100-ms-Schritt per reshape, 400-ms-Blöcke mit absolutem und
+              relativem Gate),
+            - den Sample-Peak.
+        Die Verstärkung bringt den Song auf target_lufs, wird aber so weit
+        begrenzt, dass der Peak peak_dbfs nicht überschreitet – auch nicht
+        in den Stems und den Mixes weiterer Sampleraten, die dieselbe
+        Verstärkung bekommen; beim PCM-Export in sf.write clippt nichts
+        mehr. Stille bleibt unverändert.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int,
+            target_lufs: float = -20.0,
+            peak_dbfs: float = -1.0,
+    ) -> None:
+        """Konstruktor für den LoudnessNormalizer.
+
+        Args:
+            sample_rate: Samplerate der Signale.
+            target_lufs: Ziel der integrierten Lautheit.
+            peak_dbfs: Obergrenze für den Sample-Peak nach der Verstärkung.
+
+        Raises:
+            ValueError: Bei target_lufs oder peak_dbfs > 0.
+        """
+        if float(target_lufs) > 0.0 or float(peak_dbfs) > 0.0:
+            raise ValueError("target_lufs und peak_dbfs müssen <= 0 sein.")
+
+        self.sample_rate = int(sample_rate)
+        self.target_lufs = float(target_lufs)
+        self.peak_dbfs = float(peak_dbfs)
+
+        self.step_length = max(1, int(round(GATE_BLOCK_SECONDS / GATE_STEPS_PER_BLOCK * self.sample_rate)))
+        self.tail_length = int(round(FILTER_TAIL_SECONDS * self.sample_rate))
+        self._k_weights: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_config(cls, loudness_normalization: Mapping[str, Any], sample_rate: int) -> "LoudnessNormalizer":
+        """Baut einen LoudnessNormalizer aus dem Konfigurationswert loudness_normalization.
+
+        Erlaubt sind die Schlüsselwortargumente des Konstruktors außer sample_rate.
+
+        Raises:
+            ValueError: Bei unbekannten Schlüsseln.
+        """
+        allowed = ("target_lufs", "peak_dbfs")
+        unknown = [key for key in loudness_normalization if key not in allowed]
+        if unknown:
+            raise ValueError(f"Unbekannte loudness_normalization-Schlüssel: {', '.join(unknown)}")
+        return cls(sample_rate=sample_rate, **dict(loudness_normalization))
+
+    def k_weights(self, n_fft: int) -> np.ndarray:
+        """Komplexer Frequenzgang des K-Filters auf den rfft-Bins (je FFT-Länge gecacht)."""
+        weights = self._k_weights.get(n_fft)
+        if weights is None:
+            z_inv = np.exp(-2j * np.pi * np.fft.rfftfreq(n_fft))
+            shelf_b, shelf_a = shelf_coefficients(
+                "high", np.array([K_SHELF_HZ]), np.array([K_SHELF_GAIN_DB]), self.sample_rate
+            )
+            highpass_b, highpass_a = highpass_coefficients(
+                np.array([K_HIGHPASS_HZ]), np.array([K_HIGHPASS_Q]), self.sample_rate
+            )
+            weights = (
+                biquad_response(shelf_b, shelf_a, z_inv) * biquad_response(highpass_b, highpass_a, z_inv)
+            )[0]
+            self._k_weights[n_fft] = weights
+        return weights
+
+    def integrated_loudness(self, audio: np.ndarray) -> float:
+        """Integrierte Lautheit in LUFS (Mono, -inf bei Stille)."""
+        n = audio.shape[0]
+        if n == 0:
+            return float("-inf")
+
+        n_fft = n + self.tail_length
+        weighted = np.fft.irfft(np.fft.rfft(audio, n_fft) * self.k_weights(n_fft), n_fft)[:n]
+
+        # Mittlere Leistung je 100-ms-Schritt; ein 400-ms-Block = 4 aufeinanderfolgende Schritte
+        n_steps = n // self.step_length
+        if n_steps < GATE_STEPS_PER_BLOCK:
+            block_power = np.array([np.mean(np.square(weighted))])
+        else:
+            step_power = np.mean(
+                np.square(weighted[:n_steps * self.step_length]).reshape(n_steps, self.step_length), axis=1
+            )
+            cumulative = np.concatenate(([0.0], np.cumsum(step_power)))
+            block_power = (
+                cumulative[GATE_STEPS_PER_BLOCK:] - cumulative[:-GATE_STEPS_PER_BLOCK]
+            ) / GATE_STEPS_PER_BLOCK
+
+        with np.errstate(divide="ignore"):
+            block_loudness = -0.691 + 10.0 * np.log10(block_power)
+        gated = block_power[block_loudness > ABSOLUTE_GATE_LUFS]
+        if gated.size == 0:
+            return float("-inf")
+
+        relative_gate = -0.691 + 10.0 * np.log10(np.mean(gated)) + RELATIVE_GATE_LU
+        gated = block_power[(block_loudness > ABSOLUTE_GATE_LUFS) & (block_loudness > relative_gate)]
+        return float(-0.691 + 10.0 * np.log10(np.mean(gated)))
+
+    def measure(
+            self,
+            audio: np.ndarray,
+            peak_signals: Iterable[np.ndarray] = (),
+            sample_rate_signals: Optional[Mapping[int, np.ndarray]] = None,
+    ) -> LoudnessMeasurement:
+        """Lautheit und Peak von audio samt Verstärkung auf target_lufs (begrenzt durch peak_dbfs).
+
+        Args:
+            audio: Mix, dessen Lautheit gemessen wird (sample_rate).
+            peak_signals: Weitere Signale mit derselben Verstärkung (z. B. Stems);
+                ihr Peak begrenzt die Verstärkung mit.
+            sample_rate_signals: Mix je weiterer Samplerate; Peaks begrenzen die
+                Verstärkung mit und stehen in sample_rate_peaks_dbfs.
+        """
+        audio = np.asarray(audio, dtype=np.float64)
+        peak_dbfs = _peak_dbfs(audio)
+        sample_rate_peaks = tuple(
+            (int(sample_rate), _peak_dbfs(np.asarray(signal)))
+            for sample_rate, signal in sorted((sample_rate_signals or {}).items())
+        )
+        loudness = self.integrated_loudness(audio)
+        if not np.isfinite(peak_dbfs) or not np.isfinite(loudness):
+            return LoudnessMeasurement(
+                integrated_lufs=loudness,
+                peak_dbfs=peak_dbfs,
+                gain_db=0.0,
+                sample_rate_peaks_dbfs=sample_rate_peaks,
+            )
+
+        # Höchster Peak aller Signale, die mit dieser Verstärkung geschrieben werden
+        ceiling_dbfs = max(
+            [peak_dbfs]
+            + [_peak_dbfs(np.asarray(signal)) for signal in peak_signals]
+            + [peak for _, peak in sample_rate_peaks]
+        )
+        gain_db = min(self.target_lufs - loudness, self.peak_dbfs - ceiling_dbfs)
+        return LoudnessMeasurement(
+            integrated_lufs=loudness,
+            peak_dbfs=peak_dbfs,
+            gain_db=gain_db,
+            sample_rate_peaks_dbfs=sample_rate_peaks,
+        )
+
+
+def loudness_normalizer_for(
+        loudness_normalization: Optional[Mapping[str, Any]],
+        sample_rate: int,
+) -> Optional[LoudnessNormalizer]:
+    """LoudnessNormalizer für den Konfigurationswert loudness_normalization (None = nicht normieren)."""
+    if loudness_normalization is None:
+        return None
+    return LoudnessNormalizer.from_config(loudness_normalization, sample_rate)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+# Textkodierung für Spurnamen (wie pretty_midi/mido: latin1)
+TRACK_NAME_CHARSET = "latin1"
+
+# Kanäle für melodische Spuren in Spurreihenfolge (wie pretty_midi: ohne Drumkanal 9)
+MELODIC_CHANNELS = tuple(channel for channel in range(16) if channel != 9)
+DRUM_CHANNEL = 9
+
+
+@dataclass(frozen=True)
+class MidiTrack:
+    """Eine Spur der erzeugten MIDI-Datei (entspricht einem pretty_midi.Instrument)."""
+    name: str
+    program: int
+    is_drum: bool
+
+
+def _encode_variable_length_scalar(value: int) -> bytes:
+    """Kodiert eine nicht-negative Zahl als MIDI-Variable-Length-Quantity."""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _encode_note_events(delta: np.ndarray, pitch: np.ndarray, velocity: np.ndarray, status: int) -> bytes:
+    """Kodiert Note-On-Ereignisse (Delta-Zeit + Daten) vektorisiert.
+
+    Beschreibung:
+        Alle Ereignisse haben denselben Statusbyte (Note-On auf einem Kanal),
+        daher steht er dank Running Status nur beim ersten Ereignis. Die
+        Delta-Zeiten werden als Variable-Length-Quantity (1–4 Byte) kodiert.
+    """
+    n = delta.shape[0]
+    if n == 0:
+        return b""
+
+    vlq_length = (
+        1
+        + (delta >= 1 << 7).astype(np.int64)
+        + (delta >= 1 << 14).astype(np.int64)
+        + (delta >= 1 << 21).astype(np.int64)
+    )
+    has_status = np.zeros(n, dtype=np.int64)
+    has_status[0] = 1
+
+    event_length = vlq_length + has_status + 2
+    event_end = np.cumsum(event_length)
+    event_start = event_end - event_length
+    out = np.empty(int(event_end[-1]), dtype=np.uint8)
+
+    # Delta-Zeit: höchstwertige 7-Bit-Gruppe zuerst, Fortsetzungsbit außer beim letzten Byte
+    for k in range(4):
+        rows = vlq_length > k
+        remaining = vlq_length[rows] - 1 - k
+        byte = (delta[rows] >> (7 * remaining)) & 0x7F
+        out[event_start[rows] + k] = byte | np.where(remaining > 0, 0x80, 0)
+
+    position = event_start + vlq_length
+    out[position[0]] = status
+    position = position + has_status
+    out[position] = pitch
+    out[position + 1] = velocity
+    return out.tobytes()
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return chunk_type + struct.pack(">I", len(data)) + data
+
+
+def _encode_timing_track(microseconds_per_beat: int) -> bytes:
+    data = (
+        b"\x00\xff\x51\x03" + microseconds_per_beat.to_bytes(3, "big")  # set_tempo
+        + b"\x00\xff\x58\x04\x04\x02\x18\x08"                          # time_signature 4/4
+        + b"\x01\xff\x2f\x00"                                          # end_of_track
+    )
+    return _chunk(b"MTrk", data)
+
+
+def _encode_note_track(
+        track: MidiTrack,
+        channel: int,
+        start_tick: np.ndarray,
+        end_tick: np.ndarray,
+        pitch: np.ndarray,
+        velocity: np.ndarray,
+) -> bytes:
+    data = bytearray()
+    if track.name:
+        name = track.name.encode(TRACK_NAME_CHARSET)
+        data += b"\x00\xff\x03" + _encode_variable_length_scalar(len(name)) + name
+    data += bytes((0x00, 0xC0 | channel, track.program))
+
+    # Note-On und Note-Off (Note-On mit Velocity 0) je Note, sortiert nach
+    # Tick, Tonhöhe, Velocity (Offs vor Ons) und Schreibreihenfolge
+    n = start_tick.shape[0]
+    tick = np.concatenate([start_tick, end_tick]).astype(np.int64)
+    event_pitch = np.concatenate([pitch, pitch]).astype(np.int64)
+    event_velocity = np.concatenate([velocity, np.zeros(n, dtype=np.int64)]).astype(np.int64)
+    sequence = np.concatenate([2 * np.arange(n), 2 * np.arange(n) + 1])
+    order = np.lexsort((sequence, event_velocity, event_pitch, tick))
+
+    tick = tick[order]
+    delta = np.diff(tick, prepend=0)
+    data += _encode_note_events(delta, event_pitch[order], event_velocity[order], 0x90 | channel)
+
+    data += b"\x01\xff\x2f\x00"  # end_of_track einen Tick nach dem letzten Ereignis
+    return _chunk(b"MTrk", bytes(data))
+
+
+def encode_smf_type1(
+        ticks_per_beat: int,
+        microseconds_per_beat: int,
+        tracks: Sequence[MidiTrack],
+        track_index: np.ndarray,
+        start_tick: np.ndarray,
+        end_tick: np.ndarray,
+        pitch: np.ndarray,
+        velocity: np.ndarray,
+) -> bytes:
+    """Erzeugt eine Standard-MIDI-Datei (Typ 1) aus tick-quantisierten Noten.
+
+    Beschreibung:
+        Spur 0 enthält Tempo und 4/4-Taktart, danach folgt je MidiTrack eine
+        Spur mit Name, Program-Change und allen Noten. Aufbau, Kanalwahl
+        (Drums auf 9, sonst der Reihe nach ohne 9), Ereignisreihenfolge und
+        Running Status entsprechen pretty_midi.PrettyMIDI.write, die Dateien
+        sind also byte-identisch.
+
+    Args:
+        ticks_per_beat: Auflösung in Ticks pro Viertelnote.
+        microseconds_per_beat: Tempo in Mikrosekunden pro Viertelnote.
+        tracks: Spuren in Dateireihenfolge.
+        track_index: Spur-Index je Note (Index in tracks).
+        start_tick: Note-On-Tick je Note.
+        end_tick: Note-Off-Tick je Note.
+        pitch: MIDI-Notennummer je Note (0–127).
+        velocity: Velocity je Note (0–127).
+
+    Returns:
+        Die komplette MIDI-Datei als bytes.
+
+    Raises:
+        ValueError: Wenn pitch oder velocity außerhalb von 0..127 liegen.
+    """
+    for name, values in (("pitch", pitch), ("velocity", velocity)):
+        if np.any((np.asarray(values) < 0) | (np.asarray(values) > 127)):
+            raise ValueError(f"{name} muss in 0..127 liegen.")
+
+    track_index = np.asarray(track_index)
+    chunks: List[bytes] = [
+        _chunk(b"MThd", struct.pack(">hhh", 1, len(tracks) + 1, int(ticks_per_beat))),
+        _encode_timing_track(int(microseconds_per_beat)),
+    ]
+
+    for index, track in enumerate(tracks):
+        channel = DRUM_CHANNEL if track.is_drum else MELODIC_CHANNELS[index % len(MELODIC_CHANNELS)]
+        rows = track_index == index
+        chunks.append(
+            _encode_note_track(
+                track,
+                channel,
+                np.asarray(start_tick)[rows],
+                np.asarray(end_tick)[rows],
+                np.asarray(pitch)[rows],
+                np.asarray(velocity)[rows],
+            )
+        )
+
+    return b"".join(chunks)
@@ -1,12 +1,33 @@
 from __future__ import annotations
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Tuple, Union
 import os
-import pretty_midi
+
+import numpy as np
+
+if TYPE_CHECKING:  # pretty_midi wird erst beim Bauen des ersten Songs importiert
+    import pretty_midi
+
+    from .drum_pattern_generator import DrumEvent
+    from .harmony_generator import NoteEvent
 
 from .song_specification import SongSpecification
 from .drum_mapping import DrumMapping
 from .band_configuration import BandConfiguration
 from .instrument import Instrument
+from .midi_file_writer import MidiTrack, encode_smf_type1
+from .note_block import NoteBlock
+
+# GM-Drumkanal und feste Dauer der Drum-Noten
+DRUM_CHANNEL = 9
+DRUM_NOTE_DURATION = 0.05  # kurze Dauer, z. B. 50 ms
+
+# Rollen-Priorität der harmonischen Instrumente (niedrig = weiter oben in MuseScore)
+ROLE_PRIORITY: Dict[str, int] = {
+    "chords": 0,
+    "bass": 1,
+    "pad": 2,
+    "lead": 3,
+}
 
 
 class MidiSongBuilder:
@@ -60,8 +81,8 @@ class MidiSongBuilder:
     def build_pretty_midi(
         self,
         song_specification: SongSpecification,
-        drum_events: List["DrumEvent"],
-        note_events: List["NoteEvent"],
+        drum_events: Union[List["DrumEvent"], NoteBlock],
+        note_events: Union[List["NoteEvent"], NoteBlock],
     ) -> pretty_midi.PrettyMIDI:
         """Erzeugt ein PrettyMIDI-Objekt aus allen Events.
 
@@ -69,6 +90,9 @@ class MidiSongBuilder:
             Kombiniert alle Events und erzeugt ein PrettyMIDI-Objekt mit Tracks,
             Kanälen, Program-Changes und korrekten Noten.
 
+            Beide Event-Gruppen dürfen als Liste oder als NoteBlock übergeben
+            werden; Listen werden zuerst in NoteBlocks umgewandelt.
+
             Annahmen über Event-Strukturen:
                 DrumEvent:
                     - time_sec: float (Onset in Sekunden)
@@ -83,131 +107,324 @@ class MidiSongBuilder:
 
         Args:
             song_specification: Spezifikation des Songs.
-            drum_events: Liste aller DrumEvent-Objekte (Drum-Spur).
-            note_events: Liste aller NoteEvent-Objekte (harmonische Spuren).
+            drum_events: DrumEvent-Objekte oder fertiger Drum-NoteBlock
+                (Pitches bereits gemappt, zeitlich sortiert).
+            note_events: NoteEvent-Objekte oder NoteBlock der harmonischen Spuren.
 
         Returns:
             Ein PrettyMIDI-Objekt, das den kompletten Song repräsentiert.
         """
-        # PrettyMIDI-Objekt mit gewünschter Auflösung und Tempo
-        pm = pretty_midi.PrettyMIDI(
-            resolution=self.ticks_per_beat,
-            initial_tempo=song_specification.tempo_bpm,
+        if not isinstance(drum_events, NoteBlock):
+            drum_events = self.build_drum_block(drum_events)
+        if not isinstance(note_events, NoteBlock):
+            note_events = NoteBlock.from_note_events(note_events)
+        return self.build_pretty_midi_from_blocks(song_specification, drum_events, note_events)
+
+    def build_drum_block(self, drum_events: List["DrumEvent"]) -> NoteBlock:
+        """Übersetzt DrumEvents in einen zeitlich sortierten Drum-NoteBlock.
+
+        Unbekannte Drum-Klassen werden übersprungen, jede Note dauert
+        DRUM_NOTE_DURATION Sekunden.
+        """
+        return NoteBlock.from_drum_events(
+            drum_events,
+            self.drum_mapping,
+            channel=DRUM_CHANNEL,
+            note_duration=DRUM_NOTE_DURATION,
         )
 
-        # ------------------------------------------------------------
-        # 1) Drum-Instrument erzeugen (wird am ENDE angehängt -> unten)
-        # ------------------------------------------------------------
-        drum_instrument = pretty_midi.Instrument(
-            program=0,          # ignoriert, wenn is_drum=True
-            is_drum=True,
-            name="Drums",
+    def build_tick_drum_block(
+        self,
+        song_specification: SongSpecification,
+        drum_events: List["DrumEvent"],
+    ) -> NoteBlock:
+        """Wie build_drum_block, aber für DrumEvents auf der Tick-Zeitachse (DrumEvent.tick).
+
+        Die Notendauer entspricht DRUM_NOTE_DURATION (mindestens ein Tick).
+        Der Block enthält Sekunden und start_tick/end_tick.
+        """
+        seconds_per_tick = self.seconds_per_tick(song_specification)
+        note_ticks = max(1, int(np.rint(DRUM_NOTE_DURATION / seconds_per_tick)))
+        block = NoteBlock.from_drum_events(
+            drum_events,
+            self.drum_mapping,
+            channel=DRUM_CHANNEL,
+            note_duration=0.0,
+            ticks=True,
         )
+        start_tick = block.start_time.astype(np.int32)
+        return block.with_ticks(start_tick, start_tick + note_ticks, seconds_per_tick)
 
-        for ev in sorted(drum_events, key=lambda e: e.time_sec):
-            try:
-                pitch = self.drum_mapping.get_primary_note_for_class(ev.drum_class)
-            except KeyError:
-                # Unbekannte Drum-Klasse -> überspringen
-                continue
+    def arrange_tracks(
+        self,
+        song_specification: SongSpecification,
+        drum_block: NoteBlock,
+        note_block: NoteBlock,
+    ) -> Tuple[NoteBlock, List[MidiTrack]]:
+        """Verteilt alle Noten auf die Spuren der MIDI-Datei.
 
-            start = float(ev.time_sec)
-            end = start + 0.05  # kurze Dauer, z. B. 50 ms
+        Beschreibung:
+            Legt die Spuren so an, wie sie später in der MIDI-Datei stehen:
+            harmonische Instrumente nach Rollen-Priorität (chords, bass, pad,
+            lead, ...) und Kanal sortiert, die Drums als letzte Spur. Kanäle
+            ohne Instrument in der BandConfiguration bekommen ein generisches
+            Instrument, Spuren ohne Noten entfallen.
 
-            note = pretty_midi.Note(
-                velocity=int(ev.velocity),
-                pitch=int(pitch),
-                start=start,
-                end=end,
-            )
-            drum_instrument.notes.append(note)
-
-        # ------------------------------------------------------------
-        # 2) Harmonische Instrumente aufbauen (Kanäle, Programme, Rollen)
-        # ------------------------------------------------------------
-        # Map: channel -> pretty_midi.Instrument
-        channel_to_instrument: Dict[int, pretty_midi.Instrument] = {}
-        # Map: channel -> Rollen-Priorität (für Sortierung)
-        # niedrig = weiter oben in MuseScore
-        role_priority_map = {
-            "chords": 0,
-            "bass": 1,
-            "pad": 2,
-            "lead": 3,
-        }
-        channel_to_priority: Dict[int, int] = {}
+        Args:
+            song_specification: Spezifikation des Songs.
+            drum_block: Drum-Noten (is_drum=True, zeitlich sortiert).
+            note_block: Noten der harmonischen Spuren (channel = MIDI-Kanal).
+
+        Returns:
+            Tupel (block, tracks): block enthält alle Noten spurweise, mit
+            channel = Spur-Index sowie program/is_drum der Spur (wie
+            NoteBlock.from_pretty_midi); tracks beschreibt die Spuren.
+        """
+        # Map: channel -> (Rollen-Priorität, Spur); niedrig = weiter oben in MuseScore
+        channel_to_track: Dict[int, Tuple[int, MidiTrack]] = {}
 
         band_conf: BandConfiguration = song_specification.band_configuration
 
         # Instrumente aus der BandConfiguration anlegen
         for inst in band_conf.instruments:
             ch = int(inst.channel)
-            if ch in channel_to_instrument:
+            if ch in channel_to_track:
                 continue
+            # Priorität nach Rolle (Fallback 99 für unbekannte Rollen)
+            prio = ROLE_PRIORITY.get(inst.role, 99)
+            channel_to_track[ch] = (prio, MidiTrack(name=inst.name, program=int(inst.gm_program), is_drum=False))
+
+        # Harmonische Spuren: nur Kanäle mit Noten, sortiert nach Rolle -> Kanal.
+        # Für Kanäle ohne Instrument legen wir ein generisches Instrument an
+        # (ans Ende der Melodiegruppe).
+        entries = []
+        for ch in np.unique(note_block.channel).tolist():
+            prio, track = channel_to_track.get(ch, (99, MidiTrack(name=f"Channel_{ch}", program=0, is_drum=False)))
+            entries.append((prio, ch, track))
+        entries.sort(key=lambda t: (t[0], t[1]))
+
+        tracks: List[MidiTrack] = []
+        blocks: List[NoteBlock] = []
+        for track_index, (_, ch, track) in enumerate(entries):
+            blocks.append(self._assign_track(note_block.filter(note_block.channel == ch), track_index, track))
+            tracks.append(track)
+
+        # Drums als LETZTE Spur -> in MuseScore typischerweise ganz unten
+        if len(drum_block):
+            track = MidiTrack(name="Drums", program=0, is_drum=True)  # program ignoriert bei Drums
+            blocks.append(self._assign_track(drum_block, len(tracks), track))
+            tracks.append(track)
+
+        return NoteBlock.concat(blocks), tracks
+
+    @staticmethod
+    def _assign_track(block: NoteBlock, track_index: int, track: MidiTrack) -> NoteBlock:
+        n = len(block)
+        return NoteBlock(
+            start_time=block.start_time,
+            end_time=block.end_time,
+            pitch=block.pitch,
+            velocity=block.velocity,
+            channel=np.full(n, track_index),
+            program=np.full(n, track.program),
+            is_drum=np.full(n, track.is_drum),
+            start_tick=block.start_tick,
+            end_tick=block.end_tick,
+        )
+
+    def build_pretty_midi_from_blocks(
+        self,
+        song_specification: SongSpecification,
+        drum_block: NoteBlock,
+        note_block: NoteBlock,
+    ) -> pretty_midi.PrettyMIDI:
+        """Erzeugt ein PrettyMIDI-Objekt aus einem Drum- und einem Noten-Block.
+
+        Args:
+            song_specification: Spezifikation des Songs.
+            drum_block: Drum-Noten (is_drum=True, zeitlich sortiert).
+            note_block: Noten der harmonischen Spuren.
+
+        Returns:
+            Ein PrettyMIDI-Objekt, das den kompletten Song repräsentiert.
+        """
+        block, tracks = self.arrange_tracks(song_specification, drum_block, note_block)
+        return self.build_pretty_midi_from_tracks(song_specification, block, tracks)
+
+    def build_pretty_midi_from_tracks(
+        self,
+        song_specification: SongSpecification,
+        block: NoteBlock,
+        tracks: List[MidiTrack],
+    ) -> pretty_midi.PrettyMIDI:
+        """Erzeugt ein PrettyMIDI-Objekt aus dem Ergebnis von arrange_tracks."""
+        import pretty_midi
+
+        # PrettyMIDI-Objekt mit gewünschter Auflösung und Tempo
+        pm = pretty_midi.PrettyMIDI(
+            resolution=self.ticks_per_beat,
+            initial_tempo=song_specification.tempo_bpm,
+        )
 
+        for track_index, track in enumerate(tracks):
             pm_inst = pretty_midi.Instrument(
-                program=int(inst.gm_program),
-                is_drum=False,
-                name=inst.name,
+                program=track.program,
+                is_drum=track.is_drum,
+                name=track.name,
             )
-            channel_to_instrument[ch] = pm_inst
+            pm_inst.notes = block.filter(block.channel == track_index).to_pretty_midi_notes()
+            pm.instruments.append(pm_inst)
 
-            # Priorität nach Rolle (Fallback 99 für unbekannte Rollen)
-            prio = role_priority_map.get(inst.role, 99)
-            channel_to_priority[ch] = prio
-
-        # Falls NoteEvents Kanäle nutzen, für die wir noch kein Instrument haben,
-        # legen wir ein generisches Instrument an.
-        for ne in note_events:
-            ch = int(ne.channel)
-            if ch not in channel_to_instrument:
-                pm_inst = pretty_midi.Instrument(
-                    program=0,
-                    is_drum=False,
-                    name=f"Channel_{ch}",
-                )
-                channel_to_instrument[ch] = pm_inst
-                channel_to_priority[ch] = 99  # generische Kanäle ans Ende der Melodiegruppe
-
-        # Noten in die entsprechenden Instrumente einfügen
-        for ne in note_events:
-            ch = int(ne.channel)
-            pm_inst = channel_to_instrument[ch]
-
-            note = pretty_midi.Note(
-                velocity=int(ne.velocity),
-                pitch=int(ne.pitch),
-                start=float(ne.start_time),
-                end=float(ne.end_time),
-            )
-            pm_inst.notes.append(note)
-
-        # ------------------------------------------------------------
-        # 3) Harmonische Instrumente sortiert hinzufügen
-        #     - zuerst nach Rollen-Priorität (chords, bass, pad, lead, ...)
-        #     - dann nach Kanalnummer (stabile Reihenfolge)
-        # ------------------------------------------------------------
-        instrument_entries = []
-        for ch, inst_pm in channel_to_instrument.items():
-            if not inst_pm.notes:
-                continue
-            prio = channel_to_priority.get(ch, 99)
-            instrument_entries.append((prio, ch, inst_pm))
+        return pm
 
-        # Sortierung: Rolle -> Kanal
-        instrument_entries.sort(key=lambda t: (t[0], t[1]))
+    def _write_tick_scale(self, song_specification: SongSpecification) -> float:
+        """Sekunden pro Tick beim Schreiben (wie PrettyMIDI(initial_tempo=...))."""
+        return 60.0 / (song_specification.tempo_bpm * self.ticks_per_beat)
 
-        for _, _, inst_pm in instrument_entries:
-            pm.instruments.append(inst_pm)
+    def _microseconds_per_beat(self, song_specification: SongSpecification) -> int:
+        """Tempo, wie es in der MIDI-Datei steht (ganzzahlig, wie pretty_midi)."""
+        return int(6e7 / (60.0 / (self._write_tick_scale(song_specification) * self.ticks_per_beat)))
 
-        # ------------------------------------------------------------
-        # 4) Drums als LETZTES Instrument hinzufügen
-        #     -> in MuseScore typischerweise ganz unten
-        # ------------------------------------------------------------
-        if drum_instrument.notes:
-            pm.instruments.append(drum_instrument)
+    def seconds_per_tick(self, song_specification: SongSpecification) -> float:
+        """Sekunden pro Tick beim Einlesen der gespeicherten Datei.
 
-        return pm
+        Nutzt das ganzzahlig gespeicherte Tempo (wie pretty_midi beim Lesen);
+        Zeiten = Ticks * seconds_per_tick stimmen daher exakt mit der Datei überein.
+        """
+        return 60.0 / ((6e7 / self._microseconds_per_beat(song_specification)) * self.ticks_per_beat)
+
+    def _note_ticks(self, song_specification: SongSpecification, block: NoteBlock) -> Tuple[np.ndarray, np.ndarray]:
+        """Rundet Start- und Endzeiten auf Ticks (wie PrettyMIDI.time_to_tick).
+
+        Hat der Block bereits Tick-Spalten (Tick-Zeitachse), werden diese
+        unverändert übernommen.
+        """
+        if block.has_ticks:
+            return block.start_tick.astype(np.int64), block.end_tick.astype(np.int64)
+        write_tick_scale = self._write_tick_scale(song_specification)
+        start_tick = np.rint(block.start_time / write_tick_scale).astype(np.int64)
+        end_tick = np.rint(block.end_time / write_tick_scale).astype(np.int64)
+        return start_tick, end_tick
+
+    def write_midi(
+        self,
+        song_specification: SongSpecification,
+        block: NoteBlock,
+        tracks: List[MidiTrack],
+        path: str,
+    ) -> None:
+        """Speichert das Ergebnis von arrange_tracks direkt als .mid-Datei.
+
+        Beschreibung:
+            Schneller Weg ohne PrettyMIDI-/mido-Objekte: die Noten werden
+            vektorisiert auf Ticks gerundet und mit encode_smf_type1 kodiert.
+            Die Datei ist byte-identisch zu
+            save_midi(build_pretty_midi_from_tracks(...), path).
+
+        Args:
+            song_specification: Spezifikation des Songs (Tempo).
+            block: Noten aus arrange_tracks (channel = Spur-Index).
+            tracks: Spuren aus arrange_tracks.
+            path: Zielpfad der zu schreibenden MIDI-Datei.
+        """
+        start_tick, end_tick = self._note_ticks(song_specification, block)
+        data = encode_smf_type1(
+            ticks_per_beat=self.ticks_per_beat,
+            microseconds_per_beat=self._microseconds_per_beat(song_specification),
+            tracks=tracks,
+            track_index=block.channel,
+            start_tick=start_tick,
+            end_tick=end_tick,
+            pitch=block.pitch,
+            velocity=block.velocity,
+        )
+
+        # Sicherstellen, dass der Zielordner existiert
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def simulate_midi_roundtrip(
+        self,
+        song_specification: SongSpecification,
+        block: NoteBlock,
+    ) -> NoteBlock:
+        """Liefert die Noten so, wie pretty_midi sie aus der gespeicherten Datei liest.
+
+        Beschreibung:
+            Bildet Schreiben (save_midi) und erneutes Einlesen vektorisiert
+            nach, ohne die Datei anzufassen:
+                - Zeiten werden auf Ticks gerundet (wie PrettyMIDI.time_to_tick),
+                - das Tempo wird als ganzzahlige Mikrosekunden pro Viertel
+                  gespeichert; die Rückrechnung in Sekunden nutzt dieses Tempo,
+                - Note-Offs liegen im selben Tick vor Note-Ons; ein Note-Off
+                  beendet alle offenen Noten derselben Spur und Tonhöhe.
+                  Überlappende Noten werden dadurch gekürzt, Noten ohne
+                  späteres Note-Off fallen weg,
+                - die Reihenfolge innerhalb einer Spur folgt den Note-Offs.
+
+        Args:
+            song_specification: Spezifikation des Songs (Tempo).
+            block: Ergebnis von arrange_tracks (channel = Spur-Index).
+
+        Returns:
+            NoteBlock in derselben Reihenfolge und mit denselben Zeiten wie
+            NoteBlock.from_pretty_midi(pretty_midi.PrettyMIDI(path)), dazu
+            die Ticks der Datei als start_tick/end_tick.
+        """
+        read_tick_scale = self.seconds_per_tick(song_specification)
+        start_tick, end_tick = self._note_ticks(song_specification, block)
+
+        # Alle Note-On/Off-Ereignisse je (Spur, Tonhöhe) sortieren:
+        # Tick, Note-Off vor Note-On, dann Velocity und Schreibreihenfolge.
+        # Ein Note-On mit Velocity 0 ist in MIDI ein Note-Off.
+        n = len(block)
+        note_index = np.arange(n)
+        group = block.channel.astype(np.int64) * 128 + block.pitch
+        ev_group = np.concatenate([group, group])
+        ev_tick = np.concatenate([start_tick, end_tick])
+        ev_is_on = np.concatenate([block.velocity > 0, np.zeros(n, dtype=np.bool_)])
+        ev_velocity = np.concatenate([block.velocity, np.zeros(n, dtype=np.int16)])
+        ev_note = np.concatenate([note_index, note_index])
+
+        order = np.lexsort((ev_note, ev_velocity, ev_is_on, ev_tick, ev_group))
+        ev_group, ev_tick, ev_is_on, ev_note = ev_group[order], ev_tick[order], ev_is_on[order], ev_note[order]
+
+        # Jede Note endet beim nächsten Note-Off derselben Gruppe
+        on_positions = np.flatnonzero(ev_is_on)
+        off_positions = np.flatnonzero(~ev_is_on)
+        next_off = np.searchsorted(off_positions, on_positions)
+        has_off = next_off < off_positions.shape[0]
+        next_off = off_positions[np.minimum(next_off, off_positions.shape[0] - 1)]
+        has_off &= ev_group[next_off] == ev_group[on_positions]
+
+        kept = ev_note[on_positions[has_off]]
+        kept_end_tick = ev_tick[next_off[has_off]]
+        kept_start_tick = start_tick[kept]
+
+        result = NoteBlock(
+            start_time=read_tick_scale * kept_start_tick,
+            end_time=read_tick_scale * kept_end_tick,
+            pitch=block.pitch[kept],
+            velocity=block.velocity[kept],
+            channel=block.channel[kept],
+            program=block.program[kept],
+            is_drum=block.is_drum[kept],
+            start_tick=kept_start_tick,
+            end_tick=kept_end_tick,
+        )
+        # Einlesereihenfolge: Spur, Note-Off-Tick, Tonhöhe, dann Note-On-Reihenfolge
+        return result.take(np.lexsort((
+            kept,
+            result.velocity,
+            kept_start_tick,
+            result.pitch,
+            kept_end_tick,
+            result.channel,
+        )))
 
     def save_midi(self, pretty_midi_object: pretty_midi.PrettyMIDI, path: str) -> None:
         """Speichert ein PrettyMIDI-Objekt als .mid-Datei.
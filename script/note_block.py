@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pretty_midi
+
+    from .drum_mapping import DrumMapping
+    from .drum_pattern_generator import DrumEvent
+    from .harmony_generator import NoteEvent
+
+# Spalten in fester Reihenfolge (Konstruktor, concat, take)
+COLUMNS = ("start_time", "end_time", "pitch", "velocity", "channel", "program", "is_drum")
+# Optionale Tick-Spalten (None, wenn die Noten nicht aus einer Tick-Zeitachse stammen)
+TICK_COLUMNS = ("start_tick", "end_tick")
+
+
+class NoteBlock:
+    """Spaltenorientierter Block von Noten-Events (struct of arrays).
+
+    Verantwortung:
+        NoteBlock speichert viele Noten als parallele NumPy-Arrays
+        (start_time, end_time, pitch, velocity, channel, program, is_drum)
+        statt als einzelne Event-Objekte. Er ist das gemeinsame Format
+        zwischen Generatoren, MidiSongBuilder, LabelExtractor und dem
+        Schreiben der npy-Dateien: Zusammenfügen, Sortieren und Filtern
+        sind Array-Operationen. Objekte (NoteEvent, pretty_midi.Note,
+        YourMT3-Note) entstehen nur an den Rändern der Pipeline.
+
+        channel ist der MIDI-Kanal (0–15). Bei Blöcken aus einer MIDI-Datei
+        (from_pretty_midi) steht dort der Index des Instruments in
+        pm.instruments, weil pretty_midi keine Kanäle speichert.
+
+        start_tick/end_tick sind optional: Stammen die Noten aus der
+        Tick-Zeitachse (tick_positions_to_seconds) oder aus
+        MidiSongBuilder.simulate_midi_roundtrip, enthalten sie die exakten
+        MIDI-Ticks, aus denen start_time/end_time berechnet wurden.
+    """
+
+    __slots__ = COLUMNS + TICK_COLUMNS
+
+    def __init__(
+            self,
+            start_time: np.ndarray,
+            end_time: np.ndarray,
+            pitch: np.ndarray,
+            velocity: np.ndarray,
+            channel: np.ndarray,
+            program: Optional[np.ndarray] = None,
+            is_drum: Optional[np.ndarray] = None,
+            start_tick: Optional[np.ndarray] = None,
+            end_tick: Optional[np.ndarray] = None,
+    ) -> None:
+        """Konstruktor für einen NoteBlock.
+
+        Args:
+            start_time: Startzeiten in Sekunden.
+            end_time: Endzeiten in Sekunden.
+            pitch: MIDI-Notennummern.
+            velocity: Anschlagsstärken (0–127).
+            channel: MIDI-Kanäle (0–15) bzw. Instrument-Index.
+            program: GM-Programme (None = 0 für alle Noten).
+            is_drum: Drum-Flags (None = False für alle Noten).
+            start_tick: Note-On-Ticks (optional, nur zusammen mit end_tick).
+            end_tick: Note-Off-Ticks (optional).
+        """
+        self.start_time = np.asarray(start_time, dtype=np.float64)
+        self.end_time = np.asarray(end_time, dtype=np.float64)
+        self.pitch = np.asarray(pitch, dtype=np.int16)
+        self.velocity = np.asarray(velocity, dtype=np.int16)
+        self.channel = np.asarray(channel, dtype=np.int8)
+
+        n = self.start_time.shape[0]
+        self.program = (
+            np.zeros(n, dtype=np.int16) if program is None else np.asarray(program, dtype=np.int16)
+        )
+        self.is_drum = (
+            np.zeros(n, dtype=np.bool_) if is_drum is None else np.asarray(is_drum, dtype=np.bool_)
+        )
+        self.start_tick = None if start_tick is None else np.asarray(start_tick, dtype=np.int32)
+        self.end_tick = None if end_tick is None else np.asarray(end_tick, dtype=np.int32)
+
+    @property
+    def has_ticks(self) -> bool:
+        return self.start_tick is not None and self.end_tick is not None
+
+    def _columns(self) -> Tuple[str, ...]:
+        return COLUMNS + TICK_COLUMNS if self.has_ticks else COLUMNS
+
+    def __len__(self) -> int:
+        return int(self.start_time.shape[0])
+
+    # ------------------------------------------------------------------ #
+    # Erzeugen
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def empty(cls) -> "NoteBlock":
+        return cls(
+            start_time=np.empty(0),
+            end_time=np.empty(0),
+            pitch=np.empty(0),
+            velocity=np.empty(0),
+            channel=np.empty(0),
+        )
+
+    @classmethod
+    def concat(cls, blocks: Iterable["NoteBlock"]) -> "NoteBlock":
+        """Hängt mehrere Blöcke in gegebener Reihenfolge aneinander."""
+        blocks = list(blocks)
+        if not blocks:
+            return cls.empty()
+        # Ticks bleiben nur erhalten, wenn alle Blöcke welche haben
+        columns = COLUMNS + TICK_COLUMNS if all(b.has_ticks for b in blocks) else COLUMNS
+        return cls(**{name: np.concatenate([getattr(b, name) for b in blocks]) for name in columns})
+
+    @classmethod
+    def from_note_events(cls, note_events: Sequence["NoteEvent"]) -> "NoteBlock":
+        """Baut einen Block aus harmonischen NoteEvent-Objekten (Reihenfolge bleibt)."""
+        if not note_events:
+            return cls.empty()
+        return cls(
+            start_time=[ne.start_time for ne in note_events],
+            end_time=[ne.end_time for ne in note_events],
+            pitch=[ne.pitch for ne in note_events],
+            velocity=[ne.velocity for ne in note_events],
+            channel=[ne.channel for ne in note_events],
+        )
+
+    @classmethod
+    def from_drum_events(
+            cls,
+            drum_events: Sequence["DrumEvent"],
+            drum_mapping: "DrumMapping",
+            channel: int = 9,
+            note_duration: float = 0.05,
+            ticks: bool = False,
+    ) -> "NoteBlock":
+        """Baut einen Drum-Block aus DrumEvents, zeitlich (stabil) sortiert.
+
+        Beschreibung:
+            Jede Drum-Klasse wird einmal über drum_mapping in ihre Haupt-Note
+            übersetzt; Events mit unbekannter Klasse werden übersprungen.
+            Alle Noten bekommen die feste Dauer note_duration.
+
+        Args:
+            drum_events: DrumEvent-Objekte in beliebiger Reihenfolge.
+            drum_mapping: Mapping Drum-Klasse -> MIDI-Note.
+            channel: MIDI-Kanal der Drums (GM: 9).
+            note_duration: Notendauer in Sekunden (auf der Tick-Zeitachse in Ticks).
+            ticks: True = start_time/end_time aus DrumEvent.tick (Tick-Zeitachse),
+                sonst aus DrumEvent.time_sec.
+
+        Returns:
+            Ein NoteBlock mit is_drum=True.
+        """
+        class_to_pitch = {}
+        for drum_class in {ev.drum_class for ev in drum_events}:
+            try:
+                class_to_pitch[drum_class] = drum_mapping.get_primary_note_for_class(drum_class)
+            except KeyError:
+                class_to_pitch[drum_class] = -1  # unbekannte Drum-Klasse
+
+        pitch = np.array([class_to_pitch[ev.drum_class] for ev in drum_events], dtype=np.int16)
+        start_time = np.array(
+            [ev.tick if ticks else ev.time_sec for ev in drum_events], dtype=np.float64
+        )
+        velocity = np.array([ev.velocity for ev in drum_events], dtype=np.int16)
+
+        order = np.argsort(start_time, kind="stable")
+        order = order[pitch[order] >= 0]
+        start_time = start_time[order]
+
+        n = order.shape[0]
+        return cls(
+            start_time=start_time,
+            end_time=start_time + note_duration,
+            pitch=pitch[order],
+            velocity=velocity[order],
+            channel=np.full(n, channel),
+            is_drum=np.ones(n, dtype=np.bool_),
+        )
+
+    @classmethod
+    def from_pretty_midi(cls, pm: "pretty_midi.PrettyMIDI") -> "NoteBlock":
+        """Baut einen Block aus allen Instrumenten eines PrettyMIDI-Objekts.
+
+        Die Noten bleiben in Instrument- und Notenreihenfolge; channel enthält
+        den Index des Instruments in pm.instruments.
+        """
+        blocks = []
+        for index, inst in enumerate(pm.instruments):
+            notes = inst.notes
+            n = len(notes)
+            blocks.append(
+                cls(
+                    start_time=[note.start for note in notes],
+                    end_time=[note.end for note in notes],
+                    pitch=[note.pitch for note in notes],
+                    velocity=[note.velocity for note in notes],
+                    channel=np.full(n, index),
+                    program=np.full(n, int(inst.program)),
+                    is_drum=np.full(n, bool(inst.is_drum)),
+                )
+            )
+        return cls.concat(blocks)
+
+    def tick_positions_to_seconds(self, seconds_per_tick: float) -> "NoteBlock":
+        """Rechnet einen Block der Tick-Zeitachse in Sekunden um.
+
+        Beschreibung:
+            Im Tick-Modus der Generatoren enthalten start_time/end_time
+            Tick-Positionen. Sie werden einmal auf ganze Ticks (int32)
+            gerundet und vektorisiert in Sekunden umgerechnet; die Ticks
+            bleiben als start_tick/end_tick erhalten.
+
+        Args:
+            seconds_per_tick: Sekunden pro MIDI-Tick.
+
+        Returns:
+            Neuer NoteBlock mit Zeiten in Sekunden und Tick-Spalten.
+        """
+        start_tick = np.rint(self.start_time).astype(np.int32)
+        end_tick = np.rint(self.end_time).astype(np.int32)
+        return self.with_ticks(start_tick, end_tick, seconds_per_tick)
+
+    def with_ticks(
+            self,
+            start_tick: np.ndarray,
+            end_tick: np.ndarray,
+            seconds_per_tick: Optional[float] = None,
+    ) -> "NoteBlock":
+        """Liefert den Block mit Tick-Spalten (und optional daraus berechneten Zeiten)."""
+        start_tick = np.asarray(start_tick, dtype=np.int32)
+        end_tick = np.asarray(end_tick, dtype=np.int32)
+        columns = {name: getattr(self, name) for name in COLUMNS}
+        if seconds_per_tick is not None:
+            columns["start_time"] = seconds_per_tick * start_tick
+            columns["end_time"] = seconds_per_tick * end_tick
+        return NoteBlock(**columns, start_tick=start_tick, end_tick=end_tick)
+
+    # ------------------------------------------------------------------ #
+    # Auswählen und Sortieren
+    # ------------------------------------------------------------------ #
+
+    def take(self, index: Union[np.ndarray, Sequence[int]]) -> "NoteBlock":
+        """Liefert die Zeilen index (Index-Array oder boolesche Maske) als neuen Block."""
+        index = np.asarray(index)
+        return NoteBlock(**{name: getattr(self, name)[index] for name in self._columns()})
+
+    def filter(self, mask: np.ndarray) -> "NoteBlock":
+        """Liefert alle Noten, für die mask True ist (Reihenfolge bleibt)."""
+        return self.take(np.asarray(mask, dtype=np.bool_))
+
+    def argsort(self, keys: Sequence[str]) -> np.ndarray:
+        """Stabile Sortierreihenfolge nach den Spalten keys (erste Spalte zuerst)."""
+        if not keys:
+            return np.arange(len(self))
+        # np.lexsort sortiert nach dem LETZTEN Schlüssel zuerst und ist stabil
+        return np.lexsort([getattr(self, name) for name in reversed(keys)])
+
+    def sort(self, keys: Sequence[str] = ("start_time",)) -> "NoteBlock":
+        """Liefert den Block stabil sortiert nach den Spalten keys."""
+        return self.take(self.argsort(keys))
+
+    # ------------------------------------------------------------------ #
+    # Umwandeln
+    # ------------------------------------------------------------------ #
+
+    def to_note_events(self) -> List["NoteEvent"]:
+        """Wandelt den Block in NoteEvent-Objekte um (für Stufen ohne Block-Unterstützung)."""
+        from .harmony_generator import NoteEvent
+
+        return [
+            NoteEvent(
+                start_time=start,
+                end_time=end,
+                pitch=pitch,
+                velocity=velocity,
+                channel=channel,
+            )
+            for start, end, pitch, velocity, channel in zip(
+                self.start_time.tolist(),
+                self.end_time.tolist(),
+                self.pitch.tolist(),
+                self.velocity.tolist(),
+                self.channel.tolist(),
+            )
+        ]
+
+    def to_pretty_midi_notes(self) -> List["pretty_midi.Note"]:
+        """Erzeugt pretty_midi.Note-Objekte in Blockreihenfolge."""
+        import pretty_midi
+
+        return [
+            pretty_midi.Note(velocity=velocity, pitch=pitch, start=start, end=end)
+            for start, end, pitch, velocity in zip(
+                self.start_time.tolist(),
+                self.end_time.tolist(),
+                self.pitch.tolist(),
+                self.velocity.tolist(),
+            )
+        ]
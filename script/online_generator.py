@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .dataset_builder import DatasetBuilder
+from .dataset_presets import DatasetPreset
+from .note_block import NoteBlock
+from .song_plan import SongPlan
+
+# Strukturierte Notenliste (YourMT3-Konvention: Drums = program 128, velocity 1)
+NOTE_DTYPE = np.dtype(
+    [
+        ("onset", np.float64),
+        ("offset", np.float64),
+        ("pitch", np.uint8),
+        ("velocity", np.uint8),
+        ("program", np.int16),
+        ("is_drum", np.bool_),
+    ]
+)
+
+OnlineExample = Tuple[np.ndarray, np.ndarray, Dict[str, Any]]
+
+
+def note_block_to_structured_array(notes: NoteBlock) -> np.ndarray:
+    """Wandelt einen NoteBlock (YourMT3-Konvention) spaltenweise in NOTE_DTYPE um."""
+    out = np.empty(len(notes), dtype=NOTE_DTYPE)
+    out["onset"] = notes.start_time
+    out["offset"] = notes.end_time
+    out["pitch"] = notes.pitch
+    out["velocity"] = notes.velocity
+    out["program"] = notes.program
+    out["is_drum"] = notes.is_drum
+    return out
+
+
+class OnlineSongGenerator:
+    """Erzeugt endlos frische Songs im Speicher (Online-Synthese).
+
+    Verantwortung:
+        OnlineSongGenerator nutzt die Pipeline des DatasetBuilder (Planung,
+        Drums, Harmonie, MIDI, Rendering, Notenextraktion), schreibt aber
+        nichts auf die Festplatte. Jeder Schritt der Iteration liefert
+        (audio, notes, metadata) für einen neuen Song.
+        Preset und Song-Parameter eines globalen Song-Index kommen aus
+        demselben SongPlan wie im Build (Preset für Preset, number_of_songs
+        je Preset); hinter dem ersten Plan folgen weitere Pläne derselben
+        Größe. Derselbe Index ergibt deshalb denselben Song wie auf der Platte.
+        Für Multi-Worker-Dataloader werden die Song-Indizes (und damit die
+        Seeds) disjunkt auf die Worker verteilt: Worker w bekommt die Indizes
+        start_index + w, start_index + w + N, ...
+        Der AudioRenderer hält pro Worker-Prozess einen persistenten Synth;
+        mit soundfont_pool wählt er die Soundfont je Song wie im Build.
+    """
+
+    def __init__(
+            self,
+            dataset_builder: DatasetBuilder,
+            presets: List[DatasetPreset],
+            dataset_config: dict[str, Any],
+            start_index: int = 1,
+            max_songs: Optional[int] = None,
+            worker_id: Optional[int] = None,
+            number_of_workers: Optional[int] = None,
+    ) -> None:
+        """Konstruktor für den OnlineSongGenerator.
+
+        Args:
+            dataset_builder: Konfigurierter DatasetBuilder (Generatoren, Renderer).
+            presets: Presets in der Reihenfolge des Builds (wie create_song_plan).
+            dataset_config: Globale Datensatz-Parameter (Song-Längen etc.).
+            start_index: Erster globaler Song-Index (z. B. pro Epoche verschieben,
+                um nie denselben Song zweimal zu sehen).
+            max_songs: Anzahl Songs pro Worker (None = endlos).
+            worker_id: Index dieses Workers. None = automatisch aus
+                torch.utils.data.get_worker_info() (falls verfügbar), sonst 0.
+            number_of_workers: Anzahl Worker insgesamt (analog zu worker_id).
+        """
+        if not presets:
+            raise ValueError("Es wurden keine Presets übergeben.")
+
+        self.dataset_builder = dataset_builder
+        self.presets = list(presets)
+        self.dataset_config = dataset_config
+        self.start_index = int(start_index)
+        self.max_songs = max_songs
+        self.worker_id = worker_id
+        self.number_of_workers = number_of_workers
+        self._song_plan: Optional[SongPlan] = None
+
+    def _resolve_worker_partition(self) -> Tuple[int, int]:
+        """Liefert (worker_id, number_of_workers) für die Seed-Aufteilung."""
+        if self.worker_id is not None and self.number_of_workers is not None:
+            return int(self.worker_id), int(self.number_of_workers)
+
+        try:
+            from torch.utils.data import get_worker_info  # optional
+        except ImportError:
+            get_worker_info = None
+
+        worker_info = get_worker_info() if get_worker_info is not None else None
+        if worker_info is not None:
+            return int(worker_info.id), int(worker_info.num_workers)
+        return 0, 1
+
+    def _song_plan_for_index(self, global_song_index: int) -> SongPlan:
+        """Liefert den SongPlan, der global_song_index enthält (letzter Plan wird gecacht)."""
+        songs_per_plan = len(self.presets) * self.dataset_builder.number_of_songs
+        offset = global_song_index - self.start_index
+        if offset < 0:
+            raise ValueError(f"Song-Index {global_song_index} liegt vor start_index {self.start_index}.")
+
+        first_song_index = self.start_index + (offset // songs_per_plan) * songs_per_plan
+        plan = self._song_plan
+        if plan is None or int(plan.global_song_index[0]) != first_song_index:
+            plan = self.dataset_builder.create_song_plan(self.presets, self.dataset_config, first_song_index)
+            self._song_plan = plan
+        return plan
+
+    def generate_song(self, global_song_index: int) -> OnlineExample:
+        """Erzeugt einen einzelnen Song vollständig im Speicher.
+
+        Args:
+            global_song_index: Globaler Song-Index ab start_index (bestimmt Preset und Seed).
+
+        Returns:
+            Tupel (audio, notes, metadata):
+                audio: Mono-float-Array mit der Samplerate des AudioRenderer.
+                notes: Strukturiertes Array mit NOTE_DTYPE, sortiert wie YourMT3.
+                metadata: Dict mit Song-Parametern, program/is_drum und n_frames
+                    (mit soundfont_pool zusätzlich "soundfont").
+        """
+        builder = self.dataset_builder
+        plan = self._song_plan_for_index(global_song_index)
+        row = global_song_index - int(plan.global_song_index[0])
+        preset = self.presets[int(plan.preset_id[row])]
+
+        song_spec = builder.song_specification_from_plan(plan, row, preset)
+        song = builder.render_song(preset, song_spec)
+        audio = song.audio
+
+        sample_rate = int(builder.audio_renderer.output_sample_rate)
+        metadata: Dict[str, Any] = {
+            "synthetic_id": song_spec.song_identifier,
+            "global_song_index": global_song_index,
+            "preset_name": preset.name,
+            "random_seed": song_spec.random_seed,
+            "tempo_bpm": song_spec.tempo_bpm,
+            "time_signature": song_spec.time_signature,
+            "number_of_bars": song_spec.number_of_bars,
+            "key": song_spec.key,
+            "style": song_spec.style,
+            "instruments": [inst.name for inst in song_spec.band_configuration.instruments],
+            "program": song.program,
+            "is_drum": song.is_drum,
+            "sample_rate": sample_rate,
+            "n_frames": int(audio.shape[0]),
+            "duration_sec": float(audio.shape[0]) / float(sample_rate),
+        }
+        if song.soundfont is not None:
+            metadata["soundfont"] = song.soundfont
+        if song.loudness is not None:
+            metadata["loudness"] = song.loudness.to_dict()
+
+        return audio, note_block_to_structured_array(song.notes), metadata
+
+    def __iter__(self) -> Iterator[OnlineExample]:
+        worker_id, number_of_workers = self._resolve_worker_partition()
+
+        global_song_index = self.start_index + worker_id
+        produced = 0
+        while self.max_songs is None or produced < self.max_songs:
+            yield self.generate_song(global_song_index)
+            global_song_index += number_of_workers
+            produced += 1
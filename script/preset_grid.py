@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field, fields
+from typing import Any, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .dataset_presets import DatasetPreset
+from .preset_registry import PresetRegistry, builtin_preset_registry
+
+# Kontinuierliche Parameter in fester Reihenfolge (= Spalten der Stichprobe)
+CONTINUOUS_PARAMETERS = (
+    "tempo_bpm",
+    "drum_complexity",
+    "swing_amount",
+    "ghostnote_probability",
+    "fill_probability",
+    "pause_probability",
+)
+
+# Verfahren für die kontinuierlichen Parameter
+SAMPLING_METHODS = ("lhs", "stratified")
+
+
+@dataclass(frozen=True)
+class PresetAxes:
+    """Achsen des Preset-Rasters.
+
+    Diskrete Achsen (styles × keys × instrument_ranges) bilden die Zellen,
+    die kontinuierlichen Parameter werden innerhalb ihrer Bereiche gezogen.
+    tempo_range und swing_range = None heißt: je Stil der Bereich der
+    handgeschriebenen Presets dieses Stils (builtin_preset_registry, z. B. Rock
+    140–150 BPM, Shuffle mit viel Swing); Stile ohne eigene Presets
+    bekommen den Bereich über alle Presets. Ein gesetzter Bereich gilt für
+    alle Stile. Die übrigen Standardbereiche decken die Werte aller
+    handgeschriebenen Presets ab. Standard für styles und keys sind alle
+    Stile und Tonarten der eingebauten Presets.
+    """
+    styles: Tuple[str, ...] = field(default_factory=lambda: builtin_preset_registry().style_names)
+    keys: Tuple[str, ...] = field(default_factory=lambda: builtin_preset_registry().key_names)
+    instrument_ranges: Tuple[Tuple[int, int], ...] = ((4, 6), (4, 8), (5, 8))
+    time_signature: Tuple[int, int] = (4, 4)
+    tempo_range: Optional[Tuple[float, float]] = None
+    complexity_range: Tuple[float, float] = (0.3, 0.9)
+    swing_range: Optional[Tuple[float, float]] = None
+    ghostnote_range: Tuple[float, float] = (0.1, 0.6)
+    fill_range: Tuple[float, float] = (0.2, 0.5)
+    pause_range: Tuple[float, float] = (0.2, 0.5)
+
+    def continuous_ranges(self, style: str) -> Tuple[Tuple[float, float], ...]:
+        """Bereiche eines Stils in der Reihenfolge von CONTINUOUS_PARAMETERS."""
+        return (
+            self.tempo_range or builtin_preset_registry().value_range("tempo_bpm", style),
+            self.complexity_range,
+            self.swing_range or builtin_preset_registry().value_range("swing_amount", style),
+            self.ghostnote_range,
+            self.fill_range,
+            self.pause_range,
+        )
+
+
+def stable_hash(text: str, digest_size: int = 8) -> int:
+    """Prozess- und plattformunabhängiger Hash (im Gegensatz zu hash())."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=digest_size).digest(), "big")
+
+
+def _level(value: float, thresholds: Tuple[float, float]) -> str:
+    """Grobe Stufe für den Preset-Namen (low/mid/high, wie in dataset_presets)."""
+    if value < thresholds[0]:
+        return "low"
+    if value < thresholds[1]:
+        return "mid"
+    return "high"
+
+
+class PresetGrid:
+    """Erzeugt Presets prozedural aus Achsen statt aus handgeschriebenen Literalen.
+
+    Verantwortung:
+        PresetGrid bildet aus den diskreten Achsen (Stil × Tonart ×
+        Instrumentbereich) Zellen und zieht pro Zelle samples_per_cell
+        Kombinationen der kontinuierlichen Parameter (Tempo, Komplexität,
+        Swing, Ghostnotes, Fills, Pausen):
+            - "lhs": Latin-Hypercube-Stichprobe (jedes Parameter-Intervall
+              wird in samples_per_cell Schichten geteilt, jede Schicht genau
+              einmal getroffen, zufällige Lage innerhalb der Schicht),
+            - "stratified": wie "lhs", aber jeweils die Mitte der Schicht
+              (feste, gut lesbare Werte).
+        Der Zufall jeder Zelle hängt nur von seed und der Zelle selbst ab
+        (stabiler Hash), nicht von der Reihenfolge oder Anzahl der übrigen
+        Zellen. Preset-Namen enthalten einen stabilen Hash der Parameter und
+        kollidieren daher nicht.
+        Presets entstehen erst beim Iterieren (Stream).
+    """
+
+    def __init__(
+            self,
+            axes: PresetAxes,
+            samples_per_cell: int = 1,
+            sampling: str = "lhs",
+            seed: int = 0,
+    ) -> None:
+        """Konstruktor für das PresetGrid.
+
+        Args:
+            axes: Achsen und Parameterbereiche.
+            samples_per_cell: Presets pro Zelle (Stil × Tonart × Instrumentbereich).
+            sampling: "lhs" oder "stratified".
+            seed: Seed für die Stichproben.
+
+        Raises:
+            ValueError: Bei unbekanntem Verfahren oder samples_per_cell < 1.
+        """
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"sampling muss eines von {SAMPLING_METHODS} sein (ist {sampling!r}).")
+        if int(samples_per_cell) < 1:
+            raise ValueError("samples_per_cell muss mindestens 1 sein.")
+
+        self.axes: PresetAxes = axes
+        self.samples_per_cell: int = int(samples_per_cell)
+        self.sampling: str = sampling
+        self.seed: int = int(seed)
+
+    @classmethod
+    def from_config(cls, preset_grid: Mapping[str, Any]) -> "PresetGrid":
+        """Baut ein PresetGrid aus dem Konfigurationswert preset_grid.
+
+        Erlaubt sind die Felder von PresetAxes sowie samples_per_cell,
+        sampling und seed; fehlende Werte kommen aus den Standardwerten.
+
+        Raises:
+            ValueError: Bei unbekannten Schlüsseln.
+        """
+        axis_names = {field.name for field in fields(PresetAxes)}
+        grid_names = {"samples_per_cell", "sampling", "seed"}
+        unknown = [key for key in preset_grid if key not in axis_names | grid_names]
+        if unknown:
+            raise ValueError(f"Unbekannte preset_grid-Schlüssel: {', '.join(unknown)}")
+
+        axes = PresetAxes(**{
+            key: tuple(tuple(v) if isinstance(v, (list, tuple)) else v for v in value)
+            for key, value in preset_grid.items()
+            if key in axis_names
+        })
+        return cls(axes, **{key: value for key, value in preset_grid.items() if key in grid_names})
+
+    def __len__(self) -> int:
+        axes = self.axes
+        return len(axes.styles) * len(axes.keys) * len(axes.instrument_ranges) * self.samples_per_cell
+
+    def _sample_unit_cube(self, rng: np.random.Generator) -> np.ndarray:
+        """Stichprobe im Einheitswürfel, Form (samples_per_cell, Parameter)."""
+        n, d = self.samples_per_cell, len(CONTINUOUS_PARAMETERS)
+        offset = np.full((n, d), 0.5) if self.sampling == "stratified" else rng.random((n, d))
+        strata = np.stack([rng.permutation(n) for _ in range(d)], axis=1)
+        return (strata + offset) / n
+
+    def _cell_presets(self, style: str, key: str, instrument_range: Tuple[int, int]) -> Iterator[DatasetPreset]:
+        min_instruments, max_instruments = (int(v) for v in instrument_range)
+        cell = f"{self.seed}|{style}|{key}|{min_instruments}-{max_instruments}"
+        rng = np.random.default_rng(stable_hash(cell))
+
+        ranges = np.array(self.axes.continuous_ranges(style), dtype=np.float64)
+        values = ranges[:, 0] + self._sample_unit_cube(rng) * (ranges[:, 1] - ranges[:, 0])
+
+        for sample_index, row in enumerate(values):
+            params = dict(zip(CONTINUOUS_PARAMETERS, row.tolist()))
+            params["tempo_bpm"] = float(round(params["tempo_bpm"]))
+            for name in CONTINUOUS_PARAMETERS[1:]:
+                params[name] = round(params[name], 2)
+
+            # Stichproben-Index gehört dazu: nach dem Runden gleiche Werte bleiben unterscheidbar
+            signature = "|".join([cell, str(sample_index)] + [repr(params[name]) for name in CONTINUOUS_PARAMETERS])
+            name = (
+                f"{style}__{key.replace(' ', '-')}__T{int(params['tempo_bpm'])}"
+                f"__C{_level(params['drum_complexity'], (0.45, 0.75))}"
+                f"__S{_level(params['swing_amount'], (0.2, 0.4))}"
+                f"__I{min_instruments}-{max_instruments}"
+                f"__{stable_hash(signature, digest_size=4):08x}"
+            )
+            yield DatasetPreset(
+                name=name,
+                time_signature=tuple(self.axes.time_signature),
+                key=key,
+                style=style,
+                min_instruments=min_instruments,
+                max_instruments=max_instruments,
+                **params,
+            )
+
+    def __iter__(self) -> Iterator[DatasetPreset]:
+        for style in self.axes.styles:
+            for key in self.axes.keys:
+                for instrument_range in self.axes.instrument_ranges:
+                    yield from self._cell_presets(style, key, instrument_range)
+
+
+def preset_registry_for(preset_grid: Optional[Mapping[str, Any]]) -> PresetRegistry:
+    """Registry der eingebauten Presets (preset_grid = None) oder des Rasters."""
+    if preset_grid is None:
+        return builtin_preset_registry()
+    return PresetRegistry(PresetGrid.from_config(preset_grid))
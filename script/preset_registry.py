@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .dataset_presets import DatasetPreset, DATASET_PRESETS
+
+# Erlaubte Schlüssel eines Preset-Filters (siehe PresetRegistry.select)
+PRESET_FILTER_KEYS = ("styles", "keys", "tempo_range", "complexity_range", "instrument_count")
+
+
+class PresetRegistry:
+    """Einmal kompilierte Tabelle aller DatasetPresets (struct of arrays).
+
+    Verantwortung:
+        PresetRegistry legt die Presets als parallele NumPy-Spalten ab:
+        Stil und Tonart als ganzzahlige IDs (style_names/key_names), dazu
+        Tempo, Drum-Komplexität, Swing und Instrumentanzahl. Filter wie
+        "Tempo 100–130, nur Funk" sind damit Masken über die Spalten statt
+        Schleifen über 75 Objekte.
+    """
+
+    def __init__(self, presets: Iterable[DatasetPreset]) -> None:
+        """Konstruktor für die PresetRegistry.
+
+        Args:
+            presets: Alle Presets (Reihenfolge = Preset-ID).
+        """
+        self.presets: Tuple[DatasetPreset, ...] = tuple(presets)
+        self.names: Tuple[str, ...] = tuple(preset.name for preset in self.presets)
+        self.name_to_id: Dict[str, int] = {name: preset_id for preset_id, name in enumerate(self.names)}
+
+        self.style_names: Tuple[str, ...] = tuple(dict.fromkeys(preset.style for preset in self.presets))
+        self.key_names: Tuple[str, ...] = tuple(dict.fromkeys(preset.key for preset in self.presets))
+        style_ids = {style: style_id for style_id, style in enumerate(self.style_names)}
+        key_ids = {key: key_id for key_id, key in enumerate(self.key_names)}
+
+        self.style_id = np.array([style_ids[preset.style] for preset in self.presets], dtype=np.int16)
+        self.key_id = np.array([key_ids[preset.key] for preset in self.presets], dtype=np.int16)
+        self.tempo_bpm = np.array([preset.tempo_bpm for preset in self.presets], dtype=np.float64)
+        self.drum_complexity = np.array([preset.drum_complexity for preset in self.presets], dtype=np.float64)
+        self.swing_amount = np.array([preset.swing_amount for preset in self.presets], dtype=np.float64)
+        self.min_instruments = np.array([preset.min_instruments for preset in self.presets], dtype=np.int16)
+        self.max_instruments = np.array([preset.max_instruments for preset in self.presets], dtype=np.int16)
+
+    def __len__(self) -> int:
+        return len(self.presets)
+
+    def __getitem__(self, name: str) -> DatasetPreset:
+        return self.presets[self.name_to_id[name]]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.name_to_id
+
+    def ids_for_names(self, names: Sequence[str]) -> np.ndarray:
+        """Übersetzt Preset-Namen in Preset-IDs.
+
+        Raises:
+            ValueError: Wenn ein Name nicht registriert ist.
+        """
+        unknown = [name for name in names if name not in self.name_to_id]
+        if unknown:
+            raise ValueError(f"Unbekannte Presets: {', '.join(unknown)}")
+        return np.array([self.name_to_id[name] for name in names], dtype=np.int64)
+
+    def take(self, preset_ids: Sequence[int]) -> List[DatasetPreset]:
+        return [self.presets[int(preset_id)] for preset_id in preset_ids]
+
+    def select(
+            self,
+            styles: Optional[Sequence[str]] = None,
+            keys: Optional[Sequence[str]] = None,
+            tempo_range: Optional[Sequence[float]] = None,
+            complexity_range: Optional[Sequence[float]] = None,
+            instrument_count: Optional[Sequence[int]] = None,
+            preset_ids: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """Liefert die IDs aller Presets, die alle angegebenen Bedingungen erfüllen.
+
+        Args:
+            styles: Erlaubte Stile (z. B. ["funk", "disco"]).
+            keys: Erlaubte Tonarten (z. B. ["C major"]).
+            tempo_range: (min, max) in BPM, Grenzen eingeschlossen.
+            complexity_range: (min, max) der Drum-Komplexität, eingeschlossen.
+            instrument_count: (min, max); das Instrumentintervall des Presets
+                muss diesen Bereich überlappen.
+            preset_ids: Nur unter diesen Presets suchen (Reihenfolge bleibt
+                erhalten); None = alle in Registry-Reihenfolge.
+
+        Returns:
+            int-Array der passenden Preset-IDs.
+
+        Raises:
+            ValueError: Bei unbekanntem Stil oder unbekannter Tonart.
+        """
+        mask = np.ones(len(self.presets), dtype=np.bool_)
+        if styles is not None:
+            mask &= np.isin(self.style_id, self._lookup_ids(self.style_names, styles, "Stil"))
+        if keys is not None:
+            mask &= np.isin(self.key_id, self._lookup_ids(self.key_names, keys, "Tonart"))
+        if tempo_range is not None:
+            low, high = tempo_range
+            mask &= (self.tempo_bpm >= low) & (self.tempo_bpm <= high)
+        if complexity_range is not None:
+            low, high = complexity_range
+            mask &= (self.drum_complexity >= low) & (self.drum_complexity <= high)
+        if instrument_count is not None:
+            low, high = instrument_count
+            mask &= (self.min_instruments <= high) & (self.max_instruments >= low)
+
+        if preset_ids is None:
+            return np.flatnonzero(mask)
+        preset_ids = np.asarray(preset_ids, dtype=np.int64)
+        return preset_ids[mask[preset_ids]]
+
+    def filter_names(self, names: Sequence[str], preset_filter: Optional[Mapping[str, Any]]) -> List[str]:
+        """Wendet einen Preset-Filter (Schlüssel wie in select) auf eine Namensliste an.
+
+        Raises:
+            ValueError: Bei unbekannten Presets oder Filter-Schlüsseln.
+        """
+        preset_ids = self.ids_for_names(names)
+        if not preset_filter:
+            return list(names)
+        unknown_keys = [key for key in preset_filter if key not in PRESET_FILTER_KEYS]
+        if unknown_keys:
+            raise ValueError(
+                f"Unbekannte Preset-Filter-Schlüssel: {', '.join(unknown_keys)} "
+                f"(erlaubt: {', '.join(PRESET_FILTER_KEYS)})"
+            )
+        return [self.names[preset_id] for preset_id in self.select(preset_ids=preset_ids, **preset_filter)]
+
+    def value_range(self, column: str, style: Optional[str] = None) -> Tuple[float, float]:
+        """(min, max) einer Spalte (z. B. "tempo_bpm") über die Presets eines Stils.
+
+        Für einen Stil ohne Presets (oder style = None) gilt der Bereich
+        über alle Presets.
+        """
+        values = getattr(self, column)
+        if style in self.style_names:
+            values = values[self.style_id == self.style_names.index(style)]
+        return float(values.min()), float(values.max())
+
+    @staticmethod
+    def _lookup_ids(names: Tuple[str, ...], wanted: Sequence[str], label: str) -> List[int]:
+        unknown = [name for name in wanted if name not in names]
+        if unknown:
+            raise ValueError(f"Unbekannte(r) {label}: {', '.join(unknown)}")
+        return [names.index(name) for name in wanted]
+
+
+@lru_cache(maxsize=None)
+def builtin_preset_registry() -> PresetRegistry:
+    """Registry aller eingebauten Presets (beim ersten Aufruf kompiliert, nicht beim Import)."""
+    return PresetRegistry(DATASET_PRESETS.values())
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .audio_augmenter import audio_augmenter_for
+from .segment_slicer import segment_slicer_for
+from .silence_trimmer import silence_trimmer_for
+from .label_extractor import LABEL_FORMATS
+from .loudness_normalizer import loudness_normalizer_for
+from .preset_grid import preset_registry_for
+from .soundfont_inspector import SOUNDFONT_PREFLIGHT_MODES
+
+# Standardwerte für einen Lauf. Die Schlüssel entsprechen dataset_config;
+# eine Konfigurationsdatei oder CLI-Overrides überschreiben einzelne Werte.
+DEFAULT_RUN_CONFIG: Dict[str, Any] = {
+    "output_root_directory": os.path.join("data", "synthetic_drums_dataset_v1"),
+    "yourmt3_index_output_directory": os.path.join("data", "yourmt3_indexes"),
+    "midi_subdir": "midi",
+    "audio_subdir": "audio",
+    "soundfont_path": "Assets/GeneralUser-GS.sf2",
+    "audio_sample_rate": 16000,
+    "extra_sample_rates": [],  # z. B. [44100]: Mix zusätzlich in audio_<rate>/ (ein Synthese-Durchlauf, Resampling)
+    "audio_render_backend": "fluidsynth",
+    "soundfont_preflight": "error",  # "error", "warn" oder "off": fehlende Presets vor dem Build melden
+    "soundfont_cache_directory": os.path.join("data", ".soundfont_cache"),  # Preset-Tabellen je Soundfont-Hash
+    "soundfont_pool": None,  # z. B. ["Assets/GeneralUser-GS.sf2", "Assets/FluidR3_GM.sf2"]: Soundfont je Song
+    "soundfont_memory_limit_mb": 2048,  # gleichzeitig geladene Soundfonts pro Prozess (Summe der Dateigrößen)
+    "midi_sample_rate": 16000,
+    "midi_ticks_per_beat": 480,
+    "number_of_songs": 250,
+    "number_of_presets": None,  # None = alle preset_names_to_use
+    "min_song_length_seconds": 20.0,
+    "max_song_length_seconds": 60.0,
+    "global_random_seed": 1234,
+    "minimum_velocity": 5,
+    "time_unit": "seconds",
+    "include_non_drums": True,
+    "harmony_batched": False,
+    "tick_timeline": False,  # Generatoren rechnen in MIDI-Ticks (midi_ticks_per_beat) statt Sekunden
+    "label_verify_fraction": 0.0,  # Anteil Songs, deren Labels gegen die MIDI-Datei geprüft werden
+    "silence_trim": None,  # z. B. {"threshold_db": -60, "release_seconds": 0.5}: Stille am Songende kürzen
+    "loudness_normalization": None,  # z. B. {"target_lufs": -20, "peak_dbfs": -1}: Songs auf gleiche Lautheit normieren
+    "segment_slicing": None,  # z. B. {"segment_seconds": 2.048}: Segmente fester Länge + Event-Fenster (segments/)
+    "export_stems": False,  # Drum- und Begleit-Stems im selben Synthese-Durchlauf wie der Mix (stems/)
+    "audio_augmentation": None,  # z. B. {"number_of_variants": 2, "effects": ["eq", "reverb"]} (AudioAugmenter)
+    "label_format": "json",  # "json", "json_compact", "note_sequence", "binary" oder "none" (LABEL_FORMATS)
+    "preset_names_to_use": None,  # None = alle DATASET_PRESETS
+    "preset_grid": None,  # z. B. {"samples_per_cell": 2, "tempo_range": [95, 135]} (PresetGrid statt DATASET_PRESETS)
+    "preset_filter": None,  # z. B. {"styles": ["funk"], "tempo_range": [100, 130]} (PresetRegistry.select)
+    "train_ratio": 0.80,
+    "val_ratio": 0.10,
+    "test_ratio": 0.10,
+    "split_seed": 1234,
+    "number_of_workers": 1,
+    "shard_index": 0,
+    "number_of_shards": 1,
+}
+
+
+def _read_config_file(config_path: str) -> Dict[str, Any]:
+    """Liest eine TOML- oder JSON-Datei mit Laufparametern ein."""
+    extension = os.path.splitext(config_path)[1].lower()
+
+    if extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib  # type: ignore[no-redef]
+        with open(config_path, "rb") as f:
+            data = tomllib.load(f)
+    elif extension == ".json":
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        raise ValueError(
+            f"Unbekanntes Konfigurationsformat {extension!r} (erwartet .toml oder .json): {config_path}"
+        )
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Konfiguration muss eine Tabelle/ein Objekt sein: {config_path}")
+
+    # Optional: alle Parameter unter [dataset] statt auf oberster Ebene
+    if set(data) == {"dataset"} and isinstance(data["dataset"], dict):
+        data = data["dataset"]
+    return data
+
+
+def _apply_values(config: Dict[str, Any], values: Mapping[str, Any], source: str) -> None:
+    for key, value in values.items():
+        if key not in DEFAULT_RUN_CONFIG:
+            raise ValueError(f"Unbekannter Konfigurationsschlüssel {key!r} in {source}")
+        config[key] = value
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parst eine Shard-Angabe "i/n" (i = 0 .. n-1) zu (shard_index, number_of_shards)."""
+    try:
+        index_str, count_str = value.split("/")
+        shard_index, number_of_shards = int(index_str), int(count_str)
+    except ValueError:
+        raise ValueError(f"Ungültige Shard-Angabe {value!r} (erwartet i/n, z. B. 3/8)") from None
+
+    if number_of_shards < 1 or not 0 <= shard_index < number_of_shards:
+        raise ValueError(f"Shard-Index muss in 0..{number_of_shards - 1} liegen: {value!r}")
+    return shard_index, number_of_shards
+
+
+def parse_override(value: str) -> Tuple[str, Any]:
+    """Parst eine Überschreibung "key=value"; value wird, wenn möglich, als JSON gelesen."""
+    if "=" not in value:
+        raise ValueError(f"Ungültige Überschreibung {value!r} (erwartet key=value)")
+    key, raw = value.split("=", 1)
+    try:
+        parsed: Any = json.loads(raw)
+    except json.JSONDecodeError:
+        parsed = raw  # z. B. Pfade oder Backend-Namen ohne Anführungszeichen
+    return key.strip(), parsed
+
+
+def load_run_config(
+        config_path: Optional[str] = None,
+        overrides: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Baut dataset_config aus Standardwerten, Konfigurationsdatei und Overrides.
+
+    Beschreibung:
+        Reihenfolge (spätere gewinnen): DEFAULT_RUN_CONFIG, Datei,
+        overrides. Overrides mit Wert None werden ignoriert, damit nicht
+        gesetzte CLI-Optionen die Datei nicht überschreiben. Unbekannte
+        Schlüssel führen zu einem ValueError, damit Tippfehler nicht
+        stillschweigend einen Lauf mit Standardwerten starten.
+
+    Args:
+        config_path: Pfad zu einer .toml- oder .json-Datei (optional).
+        overrides: Einzelne Werte, die Datei und Standardwerte überschreiben.
+
+    Returns:
+        Vollständiges dataset_config-Dict.
+    """
+    config: Dict[str, Any] = dict(DEFAULT_RUN_CONFIG)
+
+    if config_path is not None:
+        _apply_values(config, _read_config_file(config_path), config_path)
+
+    if overrides:
+        _apply_values(
+            config,
+            {key: value for key, value in overrides.items() if value is not None},
+            "Overrides",
+        )
+
+    preset_registry = preset_registry_for(config["preset_grid"])
+    if config["preset_names_to_use"] is None:
+        config["preset_names_to_use"] = list(preset_registry.names)
+    config["preset_names_to_use"] = preset_registry.filter_names(
+        config["preset_names_to_use"], config["preset_filter"]
+    )
+
+    if config["number_of_presets"] is None:
+        config["number_of_presets"] = len(config["preset_names_to_use"])
+    if int(config["number_of_presets"]) > len(config["preset_names_to_use"]):
+        raise ValueError(
+            "number_of_presets is larger than preset_names_to_use. "
+            "Either reduce number_of_presets or add more preset names."
+        )
+
+    number_of_shards = int(config["number_of_shards"])
+    if number_of_shards < 1 or not 0 <= int(config["shard_index"]) < number_of_shards:
+        raise ValueError(
+            f"shard_index muss in 0..{number_of_shards - 1} liegen (ist {config['shard_index']})"
+        )
+    if not 0.0 <= float(config["label_verify_fraction"]) <= 1.0:
+        raise ValueError("label_verify_fraction muss in 0..1 liegen.")
+    if config["time_unit"] not in ("seconds", "ticks"):
+        raise ValueError(f"time_unit muss 'seconds' oder 'ticks' sein (ist {config['time_unit']!r}).")
+    if config["label_format"] not in LABEL_FORMATS:
+        raise ValueError(
+            f"label_format muss eines von {tuple(LABEL_FORMATS)} sein (ist {config['label_format']!r})."
+        )
+    if config["soundfont_preflight"] not in SOUNDFONT_PREFLIGHT_MODES:
+        raise ValueError(
+            f"soundfont_preflight muss eines von {SOUNDFONT_PREFLIGHT_MODES} sein "
+            f"(ist {config['soundfont_preflight']!r})."
+        )
+    soundfont_pool = config["soundfont_pool"]
+    if soundfont_pool is not None and (
+            isinstance(soundfont_pool, str) or not soundfont_pool
+            or not all(isinstance(path, str) for path in soundfont_pool)
+    ):
+        raise ValueError("soundfont_pool muss None oder eine nicht leere Liste von Soundfont-Pfaden sein.")
+    if float(config["soundfont_memory_limit_mb"]) <= 0:
+        raise ValueError("soundfont_memory_limit_mb muss größer als 0 sein.")
+    extra_sample_rates = config["extra_sample_rates"]
+    if isinstance(extra_sample_rates, (str, int)) or not all(
+            isinstance(sample_rate, int) and sample_rate > 0 for sample_rate in extra_sample_rates
+    ):
+        raise ValueError("extra_sample_rates muss eine Liste positiver Sampleraten sein (z. B. [44100]).")
+    # Wirft ValueError bei unbekannten Schlüsseln oder Effekten
+    audio_augmenter_for(config["audio_augmentation"], int(config["audio_sample_rate"]))
+    silence_trimmer_for(config["silence_trim"], int(config["audio_sample_rate"]))
+    segment_slicer_for(config["segment_slicing"], int(config["audio_sample_rate"]))
+    loudness_normalizer_for(config["loudness_normalization"], int(config["audio_sample_rate"]))
+    if int(config["number_of_workers"]) < 1:
+        raise ValueError("number_of_workers muss mindestens 1 sein.")
+
+    return config
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+class SegmentSlicer:
+    """Teilt einen Song in Segmente fester Länge mit passenden Event-Fenstern.
+
+    Verantwortung:
+        YourMT3 trainiert auf Ausschnitten fester Länge und bestimmt sonst
+        in jeder Epoche Schnittgrenzen und Noten je Ausschnitt neu.
+        SegmentSlicer legt die Segmente einmal beim Build fest:
+            - slice_audio: Audio als (Segmente, segment_length) float32,
+              letztes Segment mit Stille aufgefüllt; als .npy geschrieben
+              liegen die Segmente direkt hintereinander, ein Batch
+              aufeinanderfolgender Segmente ist ein sequenzieller Read
+              (oder ein Slice einer Memmap),
+            - event_boundaries: Grenzen der nach Zeit sortierten NoteEvents
+              je Segment (ein searchsorted statt Filtern pro Segment),
+            - tie_notes: melodische Noten, die über einen Segmentanfang
+              hinausklingen (Onset vor, Offset nach dem Segmentanfang) –
+              daraus entstehen die tie_note_events im YourMT3-Bundle.
+        Alle Zeiten bleiben absolut (wie in YourMT3, dort mit start_times).
+    """
+
+    def __init__(self, sample_rate: int, segment_seconds: float = 2.048) -> None:
+        """Konstruktor für den SegmentSlicer.
+
+        Args:
+            sample_rate: Samplerate des Audios.
+            segment_seconds: Segmentlänge (2.048 s = 32768 Samples bei 16 kHz).
+
+        Raises:
+            ValueError: Wenn ein Segment kürzer als ein Sample wäre.
+        """
+        self.sample_rate = int(sample_rate)
+        self.segment_length = int(round(float(segment_seconds) * self.sample_rate))
+        if self.segment_length < 1:
+            raise ValueError("segment_seconds ist zu kurz für die Samplerate.")
+        # Auf ganze Samples gerundet, damit Audio- und Event-Grenzen übereinstimmen
+        self.segment_seconds = self.segment_length / self.sample_rate
+
+    @classmethod
+    def from_config(cls, segment_slicing: Mapping[str, Any], sample_rate: int) -> "SegmentSlicer":
+        """Baut einen SegmentSlicer aus dem Konfigurationswert segment_slicing.
+
+        Raises:
+            ValueError: Bei unbekannten Schlüsseln.
+        """
+        unknown = [key for key in segment_slicing if key != "segment_seconds"]
+        if unknown:
+            raise ValueError(f"Unbekannte segment_slicing-Schlüssel: {', '.join(unknown)}")
+        return cls(sample_rate=sample_rate, **dict(segment_slicing))
+
+    def number_of_segments(self, n_frames: int) -> int:
+        return max(1, -(-int(n_frames) // self.segment_length))
+
+    def start_times(self, n_frames: int) -> np.ndarray:
+        """Anfang jedes Segments in Sekunden."""
+        return np.arange(self.number_of_segments(n_frames)) * self.segment_seconds
+
+    def slice_audio(self, audio: np.ndarray) -> np.ndarray:
+        """Segmente des Signals als C-zusammenhängendes Array (Segmente, segment_length)."""
+        n_segments = self.number_of_segments(audio.shape[0])
+        segments = np.zeros(n_segments * self.segment_length, dtype=np.float32)
+        segments[:audio.shape[0]] = audio
+        return segments.reshape(n_segments, self.segment_length)
+
+    def event_boundaries(self, event_times: np.ndarray, n_segments: int) -> np.ndarray:
+        """Indexgrenzen der Events je Segment: Segment k enthält events[b[k]:b[k+1]].
+
+        Ein Event genau auf einer Segmentgrenze gehört zum späteren Segment,
+        Events nach dem letzten Segmentanfang zum letzten Segment.
+        """
+        starts = np.arange(n_segments) * self.segment_seconds
+        boundaries = np.empty(n_segments + 1, dtype=np.int64)
+        boundaries[:-1] = np.searchsorted(np.asarray(event_times, dtype=np.float64), starts, side="left")
+        boundaries[0] = 0
+        boundaries[-1] = len(event_times)
+        return boundaries
+
+    def tie_notes(
+            self,
+            onsets: np.ndarray,
+            offsets: np.ndarray,
+            is_drum: np.ndarray,
+            n_segments: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Noten, die an einem Segmentanfang noch klingen.
+
+        Eine Note hängt in Segment k über, wenn onset < k · segment_seconds
+        < offset (Drums haben keine Offsets und hängen nie über).
+
+        Returns:
+            (Segment-Index, Noten-Index) je Überhang, sortiert nach Segment,
+            innerhalb eines Segments in Notenreihenfolge.
+        """
+        starts = np.arange(n_segments) * self.segment_seconds
+        # erster Segmentanfang nach dem Onset, letzter vor dem Offset (Grenzen wie event_boundaries)
+        first = np.searchsorted(starts, np.asarray(onsets, dtype=np.float64), side="right")
+        last = np.searchsorted(starts, np.asarray(offsets, dtype=np.float64), side="left") - 1
+        counts = np.where(np.asarray(is_drum, dtype=bool), 0, np.maximum(last - first + 1, 0))
+
+        note_index = np.repeat(np.arange(onsets.shape[0]), counts)
+        # laufender Zähler innerhalb jeder Note: first, first + 1, ..., last
+        within = np.arange(note_index.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+        segment_index = first[note_index] + within
+
+        order = np.lexsort((note_index, segment_index))
+        return segment_index[order], note_index[order]
+
+
+def segment_slicer_for(
+        segment_slicing: Optional[Mapping[str, Any]],
+        sample_rate: int,
+) -> Optional[SegmentSlicer]:
+    """SegmentSlicer für den Konfigurationswert segment_slicing (None = keine Segmente)."""
+    if segment_slicing is None:
+        return None
+    return SegmentSlicer.from_config(segment_slicing, sample_rate)
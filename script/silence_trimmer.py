@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+
+class SilenceTrimmer:
+    """Kürzt die Stille am Ende eines gerenderten Songs.
+
+    Verantwortung:
+        pretty_midi rendert bis zum letzten MIDI-Event plus 1 s Ausklang;
+        Pausen-Takte am Songende und leise Hallfahnen landen so als Stille
+        in der WAV-Datei und in n_frames. SilenceTrimmer berechnet eine
+        RMS-Hüllkurve in Blöcken von frame_seconds (ein reshape, keine
+        Schleife), sucht den letzten Block über threshold_db (relativ zu
+        0 dBFS) und behält danach noch release_seconds Ausklang.
+        Nie gekürzt wird vor min_length (z. B. dem Ende der letzten Note),
+        damit alle Noten und Labels vollständig im Audio liegen.
+        Der Songanfang bleibt unverändert, Onsets verschieben sich nicht.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int,
+            threshold_db: float = -60.0,
+            release_seconds: float = 0.5,
+            frame_seconds: float = 0.01,
+    ) -> None:
+        """Konstruktor für den SilenceTrimmer.
+
+        Args:
+            sample_rate: Samplerate der Signale.
+            threshold_db: Blöcke mit RMS unter diesem Pegel (dBFS) gelten als still.
+            release_seconds: Ausklang, der nach dem letzten hörbaren Block erhalten bleibt.
+            frame_seconds: Blocklänge der RMS-Hüllkurve.
+
+        Raises:
+            ValueError: Bei ungültigen Längen oder threshold_db > 0.
+        """
+        if float(release_seconds) < 0.0 or float(frame_seconds) <= 0.0:
+            raise ValueError("release_seconds muss >= 0 und frame_seconds > 0 sein.")
+        if float(threshold_db) > 0.0:
+            raise ValueError("threshold_db muss <= 0 dBFS sein.")
+
+        self.sample_rate = int(sample_rate)
+        self.threshold_db = float(threshold_db)
+        self.release_seconds = float(release_seconds)
+        self.frame_seconds = float(frame_seconds)
+
+        self.frame_length = max(1, int(round(self.frame_seconds * self.sample_rate)))
+        self.release_length = int(round(self.release_seconds * self.sample_rate))
+
+    @classmethod
+    def from_config(cls, silence_trim: Mapping[str, Any], sample_rate: int) -> "SilenceTrimmer":
+        """Baut einen SilenceTrimmer aus dem Konfigurationswert silence_trim.
+
+        Erlaubt sind die Schlüsselwortargumente des Konstruktors außer sample_rate.
+
+        Raises:
+            ValueError: Bei unbekannten Schlüsseln.
+        """
+        allowed = ("threshold_db", "release_seconds", "frame_seconds")
+        unknown = [key for key in silence_trim if key not in allowed]
+        if unknown:
+            raise ValueError(f"Unbekannte silence_trim-Schlüssel: {', '.join(unknown)}")
+        return cls(sample_rate=sample_rate, **dict(silence_trim))
+
+    def rms_envelope(self, audio: np.ndarray) -> np.ndarray:
+        """RMS je Block von frame_length Samples (letzter Block mit Nullen aufgefüllt)."""
+        n_frames = -(-audio.shape[0] // self.frame_length)
+        padded = np.zeros(n_frames * self.frame_length, dtype=np.float64)
+        padded[:audio.shape[0]] = audio
+        return np.sqrt(np.mean(np.square(padded.reshape(n_frames, self.frame_length)), axis=1))
+
+    def trimmed_length(self, audio: np.ndarray, min_length: int = 0) -> int:
+        """Länge des Signals ohne die Stille am Ende (mindestens min_length, mindestens 1).
+
+        Args:
+            audio: Mono-Signal (z. B. der Mix).
+            min_length: Untergrenze in Samples (z. B. Ende der letzten Note).
+
+        Returns:
+            Neue Länge in Samples, höchstens len(audio).
+        """
+        if audio.shape[0] == 0:
+            return 0
+
+        threshold = 10.0 ** (self.threshold_db / 20.0)
+        loud = np.flatnonzero(self.rms_envelope(audio) >= threshold)
+        audible_end = (int(loud[-1]) + 1) * self.frame_length if loud.size else 0
+
+        length = max(audible_end + self.release_length, int(min_length), 1)
+        return min(length, int(audio.shape[0]))
+
+
+def silence_trimmer_for(
+        silence_trim: Optional[Mapping[str, Any]],
+        sample_rate: int,
+) -> Optional[SilenceTrimmer]:
+    """SilenceTrimmer für den Konfigurationswert silence_trim (None = nicht kürzen)."""
+    if silence_trim is None:
+        return None
+    return SilenceTrimmer.from_config(silence_trim, sample_rate)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Sequence, Tuple, Union
+
+import numpy as np
+
+# Spalten in fester Reihenfolge (Konstruktor, take, Datei)
+COLUMNS = ("global_song_index", "preset_id", "random_seed", "number_of_bars", "band", "basename")
+
+# Füllwert in der band-Spalte für nicht belegte Plätze (wie InstrumentCatalog.NO_INSTRUMENT)
+NO_INSTRUMENT = -1
+
+
+class SongPlan:
+    """Unveränderlicher Plan aller Songs eines Laufs als Tabelle (struct of arrays).
+
+    Verantwortung:
+        SongPlan hält alle deterministischen Entscheidungen eines Laufs
+        (Song-Index, Preset, Seed, Taktanzahl, Band, Basisname) als parallele
+        NumPy-Arrays, bevor irgendetwas gerendert wird. Der Plan wird als
+        .npz-Datei gespeichert; Worker, Shards und fortgesetzte Läufe lesen
+        denselben Plan, statt die Entscheidungen aus Zählern neu abzuleiten.
+
+        preset_id verweist in preset_names, band enthält je Song die
+        Indizes im InstrumentCatalog (aufgefüllt mit NO_INSTRUMENT).
+        settings beschreibt die Konfiguration, aus der der Plan entstand,
+        damit ein gespeicherter Plan nicht versehentlich mit einer anderen
+        Konfiguration weiterverwendet wird.
+    """
+
+    __slots__ = ("preset_names", "settings") + COLUMNS
+
+    def __init__(
+            self,
+            preset_names: Sequence[str],
+            settings: Dict[str, Any],
+            global_song_index: np.ndarray,
+            preset_id: np.ndarray,
+            random_seed: np.ndarray,
+            number_of_bars: np.ndarray,
+            band: np.ndarray,
+            basename: np.ndarray,
+    ) -> None:
+        """Konstruktor für einen SongPlan.
+
+        Args:
+            preset_names: Namen der Presets (Index = preset_id).
+            settings: JSON-fähige Beschreibung der Plan-Konfiguration.
+            global_song_index: Globaler Song-Index (1-basiert) je Song.
+            preset_id: Index in preset_names je Song.
+            random_seed: Seed je Song.
+            number_of_bars: Taktanzahl je Song.
+            band: Katalog-Indizes der Band, Form (Songs, maximale Bandgröße).
+            basename: Basisname der Artefakte je Song.
+        """
+        self.preset_names: Tuple[str, ...] = tuple(preset_names)
+        self.settings: Dict[str, Any] = dict(settings)
+        self.global_song_index = np.asarray(global_song_index, dtype=np.int64)
+        self.preset_id = np.asarray(preset_id, dtype=np.int32)
+        self.random_seed = np.asarray(random_seed, dtype=np.int64)
+        self.number_of_bars = np.asarray(number_of_bars, dtype=np.int32)
+        self.band = np.asarray(band, dtype=np.int16).reshape(self.global_song_index.shape[0], -1)
+        self.basename = np.asarray(basename, dtype=np.str_)
+
+    def __len__(self) -> int:
+        return int(self.global_song_index.shape[0])
+
+    def preset_name(self, row: int) -> str:
+        return self.preset_names[int(self.preset_id[row])]
+
+    def band_indices(self, row: int) -> np.ndarray:
+        """Katalog-Indizes der Band eines Songs (ohne Füllwerte)."""
+        band = self.band[row]
+        return band[band != NO_INSTRUMENT]
+
+    # ------------------------------------------------------------------ #
+    # Auswählen
+    # ------------------------------------------------------------------ #
+
+    def take(self, index: Union[np.ndarray, Sequence[int]]) -> "SongPlan":
+        index = np.asarray(index, dtype=np.int64)
+        return SongPlan(
+            self.preset_names,
+            self.settings,
+            **{name: getattr(self, name)[index] for name in COLUMNS},
+        )
+
+    def shard(self, shard_index: int, number_of_shards: int) -> "SongPlan":
+        """Songs mit (global_song_index - 1) % number_of_shards == shard_index."""
+        return self.take(np.flatnonzero((self.global_song_index - 1) % number_of_shards == shard_index))
+
+    # ------------------------------------------------------------------ #
+    # Datei
+    # ------------------------------------------------------------------ #
+
+    def save(self, path: str) -> None:
+        """Speichert den Plan als .npz-Datei (atomar über eine temporäre Datei)."""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                preset_names=np.asarray(self.preset_names, dtype=np.str_),
+                settings=np.asarray(json.dumps(self.settings, sort_keys=True)),
+                **{name: getattr(self, name) for name in COLUMNS},
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SongPlan":
+        """Lädt einen mit save gespeicherten Plan."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["preset_names"].tolist(),
+                json.loads(str(data["settings"])),
+                **{name: data[name] for name in COLUMNS},
+            )
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .instrument import Instrument
+
+# Verhalten der Preset-Prüfung vor dem Build
+SOUNDFONT_PREFLIGHT_MODES = ("error", "warn", "off")
+
+# Bank der Drum-Kits (wie pretty_midi/FluidSynth für Kanal 9) und Programm des Drum-Tracks
+DRUM_BANK = 128
+DRUM_KIT_PROGRAM = 0
+
+# Format der Cache-Dateien (bei Änderungen am Parser erhöhen)
+PRESET_CACHE_VERSION = 1
+
+# phdr-Datensatz: Name[20], Preset, Bank, Bag-Index, Library, Genre, Morphology
+_PHDR_RECORD = struct.Struct("<20sHHHIII")
+_CHUNK_HEADER = struct.Struct("<4sI")
+
+# Bereits gelesene Tabellen dieses Prozesses, Schlüssel (absoluter Pfad, mtime_ns, Größe)
+_TABLE_MEMO: Dict[Tuple[str, int, int], "SoundfontPresetTable"] = {}
+
+
+@dataclass(frozen=True)
+class SoundfontPreset:
+    """Ein Eintrag der Preset-Tabelle (phdr) einer .sf2-Datei."""
+    name: str
+    program: int
+    bank: int
+
+
+def _find_chunk(f, end: int, chunk_id: bytes, list_type: Optional[bytes] = None) -> Tuple[int, int]:
+    """Sucht ab der aktuellen Position bis end einen Chunk; liefert (Datenstart, Größe).
+
+    Daten anderer Chunks (z. B. die Samples in LIST sdta) werden übersprungen,
+    nicht gelesen.
+    """
+    while f.tell() + _CHUNK_HEADER.size <= end:
+        found_id, size = _CHUNK_HEADER.unpack(f.read(_CHUNK_HEADER.size))
+        start = f.tell()
+        if found_id == chunk_id and (list_type is None or f.read(4) == list_type):
+            return start, size
+        f.seek(start + size + (size & 1))
+    raise ValueError(f"Chunk {chunk_id.decode('ascii', 'replace')!r} nicht gefunden.")
+
+
+def read_sf2_presets(path: str) -> List[SoundfontPreset]:
+    """Liest die Preset-Tabelle (pdta/phdr) einer .sf2-Datei.
+
+    Raises:
+        ValueError: Wenn die Datei keine gültige SoundFont-2-Datei ist.
+    """
+    with open(path, "rb") as f:
+        riff_id, riff_size = _CHUNK_HEADER.unpack(f.read(_CHUNK_HEADER.size))
+        if riff_id != b"RIFF" or f.read(4) != b"sfbk":
+            raise ValueError(f"{path!r} ist keine SoundFont-2-Datei (RIFF/sfbk fehlt).")
+
+        try:
+            pdta_start, pdta_size = _find_chunk(f, _CHUNK_HEADER.size + riff_size, b"LIST", b"pdta")
+            f.seek(pdta_start + 4)
+            phdr_start, phdr_size = _find_chunk(f, pdta_start + pdta_size, b"phdr")
+        except ValueError as exc:
+            raise ValueError(f"{path!r}: {exc}") from None
+
+        f.seek(phdr_start)
+        data = f.read(phdr_size)
+
+    if len(data) < phdr_size or phdr_size % _PHDR_RECORD.size:
+        raise ValueError(f"{path!r}: phdr-Chunk ist beschädigt ({phdr_size} Bytes).")
+
+    presets: List[SoundfontPreset] = []
+    # Der letzte Datensatz ("EOP") markiert nur das Ende der Tabelle
+    for name, program, bank, *_ in list(_PHDR_RECORD.iter_unpack(data))[:-1]:
+        presets.append(SoundfontPreset(
+            name=name.split(b"\0", 1)[0].decode("latin-1").strip(),
+            program=int(program),
+            bank=int(bank),
+        ))
+    return presets
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SoundfontPresetTable:
+    """Preset-Tabelle einer Soundfont mit Ersatzvorschlägen für fehlende Presets.
+
+    Verantwortung:
+        SoundfontPresetTable liest die Preset-Tabelle einer .sf2-Datei
+        einmal ein (ohne FluidSynth) und legt sie als JSON unter dem
+        SHA-256 der Datei im Cache-Ordner ab; weitere Läufe mit derselben
+        Datei lesen nur noch den Cache.
+        resolve_program schlägt für ein fehlendes GM-Programm einen Ersatz
+        vor (eigene Heuristik, nicht das Verhalten von FluidSynth):
+            - melodisch (Bank 0): das Programm selbst, sonst das erste
+              vorhandene Programm derselben GM-Familie (8er-Gruppe), sonst
+              das erste Preset der Bank,
+            - Drums (Bank 128): das Programm selbst, sonst Kit 0.
+        Der Vorschlag erscheint nur in der Preflight-Meldung; gerendert wird
+        mit den Programmen aus der MIDI. Er wird pro (Programm, Drum) nur
+        einmal berechnet.
+    """
+
+    def __init__(self, presets: Sequence[SoundfontPreset], file_hash: str = "") -> None:
+        """Konstruktor für die SoundfontPresetTable.
+
+        Args:
+            presets: Presets der Soundfont (Reihenfolge wie in der Datei).
+            file_hash: SHA-256 der Soundfont-Datei (Cache-Schlüssel).
+        """
+        self.presets: Tuple[SoundfontPreset, ...] = tuple(presets)
+        self.file_hash: str = file_hash
+        self._names: Dict[Tuple[int, int], str] = {
+            (preset.bank, preset.program): preset.name for preset in self.presets
+        }
+        self._resolved: Dict[Tuple[int, bool], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.presets)
+
+    def has_preset(self, bank: int, program: int) -> bool:
+        return (int(bank), int(program)) in self._names
+
+    def preset_name(self, bank: int, program: int) -> Optional[str]:
+        return self._names.get((int(bank), int(program)))
+
+    def resolve_program(self, program: int, is_drum: bool = False) -> int:
+        """Ersatzvorschlag für (program, is_drum) nach der GM-Familien-Heuristik (siehe Klassendoku)."""
+        key = (int(program), bool(is_drum))
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            resolved = self._resolve(*key)
+            self._resolved[key] = resolved
+        return resolved
+
+    def _resolve(self, program: int, is_drum: bool) -> int:
+        if is_drum:
+            return program if self.has_preset(DRUM_BANK, program) else DRUM_KIT_PROGRAM
+        if self.has_preset(0, program):
+            return program
+
+        family = program - program % 8
+        bank_programs = sorted(preset.program for preset in self.presets if preset.bank == 0)
+        for candidate in bank_programs:
+            if family <= candidate < family + 8:
+                return candidate
+        return bank_programs[0] if bank_programs else program
+
+    def missing_presets(self, required: Iterable[Tuple[int, int, str]]) -> List[str]:
+        """Beschreibt alle (bank, program, Verwendung), die in der Soundfont fehlen."""
+        messages: List[str] = []
+        for bank, program, usage in required:
+            if self.has_preset(bank, program):
+                continue
+            replacement = self.resolve_program(program, is_drum=bank == DRUM_BANK)
+            replacement_name = self.preset_name(DRUM_BANK if bank == DRUM_BANK else 0, replacement)
+            if replacement_name is None:
+                messages.append(f"{usage}: Bank {bank}, Programm {program} fehlt (kein Ersatz vorhanden)")
+            else:
+                messages.append(
+                    f"{usage}: Bank {bank}, Programm {program} fehlt "
+                    f"(Ersatzvorschlag: Programm {replacement} {replacement_name!r})"
+                )
+        return messages
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": PRESET_CACHE_VERSION,
+            "file_hash": self.file_hash,
+            "presets": [[preset.bank, preset.program, preset.name] for preset in self.presets],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SoundfontPresetTable":
+        presets = [
+            SoundfontPreset(name=str(name), program=int(program), bank=int(bank))
+            for bank, program, name in data["presets"]
+        ]
+        return cls(presets, file_hash=str(data.get("file_hash", "")))
+
+    @classmethod
+    def load(cls, soundfont_path: str, cache_directory: Optional[str] = None) -> "SoundfontPresetTable":
+        """Liest die Tabelle aus dem Prozess-Speicher, dem Cache-Ordner oder der .sf2-Datei.
+
+        Args:
+            soundfont_path: Pfad zur .sf2-Datei.
+            cache_directory: Ordner für <sha256>.json; None = kein Cache auf der Platte.
+
+        Raises:
+            FileNotFoundError: Wenn die Soundfont nicht existiert.
+            ValueError: Wenn die Datei keine gültige SoundFont-2-Datei ist.
+        """
+        if not os.path.exists(soundfont_path):
+            raise FileNotFoundError(
+                f"Soundfont {soundfont_path!r} wurde nicht gefunden. "
+                "Passe den Pfad in deiner Konfiguration an."
+            )
+        stat = os.stat(soundfont_path)
+        memo_key = (os.path.abspath(soundfont_path), stat.st_mtime_ns, stat.st_size)
+        table = _TABLE_MEMO.get(memo_key)
+        if table is not None:
+            return table
+
+        file_hash = file_sha256(soundfont_path)
+        cache_path = os.path.join(cache_directory, f"{file_hash}.json") if cache_directory else None
+
+        if cache_path is not None and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == PRESET_CACHE_VERSION:
+                    table = cls.from_dict(data)
+            except (OSError, ValueError, KeyError, TypeError):
+                table = None  # beschädigter Cache: neu einlesen
+
+        if table is None:
+            table = cls(read_sf2_presets(soundfont_path), file_hash=file_hash)
+            if cache_path is not None:
+                os.makedirs(cache_directory, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(table.to_dict(), f, ensure_ascii=False)
+                os.replace(tmp_path, cache_path)
+
+        _TABLE_MEMO[memo_key] = table
+        return table
+
+
+def required_presets(instruments: Iterable[Instrument]) -> List[Tuple[int, int, str]]:
+    """(bank, program, Verwendung) aller Presets, die ein Build benötigt.
+
+    Melodische Instrumente spielen ihr gm_program aus Bank 0, der
+    Drum-Track (MidiSongBuilder) Kit DRUM_KIT_PROGRAM aus Bank 128.
+    """
+    required: List[Tuple[int, int, str]] = [(DRUM_BANK, DRUM_KIT_PROGRAM, "Drums")]
+    required.extend((0, int(instrument.gm_program), instrument.name) for instrument in instruments)
+    return required
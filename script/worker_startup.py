@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from typing import List, Optional, Sequence, Tuple
+
+# Module, die ein Build-Worker für einen kompletten Song braucht
+PIPELINE_MODULES: Tuple[str, ...] = (
+    "script.dataset_builder",
+    "pretty_midi",
+    "soundfile",
+)
+
+
+def build_pool_context() -> BaseContext:
+    """Multiprocessing-Kontext des Build-Pools (Standard-Startmethode der Plattform)."""
+    return multiprocessing.get_context()
+
+
+@dataclass
+class WorkerStartupReport:
+    """Gemessene Startkosten eines frischen Worker-Prozesses."""
+    start_method: str
+    spawn_seconds: float
+    import_seconds: float
+    modules: List[str]
+
+    @property
+    def interpreter_seconds(self) -> float:
+        """Anteil ohne Modul-Importe (Prozessstart, Interpreter, Pickling)."""
+        return max(0.0, self.spawn_seconds - self.import_seconds)
+
+    def summary(self) -> str:
+        return (
+            f"Worker-Start ({self.start_method}): {self.spawn_seconds:.2f} s "
+            f"(Importe {self.import_seconds:.2f} s, "
+            f"Prozess/Interpreter {self.interpreter_seconds:.2f} s)"
+        )
+
+
+def _import_modules(modules: Sequence[str]) -> float:
+    """Läuft im Worker: importiert die Module und liefert die Dauer in Sekunden."""
+    start = time.perf_counter()
+    for module_name in modules:
+        importlib.import_module(module_name)
+    return time.perf_counter() - start
+
+
+def measure_worker_startup(
+        modules: Sequence[str] = PIPELINE_MODULES,
+        start_method: Optional[str] = None,
+) -> WorkerStartupReport:
+    """Startet einen frischen Worker-Prozess und misst, bis er arbeitsbereit ist.
+
+    Beschreibung:
+        Gemessen wird die Zeit vom Anlegen des Pools bis zur ersten Antwort
+        des Workers, nachdem er alle angegebenen Module importiert hat. Der
+        Worker misst seine Importzeit selbst, der Rest entfällt auf
+        Prozessstart und Interpreter. Ohne start_method wird wie im
+        Build-Pool gestartet (build_pool_context); mit "fork" erbt der Worker
+        bereits importierte Module, die Importzeit ist dann entsprechend klein.
+
+    Args:
+        modules: Module, die der Worker vor seinem ersten Song importiert.
+        start_method: Multiprocessing-Startmethode ("spawn", "forkserver", "fork");
+            None = Startmethode des Build-Pools.
+
+    Returns:
+        Ein WorkerStartupReport.
+    """
+    context = build_pool_context() if start_method is None else multiprocessing.get_context(start_method)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        import_seconds = executor.submit(_import_modules, tuple(modules)).result()
+        spawn_seconds = time.perf_counter() - start
+
+    return WorkerStartupReport(
+        start_method=context.get_start_method(),
+        spawn_seconds=spawn_seconds,
+        import_seconds=import_seconds,
+        modules=list(modules),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Misst die Startzeit eines Build-Worker-Prozesses."
+    )
+    parser.add_argument(
+        "--start-method",
+        default=None,
+        choices=multiprocessing.get_all_start_methods(),
+        help="Multiprocessing-Startmethode (Standard: wie der Build-Pool).",
+    )
+    parser.add_argument(
+        "--module",
+        dest="modules",
+        action="append",
+        default=None,
+        help="Zu importierendes Modul (mehrfach möglich, Standard: Build-Pipeline).",
+    )
+    args = parser.parse_args(argv)
+
+    report = measure_worker_startup(
+        modules=args.modules or PIPELINE_MODULES,
+        start_method=args.start_method,
+    )
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from script.audio_augmenter import AudioAugmenter
+
+SAMPLE_RATE = 16000
+
+
+def _rms_db(audio: np.ndarray) -> np.ndarray:
+    return 20.0 * np.log10(np.sqrt(np.mean(np.square(audio, dtype=np.float64), axis=-1)))
+
+
+def _drum_like(seconds: float = 4.0) -> np.ndarray:
+    """Abklingende Rauschimpulse auf jeder Achtel (120 BPM), dazwischen Stille."""
+    rng = np.random.default_rng(0)
+    audio = np.zeros(int(seconds * SAMPLE_RATE))
+    hit_length = int(0.08 * SAMPLE_RATE)
+    envelope = np.exp(-np.arange(hit_length) / (0.015 * SAMPLE_RATE))
+    for start in range(0, audio.shape[0] - hit_length, int(0.25 * SAMPLE_RATE)):
+        audio[start:start + hit_length] += 0.1 * rng.standard_normal(hit_length) * envelope
+    return audio
+
+
+def _gated_tone(seconds: float = 4.0) -> np.ndarray:
+    """440-Hz-Ton, der alle 0.5 s ein- und ausgeschaltet wird."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    gate = (np.floor(t / 0.5) % 2 == 0).astype(np.float64)
+    return 0.3 * np.sin(2.0 * np.pi * 440.0 * t) * gate
+
+
+@pytest.mark.parametrize("signal", [_drum_like, _gated_tone])
+def test_compression_keeps_the_level(signal):
+    audio = signal()
+    augmenter = AudioAugmenter(sample_rate=SAMPLE_RATE, number_of_variants=8, effects=("compression",))
+
+    variants = augmenter.augment(audio, song_seed=1234)
+
+    assert variants.shape == (8, audio.shape[0])
+    np.testing.assert_allclose(_rms_db(variants), _rms_db(audio), atol=1.0)
+
+
+def test_empty_audio_is_returned_unchanged():
+    augmenter = AudioAugmenter(sample_rate=SAMPLE_RATE, number_of_variants=3)
+
+    variants = augmenter.augment(np.zeros(0, dtype=np.float32), song_seed=1)
+
+    assert variants.shape == (3, 0)
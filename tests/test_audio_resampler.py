@@ -0,0 +1,22 @@
+import numpy as np
+
+from script.audio_resampler import peak_limit_gain, resample
+
+
+def _square(sample_rate: int, seconds: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return np.sign(np.sin(2.0 * np.pi * 100.0 * t))
+
+
+def test_peak_limit_gain_removes_resampling_overshoot():
+    square = _square(44100)
+    resampled = resample(square, 44100, 16000)
+    assert np.max(np.abs(resampled)) > 1.1
+
+    gain = peak_limit_gain([resampled, square])
+
+    np.testing.assert_allclose(np.max(np.abs(resampled * gain)), 1.0)
+
+
+def test_peak_limit_gain_keeps_signals_below_the_limit():
+    assert peak_limit_gain([0.5 * _square(16000), np.zeros(0)]) == 1.0
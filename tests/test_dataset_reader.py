@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from script.dataset_reader import DatasetReader
+
+
+def _write_index(tmp_path, entries):
+    with open(tmp_path / "dataset_index.json", "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    return DatasetReader(str(tmp_path))
+
+
+@pytest.mark.parametrize("kind", ["audio_44100", "drum_stem", "accompaniment_stem"])
+def test_augmented_variant_reports_missing_rates_and_stems(tmp_path, kind):
+    reader = _write_index(tmp_path, [
+        {"song_identifier": "song", "mix_variant": "default", "audio_path": "song.wav"},
+        {"song_identifier": "song", "mix_variant": "aug00", "audio_path": "song__aug00.wav"},
+    ])
+
+    with pytest.raises(FileNotFoundError, match="augmentierte Varianten"):
+        reader.artifact_path(1, kind)
+
+
+def test_default_mix_names_the_missing_option(tmp_path):
+    reader = _write_index(tmp_path, [{"song_identifier": "song", "audio_path": "song.wav"}])
+
+    with pytest.raises(FileNotFoundError, match="extra_sample_rates"):
+        reader.artifact_path(0, "audio_44100")
+    with pytest.raises(FileNotFoundError, match="export_stems"):
+        reader.artifact_path(0, "drum_stem")